@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+# filepath: /home/comunikime/code/jarvis/async_interface.py
+"""
+Módulo com o ciclo de conversação assíncrono do Jarvis. A resposta do
+assistente é transmitida frase a frase: enquanto uma frase toca, a próxima
+já está sendo sintetizada e o texto seguinte continua chegando pela rede.
+"""
+
+import asyncio
+import sys
+
+from interface import JarvisInterface, split_sentences
+from log_manager import LogManager
+
+# Configura o logger
+log = LogManager().logger
+
+# Códigos de erro retornados por AudioHandler.listen
+_SPEECH_ERRORS = ["SPEECH_NOT_RECOGNIZED", "SPEECH_SERVICE_DOWN", "SPEECH_ERROR"]
+
+
+class AsyncJarvisInterface(JarvisInterface):
+    """Ciclo de conversação do Jarvis sobre asyncio."""
+
+    def __init__(self, openai_client, audio_handler):
+        """
+        Inicializa a interface assíncrona.
+
+        Args:
+            openai_client: Instância de AsyncOpenAIClient
+            audio_handler: Manipulador de áudio criado com um cliente AsyncOpenAI
+        """
+        super().__init__(openai_client, audio_handler)
+        # Sinaliza que nenhuma resposta está sendo falada (libera o microfone)
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    async def analyze_image(self, image_path):
+        """
+        Analisa uma imagem usando a API OpenAI.
+
+        Args:
+            image_path: Caminho para a imagem a ser analisada
+        """
+        log.info(f"Analisando imagem: {image_path}")
+        response = await self.openai_client.send_message("O que você vê nesta imagem?", image_path=image_path)
+        await self.audio_handler.speak_async(response)
+
+    async def _response_stream(self, user_input):
+        """
+        Produz a resposta para a entrada do usuário em partes.
+
+        Args:
+            user_input: A pergunta ou comando do usuário
+
+        Yields:
+            str: Trechos da resposta
+        """
+        if self.is_github_query(user_input):
+            log.info("Processando consulta GitHub")
+            response = await asyncio.to_thread(self._answer_github_locally, user_input)
+            if response is not None:
+                yield response
+                return
+            user_input = self._github_prompt(user_input)
+
+        async for part in self.openai_client.stream_message(user_input):
+            yield part
+
+    async def _respond(self, user_input):
+        """
+        Transmite a resposta e a fala frase a frase.
+
+        Cada frase completa dispara sua síntese imediatamente; a reprodução
+        segue a ordem das frases, então a síntese da próxima se sobrepõe à
+        reprodução da atual.
+
+        Args:
+            user_input: A pergunta ou comando do usuário
+        """
+        if self.audio_handler.text_only:
+            print("Jarvis: ", end="", flush=True)
+            response = ""
+            async for part in self._response_stream(user_input):
+                print(part, end="", flush=True)
+                response += part
+            print()
+            log.debug(f"Jarvis (texto): {response}")
+            return
+
+        playback = asyncio.Queue()
+        player = asyncio.create_task(self._play_queue(playback))
+        try:
+            buffer = ""
+            async for part in self._response_stream(user_input):
+                buffer += part
+                sentences, buffer = split_sentences(buffer)
+                for sentence in sentences:
+                    playback.put_nowait(self._start_synthesis(sentence))
+            if buffer.strip():
+                playback.put_nowait(self._start_synthesis(buffer))
+            playback.put_nowait(None)
+            await player
+        finally:
+            if not player.done():
+                player.cancel()
+            while not playback.empty():
+                task = playback.get_nowait()
+                if task is not None:
+                    task.cancel()
+
+    def _start_synthesis(self, sentence):
+        """
+        Inicia a síntese de uma frase em segundo plano.
+
+        Args:
+            sentence: Frase a ser sintetizada
+
+        Returns:
+            asyncio.Task: Tarefa que resolve para o áudio WAV
+        """
+        log.info(f"Jarvis (falando): {sentence}")
+        return asyncio.create_task(self.audio_handler.synthesize_async(sentence))
+
+    async def _play_queue(self, playback):
+        """
+        Reproduz, em ordem, os áudios das frases sintetizadas.
+
+        Args:
+            playback: Fila de tarefas de síntese, terminada por None
+        """
+        while True:
+            task = await playback.get()
+            if task is None:
+                return
+            try:
+                await self.audio_handler.play_async(await task)
+            except asyncio.CancelledError:
+                task.cancel()
+                raise
+            except Exception as e:
+                log.exception(f"Erro de áudio: {e}")
+
+    async def _read_line(self, prompt):
+        """
+        Lê uma linha do terminal sem bloquear o loop de eventos.
+
+        Args:
+            prompt: Texto exibido antes da leitura
+
+        Returns:
+            str: Linha digitada, sem a quebra de linha
+
+        Raises:
+            EOFError: Se a entrada padrão for encerrada
+        """
+        print(prompt, end="", flush=True)
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def on_ready():
+            if not future.done():
+                future.set_result(sys.stdin.readline())
+
+        loop.add_reader(sys.stdin, on_ready)
+        try:
+            line = await future
+        finally:
+            loop.remove_reader(sys.stdin)
+
+        if not line:
+            raise EOFError
+        return line.rstrip("\n")
+
+    async def _input_loop(self, inputs, with_voice):
+        """
+        Captura entradas do usuário e as coloca na fila.
+
+        No modo texto a leitura continua enquanto a resposta anterior é
+        processada, e uma nova entrada interrompe a resposta em andamento;
+        no modo voz o microfone só é aberto quando nenhuma
+        resposta está sendo falada, para não captar a própria voz do Jarvis.
+
+        Args:
+            inputs: Fila de entradas; None sinaliza o encerramento
+            with_voice: Se True, usa entrada por voz; caso contrário, texto
+        """
+        while True:
+            if with_voice:
+                await self._idle.wait()
+                log.debug("Aguardando entrada de voz")
+                user_input = await self.audio_handler.listen_async()
+
+                if user_input in _SPEECH_ERRORS:
+                    if user_input == "SPEECH_NOT_RECOGNIZED":
+                        log.warning("Fala não reconhecida")
+                        await self.audio_handler.speak_async("Desculpe, não entendi. Pode repetir?")
+                    else:
+                        log.error(f"Erro de reconhecimento: {user_input}")
+                        await self.audio_handler.speak_async("Desculpe, estou tendo problemas para entender você.")
+                    continue
+
+                is_exit = "sair" in user_input.lower() or "encerrar" in user_input.lower()
+            else:
+                log.debug("Aguardando entrada de texto")
+                user_input = await self._read_line("Você: ")
+                is_exit = user_input.lower() in ["sair", "exit", "quit"]
+
+            if is_exit:
+                log.info("Comando de saída detectado")
+                inputs.put_nowait(None)
+                return
+
+            # Bloqueia o microfone até a resposta desta entrada terminar
+            self._idle.clear()
+            inputs.put_nowait(user_input)
+
+    async def _handle_input(self, user_input):
+        """
+        Atende uma entrada do usuário: comando de nova conversa ou pergunta.
+
+        Args:
+            user_input: A pergunta ou comando do usuário
+        """
+        try:
+            if self.is_new_conversation(user_input):
+                await self.openai_client.new_conversation()
+                await self.audio_handler.speak_async("Certo, começando uma nova conversa.")
+            else:
+                await self._respond(user_input)
+        except Exception as e:
+            log.exception(f"Erro durante a conversa: {e}")
+            await self.audio_handler.speak_async("Encontrei um erro. Vamos tentar novamente.")
+
+    async def run_conversation(self, with_voice=True):
+        """
+        Executa o ciclo de conversação assíncrono.
+
+        Args:
+            with_voice: Se True, usa entrada e saída por voz; caso contrário, usa texto
+        """
+        reader = None
+        try:
+            if self.openai_client.thread_resumed:
+                log.info("Continuando conversa com thread existente")
+                await self.audio_handler.speak_async("Olá novamente. Continuando nossa conversa.")
+            else:
+                log.info("Iniciando nova conversa")
+                await self.audio_handler.speak_async("Olá, eu sou o Jarvis. Como posso ajudar você hoje?")
+
+            inputs = asyncio.Queue()
+            reader = asyncio.create_task(self._input_loop(inputs, with_voice))
+
+            superseded = False
+            while True:
+                if superseded:
+                    superseded = False
+                else:
+                    getter = asyncio.create_task(inputs.get())
+                    done, _ = await asyncio.wait({getter, reader}, return_when=asyncio.FIRST_COMPLETED)
+                    if getter not in done:
+                        # A leitura terminou sem pedido de saída (ex: EOF ou erro)
+                        getter.cancel()
+                        reader.result()
+                        break
+                    user_input = getter.result()
+
+                if user_input is None:
+                    await self.audio_handler.speak_async("Até logo!")
+                    break
+
+                log.info(f"Entrada do usuário: {user_input}")
+                turn = asyncio.create_task(self._handle_input(user_input))
+                getter = asyncio.create_task(inputs.get())
+                try:
+                    await asyncio.wait({turn, getter}, return_when=asyncio.FIRST_COMPLETED)
+                    if getter.done():
+                        # Nova entrada antes do fim da resposta: ela substitui o
+                        # turno atual, cuja run é cancelada no servidor
+                        user_input, superseded = getter.result(), True
+                        if not turn.done():
+                            log.info("Resposta interrompida por nova entrada")
+                            turn.cancel()
+                        await asyncio.gather(turn, return_exceptions=True)
+                    else:
+                        getter.cancel()
+                finally:
+                    if not turn.done():
+                        turn.cancel()
+                    if inputs.empty() and not superseded:
+                        self._idle.set()
+
+        except EOFError:
+            log.info("Entrada encerrada")
+        except asyncio.CancelledError:
+            log.warning("Conversa cancelada")
+            raise
+
+        finally:
+            if reader is not None and not reader.done():
+                reader.cancel()
+            log.info(self.openai_client.cache.summary())
+            self.audio_handler.cleanup()
+            print("Jarvis encerrado.")
@@ -0,0 +1,569 @@
+#!/usr/bin/env python3
+# filepath: /home/comunikime/code/jarvis/async_openai_client.py
+"""
+Módulo com a versão assíncrona do cliente OpenAI do Jarvis, baseada em
+AsyncOpenAI, para que rede, síntese de voz e captura de áudio possam se
+sobrepor em um único loop asyncio.
+"""
+
+import asyncio
+import os
+import time
+from typing import AsyncIterator, Optional
+
+from openai import AsyncOpenAI, OpenAI, BadRequestError
+
+# Importações locais
+from log_manager import LogManager
+from image_uploads import ImageUploadCache
+from openai_client import (
+    AssistantManager, AssistantSession, MessageStore, RunError, build_message_content,
+    _ASSISTANT_NAME, _ACTIVE_RUN_STATUSES, _StreamedRun,
+)
+from run_monitor import PollSchedule, LatencyHistogram, RunTimer
+from rate_limiter import RequestScheduler, estimate_tokens
+from response_cache import ResponseCache
+from transport import HttpTransport
+from thread_context import ThreadContextManager
+from usage_tracker import BudgetExceeded, UsageTracker
+
+# Configura o logger
+log = LogManager().logger
+
+class AsyncOpenAIClient(AssistantSession):
+    """Gerencia interações assíncronas com a API OpenAI para o assistente Jarvis."""
+
+    def __init__(self, github_retriever=None):
+        """
+        Prepara o cliente sem fazer chamadas de rede.
+
+        Use AsyncOpenAIClient.create() para obter uma instância pronta, com
+        assistente e thread inicializados.
+
+        Args:
+            github_retriever: GitHubRetriever já criado, ou um Future que o
+                produz (inicialização em paralelo); se None, é criado no
+                primeiro uso
+        """
+        # Verificar API key do arquivo .env
+        api_key = os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            log.critical("OPENAI_API_KEY não encontrada no arquivo .env")
+            raise ValueError("OPENAI_API_KEY não encontrada no arquivo .env. Configure o arquivo .env com suas credenciais.")
+
+        # Inicializa o cache
+        self.cache = ResponseCache(cache_dir=os.path.expanduser("~/.jarvis/cache/openai"))
+        self.message_store = MessageStore()
+
+        # Inicializa cliente OpenAI assíncrono sobre o pool de conexões compartilhado
+        self.scheduler = RequestScheduler.shared()
+        self.client = AsyncOpenAI(
+            api_key=api_key,
+            max_retries=0,
+            http_client=HttpTransport.shared().openai_async_http_client()
+        )
+        log.debug("Cliente AsyncOpenAI inicializado")
+
+        # IDs persistidos de assistente e threads e uploads de imagens,
+        # compartilhados com o cliente síncrono; suas chamadas bloqueantes
+        # rodam em threads (asyncio.to_thread ou verificações daemon)
+        sync_client = OpenAI(
+            api_key=api_key,
+            max_retries=0,
+            http_client=HttpTransport.shared().openai_http_client()
+        )
+        self.assistant_manager = AssistantManager(sync_client)
+        self.image_uploads = ImageUploadCache(sync_client)
+
+        # Integração com GitHub (resolvida no primeiro uso)
+        self._github_source = github_retriever
+        self._github_retriever = None
+        self._github_commands = None
+
+        self.backend = "assistants"
+        self.run_mode = os.getenv("JARVIS_RUN_MODE", "stream").lower()
+        self.poll_schedule = PollSchedule.from_env()
+        self.latency_histogram = LatencyHistogram()
+
+        # Run em andamento na thread e política para runs ativas (cancel/wait)
+        self.active_run_id = None
+        self._run_requested = False
+        self._turn_tokens = 0
+        self.usage = UsageTracker.shared()
+        self._turn_model = None
+        self.context = ThreadContextManager(self.usage)
+        self.active_run_policy = os.getenv("JARVIS_ACTIVE_RUN_POLICY", "cancel").lower()
+
+        self.assistant_id = None
+        self.thread_id = None
+        self.thread_resumed = False
+
+    @classmethod
+    async def create(cls, github_retriever=None) -> "AsyncOpenAIClient":
+        """
+        Cria o cliente e inicializa assistente e thread em paralelo.
+
+        Args:
+            github_retriever: Integração GitHub ou Future que a produz
+
+        Returns:
+            AsyncOpenAIClient: Cliente pronto para uso
+        """
+        client = cls(github_retriever)
+        await client.start()
+        return client
+
+    async def start(self) -> None:
+        """
+        Inicializa assistente e thread concorrentemente.
+
+        Assistente e thread persistidos são usados sem chamar a API e
+        verificados em segundo plano; só há espera pela rede quando não
+        existe nenhum salvo. A integração GitHub não é aguardada: é
+        resolvida no primeiro uso.
+        """
+        await asyncio.gather(
+            asyncio.to_thread(self.connect_assistant),
+            asyncio.to_thread(self.connect_thread)
+        )
+
+    async def new_conversation(self) -> None:
+        """Começa uma conversa nova em uma thread do pool."""
+        if self.active_run_id:
+            await self._abort_run("conversa encerrada")
+        self.thread_id = await asyncio.to_thread(self.assistant_manager.new_thread, _ASSISTANT_NAME)
+        self.thread_resumed = False
+        log.info(f"Nova conversa iniciada: {self.thread_id}")
+
+    @property
+    def conversation_id(self) -> str:
+        """Identificador da conversa atual (ID da thread)."""
+        return self.thread_id
+
+    async def send_message(self, content, image_path=None) -> str:
+        """
+        Envia uma mensagem para o assistente e obtém uma resposta.
+
+        Args:
+            content: Texto da mensagem
+            image_path: Caminho opcional para uma imagem a ser analisada
+
+        Returns:
+            str: Resposta do assistente ou mensagem de erro
+        """
+        parts = [part async for part in self.stream_message(content, image_path=image_path)]
+        return "".join(parts)
+
+    async def stream_message(self, content, image_path=None) -> AsyncIterator[str]:
+        """
+        Envia uma mensagem para o assistente e produz a resposta em partes,
+        à medida que o texto é gerado.
+
+        Args:
+            content: Texto da mensagem
+            image_path: Caminho opcional para uma imagem a ser analisada
+
+        Yields:
+            str: Trechos da resposta do assistente ou mensagem de erro
+        """
+        # Verifica consultas GitHub em linguagem natural e comandos !github;
+        # a integração é resolvida na thread, fora do loop de eventos
+        if isinstance(content, str):
+            github_response = await asyncio.to_thread(lambda: self.github_commands.route(content))
+            if github_response:
+                yield github_response
+                return
+
+        # Verifica se a resposta está em cache (não há cache de análise de imagens)
+        cache_key, cached_response = self._lookup_cache(content, image_path)
+        if cached_response:
+            yield cached_response
+            return
+
+        try:
+            # Processamento e upload da imagem ficam fora do loop de eventos
+            message_content = await asyncio.to_thread(
+                build_message_content, content, image_path, uploads=self.image_uploads
+            )
+
+            if await asyncio.to_thread(self._prepare_turn, message_content):
+                await self._roll_thread()
+            await self._post_user_message(message_content)
+
+            log.info("Processando...")
+            streamed = _StreamedRun(self.latency_histogram)
+            self._run_requested = True
+            try:
+                if self.run_mode == "stream":
+                    async for delta in self._run_with_streaming(streamed):
+                        yield delta
+                else:
+                    run_id = await self._create_run()
+                    await self._wait_for_run(run_id)
+                    response = await self._fetch_run_response(run_id)
+                    if response:
+                        self._record_first_token(time.time() - streamed.start_time)
+                        streamed.parts.append(response)
+                        yield response
+            except (asyncio.CancelledError, GeneratorExit):
+                # Turno substituído ou Ctrl+C: não deixa a run consumindo tokens
+                await self._abort_run("interrompida")
+                raise
+            finally:
+                self._run_requested = False
+
+            response = "".join(streamed.parts)
+            if not response:
+                log.warning("Nenhuma resposta recebida do assistente")
+                yield "Nenhuma resposta recebida."
+                return
+
+            self._store_response(cache_key, response)
+
+        except (RunError, BudgetExceeded) as e:
+            yield f"Erro: {str(e)}"
+        except Exception as e:
+            log.exception(f"Erro ao processar mensagem: {str(e)}")
+            yield f"Erro: {str(e)}"
+
+    async def _roll_thread(self) -> None:
+        """
+        Passa a conversa para uma thread do pool, semeada com o resumo das
+        últimas mensagens da thread atual; falhas mantêm a thread atual.
+        """
+        old_thread = self.thread_id
+        if self.active_run_id:
+            await self._resolve_active_run(self.active_run_id)
+
+        try:
+            messages = (await self.scheduler.call_async(
+                "interactive", self.client.beta.threads.messages.list,
+                thread_id=old_thread, order="desc", limit=self.context.keep_messages
+            )).data
+            # Com a janela cheia, o resumo de uma compactação anterior (a
+            # primeira mensagem da thread) ficou de fora
+            first = None
+            if len(messages) >= self.context.keep_messages:
+                first = next(iter((await self.scheduler.call_async(
+                    "interactive", self.client.beta.threads.messages.list,
+                    thread_id=old_thread, order="asc", limit=1
+                )).data), None)
+            request = self.context.summary_request(reversed(messages), first=first)
+            completion = await self.scheduler.call_async(
+                "interactive", self.client.chat.completions.create,
+                tokens=estimate_tokens(request[1]["content"]),
+                model=self.context.summary_model,
+                messages=request
+            )
+            seed = self._summary_seed(completion, old_thread)
+        except Exception as e:
+            log.warning(f"Não foi possível resumir a thread {old_thread}, mantendo-a: {e}")
+            return
+
+        new_thread = None
+        try:
+            new_thread = await asyncio.to_thread(self.assistant_manager.new_thread, _ASSISTANT_NAME)
+            await self.scheduler.call_async(
+                "interactive", self.client.beta.threads.messages.create,
+                thread_id=new_thread, role="assistant", content=seed, idempotent=False
+            )
+        except Exception as e:
+            log.warning(f"Não foi possível semear a thread {new_thread}, mantendo {old_thread}: {e}")
+            await asyncio.to_thread(self.assistant_manager.remember_thread, _ASSISTANT_NAME, old_thread)
+            return
+
+        await asyncio.to_thread(self._finish_rollover, old_thread, new_thread, seed)
+
+    async def _post_user_message(self, message_content) -> None:
+        """
+        Adiciona a mensagem do usuário à thread, liberando-a antes se uma
+        run anterior ainda estiver ativa.
+
+        Args:
+            message_content: Partes da mensagem do usuário
+        """
+        if self.active_run_id:
+            await self._resolve_active_run(self.active_run_id)
+
+        log.debug(f"Enviando mensagem para thread {self.thread_id}")
+        try:
+            user_message = await self.scheduler.call_async(
+                "interactive", self.client.beta.threads.messages.create,
+                idempotent=False,
+                thread_id=self.thread_id,
+                role="user",
+                content=message_content
+            )
+        except BadRequestError:
+            run_id = await self._find_active_run()
+            if run_id is not None:
+                log.warning(f"Thread {self.thread_id} ocupada pela run {run_id}")
+                await self._resolve_active_run(run_id)
+            elif not await asyncio.to_thread(self._inline_uploaded_images, message_content):
+                raise
+            user_message = await self.scheduler.call_async(
+                "interactive", self.client.beta.threads.messages.create,
+                idempotent=False,
+                thread_id=self.thread_id,
+                role="user",
+                content=message_content
+            )
+        self.message_store.remember(self.thread_id, user_message.id)
+
+    async def _find_active_run(self) -> Optional[str]:
+        """
+        Procura uma run ainda ativa na thread atual.
+
+        Returns:
+            Optional[str]: ID da run mais recente, se estiver ativa
+        """
+        page = await self.scheduler.call_async(
+            "interactive", self.client.beta.threads.runs.list,
+            thread_id=self.thread_id, limit=1
+        )
+        if page.data and page.data[0].status in _ACTIVE_RUN_STATUSES:
+            return page.data[0].id
+        return None
+
+    async def _resolve_active_run(self, run_id: str) -> None:
+        """
+        Libera a thread de uma run ativa conforme JARVIS_ACTIVE_RUN_POLICY.
+
+        Args:
+            run_id: ID da run ativa
+
+        Raises:
+            RunError: Se a run continuar ativa após o prazo de polling
+        """
+        if self.active_run_policy == "wait":
+            log.info(f"Aguardando a run {run_id} terminar")
+        else:
+            await self._cancel_run(run_id, "substituída por nova mensagem")
+
+        for interval in self.poll_schedule.intervals():
+            run_status = await self.scheduler.call_async(
+                "poll", self.client.beta.threads.runs.retrieve,
+                thread_id=self.thread_id,
+                run_id=run_id
+            )
+            if run_status.status not in _ACTIVE_RUN_STATUSES:
+                self.active_run_id = None
+                return
+            await asyncio.sleep(interval)
+
+        raise RunError(f"A run {run_id} continua ativa na thread")
+
+    async def _cancel_run(self, run_id: str, reason: str) -> bool:
+        """
+        Pede o cancelamento de uma run.
+
+        Args:
+            run_id: ID da run
+            reason: Motivo registrado no log
+
+        Returns:
+            bool: True se o cancelamento foi aceito
+        """
+        try:
+            await self.scheduler.call_async(
+                "interactive", self.client.beta.threads.runs.cancel,
+                thread_id=self.thread_id, run_id=run_id
+            )
+            log.info(f"Run {run_id} cancelada ({reason})")
+            return True
+        except Exception as e:
+            log.warning(f"Não foi possível cancelar a run {run_id}: {e}")
+            return False
+
+    async def _abort_run(self, reason: str) -> None:
+        """
+        Cancela a run do turno atual, se ainda estiver em andamento.
+
+        Args:
+            reason: Motivo registrado no log
+        """
+        run_id = self.active_run_id
+        if run_id is None and self._run_requested:
+            try:
+                run_id = await self._find_active_run()
+            except Exception as e:
+                log.warning(f"Não foi possível localizar a run em andamento: {e}")
+        if run_id and await self._cancel_run(run_id, reason):
+            self.active_run_id = None
+
+    async def _create_run(self) -> str:
+        """
+        Cria uma run do assistente na thread atual.
+
+        Returns:
+            str: ID da run criada
+        """
+        log.debug(f"Executando assistente {self.assistant_id}")
+        run = await self.scheduler.call_async(
+            "interactive", self.client.beta.threads.runs.create,
+            idempotent=False,
+            tokens=self._turn_tokens,
+            thread_id=self.thread_id,
+            assistant_id=self.assistant_id,
+            **self._run_options()
+        )
+        self.active_run_id = run.id
+        return run.id
+
+    async def _run_with_streaming(self, streamed: _StreamedRun) -> AsyncIterator[str]:
+        """
+        Executa o assistente consumindo o fluxo de eventos da run, com o
+        mesmo tratamento de eventos e fallback para polling do cliente síncrono.
+
+        Args:
+            streamed: Estado da run, que acumula os trechos já produzidos
+
+        Yields:
+            str: Deltas de texto da resposta
+        """
+        try:
+            await self.scheduler.acquire_async("interactive", tokens=self._turn_tokens)
+            async with self.client.beta.threads.runs.stream(
+                thread_id=self.thread_id,
+                assistant_id=self.assistant_id,
+                **self._run_options()
+            ) as stream:
+                async for event in stream:
+                    delta = self._on_stream_event(event, streamed)
+                    if delta:
+                        yield delta
+                    if streamed.done:
+                        break
+        except RunError:
+            streamed.timer.finish()
+            raise
+        except Exception as e:
+            delay = self._stream_fallback(e, streamed)
+            if delay is not None:
+                await asyncio.sleep(delay)
+                streamed.run_id = await self._create_run()
+
+            await self._wait_for_run(streamed.run_id, timer=streamed.timer)
+            response = await self._fetch_run_response(streamed.run_id)
+            if response:
+                yield self._stream_remainder(streamed, response)
+            return
+
+        streamed.timer.finish()
+
+    async def _wait_for_run(self, run_id: str, timer: Optional[RunTimer] = None) -> None:
+        """
+        Aguarda a conclusão de uma run segundo a agenda de polling.
+
+        Args:
+            run_id: ID da run
+            timer: Cronômetro da run, se já iniciado
+
+        Raises:
+            RunError: Se a run falhar, for cancelada, expirar ou exceder o prazo
+        """
+        timer = timer or RunTimer(self.latency_histogram)
+        start_time = time.time()
+        try:
+            for interval in self.poll_schedule.intervals():
+                run_status = await self.scheduler.call_async(
+                    "poll", self.client.beta.threads.runs.retrieve,
+                    thread_id=self.thread_id,
+                    run_id=run_id
+                )
+                if self._on_run_status(run_status, timer, start_time):
+                    return
+
+                log.debug(f"Status do processamento: {run_status.status}, próxima consulta em {interval:.2f}s")
+                await asyncio.sleep(interval)
+        finally:
+            timer.finish()
+
+        error = self._deadline_error(run_id)
+        if await self._cancel_run(run_id, "tempo limite excedido"):
+            self.active_run_id = None
+        raise error
+
+    async def _fetch_run_response(self, run_id: str) -> Optional[str]:
+        """
+        Obtém o texto da resposta produzida pela run concluída.
+
+        Args:
+            run_id: ID da run concluída
+
+        Returns:
+            Optional[str]: Texto da resposta ou None se não houver
+        """
+        page = await self.scheduler.call_async(
+            "interactive", self.client.beta.threads.messages.list,
+            thread_id=self.thread_id,
+            run_id=run_id,
+            order="desc",
+            limit=1
+        )
+        messages = page.data
+
+        if not messages:
+            params, ascending = self._recent_messages_params()
+            page = await self.scheduler.call_async(
+                "interactive", self.client.beta.threads.messages.list,
+                thread_id=self.thread_id, **params
+            )
+            messages = list(reversed(page.data)) if ascending else page.data
+
+        return self._response_text(messages)
+
+    def get_raw_client(self):
+        """
+        Retorna o cliente AsyncOpenAI para uso direto em outros módulos.
+
+        Returns:
+            AsyncOpenAI: Cliente OpenAI assíncrono
+        """
+        return self.client
+
+    async def get_github_file(self, file_path: str) -> Optional[str]:
+        """
+        Obtém o conteúdo de um arquivo do GitHub.
+
+        Args:
+            file_path: Caminho do arquivo no repositório
+
+        Returns:
+            Conteúdo do arquivo ou None se não encontrado/disponível
+        """
+        return await asyncio.to_thread(lambda: self.github_commands.get_github_file(file_path))
+
+    async def list_github_files(self, path: str = "", extension: str = None) -> str:
+        """
+        Lista arquivos do repositório GitHub.
+
+        Args:
+            path: Caminho dentro do repositório
+            extension: Extensão para filtrar
+
+        Returns:
+            String formatada com lista de arquivos
+        """
+        return await asyncio.to_thread(lambda: self.github_commands.list_github_files(path, extension))
+
+    async def process_github_query(self, content: str) -> Optional[str]:
+        """
+        Processa consultas sobre GitHub em linguagem natural.
+
+        Args:
+            content: Texto da mensagem do usuário
+
+        Returns:
+            Resposta processada ou None se não for uma consulta GitHub
+        """
+        return await asyncio.to_thread(lambda: self.github_commands.process_github_query(content))
+
+    async def get_repo_overview(self) -> str:
+        """
+        Fornece uma visão geral do repositório GitHub configurado.
+
+        Returns:
+            String formatada com visão geral do repositório
+        """
+        return await asyncio.to_thread(lambda: self.github_commands.get_repo_overview())
@@ -6,18 +6,22 @@ de texto para fala. Contém funções para captura de áudio do microfone e repr
 de áudio usando TTS da OpenAI.
 """
 
+import asyncio
 import contextlib
 import os
 import sys
 import tempfile
 import time
 
-import pygame
-import speech_recognition as sr
-from openai import OpenAI
-
 # Importar o logger
 from log_manager import LogManager
+from lazy_import import lazy_import
+from rate_limiter import RequestScheduler
+from usage_tracker import UsageTracker
+
+# Dependências pesadas carregadas apenas no primeiro uso do áudio
+pygame = lazy_import("pygame")
+sr = lazy_import("speech_recognition")
 
 # Configura o logger
 log = LogManager().logger
@@ -25,6 +29,10 @@ log = LogManager().logger
 # Suprimir mensagens de erro do ALSA
 os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = "hide"
 
+# Parâmetros da síntese de voz
+_TTS_MODEL = "tts-1"
+_TTS_VOICE = "alloy"
+
 @contextlib.contextmanager
 def suppress_stderr():
     """Temporariamente suprime saída para stderr de forma mais robusta."""
@@ -77,19 +85,37 @@ class AudioHandler:
             text_only: Se True, não reproduz áudio, apenas exibe texto
         """
         self.client = openai_client
+        self.scheduler = RequestScheduler.shared()
+        self.usage = UsageTracker.shared()
         self.text_only = text_only
         log.info(f"Modo somente texto: {text_only}")
         
-        self.recognizer = sr.Recognizer()
+        # Reconhecedor e mixer são criados no primeiro uso, para que execuções
+        # sem microfone (--text, --image) não carreguem speech_recognition
+        self._recognizer = None
+        self.audio_initialized = False
         
         # Inicializa pygame para reprodução de áudio
-        initialize_audio()
-        
-        # Configurações para melhor reconhecimento de voz
-        self.recognizer.pause_threshold = 1.5  # Espera 1.5 segundos de silêncio antes de considerar que a fala terminou
-        self.recognizer.energy_threshold = 300  # Aumentar a sensibilidade para ouvir vozes mais suaves
-        self.recognizer.non_speaking_duration = 1.0  # Ajustar o nível de silêncio que marca o fim da fala
-        log.debug("Reconhecedor de fala configurado")
+        if not text_only:
+            self._ensure_audio()
+    
+    @property
+    def recognizer(self):
+        """Reconhecedor de fala, criado e configurado no primeiro uso."""
+        if self._recognizer is None:
+            self._recognizer = sr.Recognizer()
+            
+            # Configurações para melhor reconhecimento de voz
+            self._recognizer.pause_threshold = 1.5  # Espera 1.5 segundos de silêncio antes de considerar que a fala terminou
+            self._recognizer.energy_threshold = 300  # Aumentar a sensibilidade para ouvir vozes mais suaves
+            self._recognizer.non_speaking_duration = 1.0  # Ajustar o nível de silêncio que marca o fim da fala
+            log.debug("Reconhecedor de fala configurado")
+        return self._recognizer
+    
+    def _ensure_audio(self):
+        """Inicializa o mixer do pygame, se ainda não tiver sido inicializado."""
+        if not self.audio_initialized:
+            self.audio_initialized = initialize_audio()
     
     def listen(self):
         """
@@ -156,16 +182,19 @@ class AudioHandler:
         try:
             # Obter áudio da API OpenAI
             log.debug("Solicitando síntese de voz à API OpenAI")
-            resp = self.client.audio.speech.create(
-                model="tts-1",
-                voice="alloy",
+            resp = self.scheduler.call(
+                "speech", self.client.audio.speech.create,
+                model=_TTS_MODEL,
+                voice=_TTS_VOICE,
                 input=text,
                 response_format="wav"
             )
+            self.usage.record_speech(text, _TTS_MODEL)
             wav_bytes = resp.content
             log.debug(f"Áudio recebido, tamanho: {len(wav_bytes)} bytes")
 
             # Método usando pygame para reproduzir o áudio
+            self._ensure_audio()
             with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
                 temp_path = temp_file.name
                 temp_file.write(wav_bytes)
@@ -207,9 +236,94 @@ class AudioHandler:
         except Exception as e:
             log.exception(f"Erro de áudio: {e}")
     
+    async def listen_async(self):
+        """
+        Versão assíncrona de listen.
+        
+        A captura do speech_recognition é bloqueante, então roda no executor
+        padrão para não travar o loop de eventos.
+        
+        Returns:
+            str: Texto reconhecido ou código de erro específico
+        """
+        return await asyncio.to_thread(self.listen)
+    
+    async def synthesize_async(self, text):
+        """
+        Sintetiza a fala de um texto com o TTS da OpenAI.
+        
+        Requer que o manipulador tenha sido criado com um cliente AsyncOpenAI.
+        
+        Args:
+            text (str): Texto a ser convertido em fala
+            
+        Returns:
+            bytes: Áudio WAV sintetizado
+        """
+        log.debug("Solicitando síntese de voz à API OpenAI (assíncrona)")
+        resp = await self.scheduler.call_async(
+            "speech", self.client.audio.speech.create,
+            model=_TTS_MODEL,
+            voice=_TTS_VOICE,
+            input=text,
+            response_format="wav"
+        )
+        self.usage.record_speech(text, _TTS_MODEL)
+        log.debug(f"Áudio recebido, tamanho: {len(resp.content)} bytes")
+        return resp.content
+    
+    async def play_async(self, wav_bytes):
+        """
+        Reproduz um áudio WAV sem bloquear o loop de eventos.
+        
+        Args:
+            wav_bytes (bytes): Áudio a ser reproduzido
+        """
+        self._ensure_audio()
+        with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
+            temp_path = temp_file.name
+            temp_file.write(wav_bytes)
+        
+        try:
+            with suppress_stdout_stderr():
+                pygame.mixer.music.load(temp_path)
+                pygame.mixer.music.play()
+            
+            while pygame.mixer.music.get_busy():
+                await asyncio.sleep(0.05)
+            log.debug("Reprodução concluída")
+        except asyncio.CancelledError:
+            pygame.mixer.music.stop()
+            log.warning("Reprodução cancelada")
+            raise
+        finally:
+            try:
+                os.remove(temp_path)
+            except OSError as e:
+                log.error(f"Erro ao remover arquivo temporário: {e}")
+    
+    async def speak_async(self, text):
+        """
+        Versão assíncrona de speak: sintetiza e reproduz sem bloquear o loop.
+        
+        Args:
+            text (str): Texto a ser convertido em fala
+        """
+        if self.text_only or not text.strip():
+            log.info(f"Jarvis (texto): {text}")
+            return
+        
+        log.info(f"Jarvis (falando): {text}")
+        try:
+            await self.play_async(await self.synthesize_async(text))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            log.exception(f"Erro de áudio: {e}")
+    
     def cleanup(self):
         """Limpa recursos de áudio."""
         log.debug("Limpando recursos de áudio")
-        if pygame.mixer.get_init():
+        if self.audio_initialized and pygame.mixer.get_init():
             pygame.mixer.quit()
             log.debug("Sistema de áudio encerrado")
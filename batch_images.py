@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# filepath: /home/comunikime/code/jarvis/batch_images.py
+"""
+Módulo de análise de imagens em lote (jarvis.py --image com diretório ou
+padrão glob): as imagens são descritas em paralelo por um pool de workers,
+sob o agendador de requisições compartilhado, e cada resultado é emitido
+assim que fica pronto.
+"""
+
+import glob
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional
+
+from lazy_import import lazy_import
+from log_manager import LogManager
+from openai_client import build_message_content
+from rate_limiter import RequestScheduler, estimate_tokens
+from transport import HttpTransport
+from usage_tracker import UsageTracker
+
+# Configura o logger
+log = LogManager().logger
+
+openai = lazy_import("openai")
+
+_IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".gif", ".webp", ".bmp", ".tif", ".tiff", ".heic")
+
+_PROMPT = "O que você vê nesta imagem?"
+
+# Tokens cobrados por uma imagem em detail "high" (estimativa para o agendador)
+_IMAGE_TOKENS = 765
+
+
+def is_batch_spec(spec: str) -> bool:
+    """
+    Verifica se o argumento de --image descreve um lote (diretório ou glob).
+
+    Args:
+        spec: Valor passado em --image
+
+    Returns:
+        bool: True para diretórios e padrões com *, ? ou [
+    """
+    return os.path.isdir(spec) or any(c in spec for c in "*?[")
+
+
+def expand_image_paths(spec: str) -> List[str]:
+    """
+    Expande um diretório ou padrão glob na lista de imagens.
+
+    Args:
+        spec: Arquivo, diretório (não recursivo) ou padrão glob (** recursivo)
+
+    Returns:
+        List[str]: Caminhos das imagens em ordem alfabética
+    """
+    if os.path.isdir(spec):
+        candidates = [os.path.join(spec, name) for name in os.listdir(spec)]
+    elif any(c in spec for c in "*?["):
+        candidates = glob.glob(spec, recursive=True)
+    else:
+        candidates = [spec]
+    return sorted(
+        path for path in candidates
+        if os.path.isfile(path) and path.lower().endswith(_IMAGE_EXTENSIONS)
+    )
+
+
+def describe_image(client, image_path: str, model: str, scheduler: Optional[RequestScheduler] = None) -> str:
+    """
+    Descreve uma imagem com uma chamada de chat completions sem estado.
+
+    Diferente das threads da API Assistants (uma run ativa por vez), cada
+    chamada é independente e pode rodar em paralelo com as demais.
+
+    Args:
+        client: Cliente OpenAI síncrono (de preferência com max_retries=0)
+        image_path: Caminho da imagem
+        model: Modelo de visão usado
+        scheduler: Agendador de requisições (padrão: o compartilhado)
+
+    Returns:
+        str: Descrição da imagem
+    """
+    scheduler = scheduler or RequestScheduler.shared()
+    message_content = build_message_content(_PROMPT, image_path)
+    completion = scheduler.call(
+        "batch", client.chat.completions.create,
+        tokens=estimate_tokens(_PROMPT) + _IMAGE_TOKENS,
+        model=model,
+        messages=[{"role": "user", "content": message_content}]
+    )
+    UsageTracker.shared().record_completion(completion.usage, model, kind="batch")
+    return completion.choices[0].message.content or ""
+
+
+def analyze_batch(image_paths: List[str], concurrency: int = 4, output: Optional[str] = None,
+                  client=None, model: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Descreve as imagens em paralelo, emitindo cada resultado ao terminar.
+
+    Args:
+        image_paths: Imagens a analisar
+        concurrency: Número máximo de requisições simultâneas
+        output: Arquivo JSONL de saída (acrescenta linhas); None imprime no terminal
+        client: Cliente OpenAI síncrono (criado a partir de OPENAI_API_KEY se omitido)
+        model: Modelo de visão (padrão: JARVIS_CHAT_MODEL ou gpt-4o)
+
+    Returns:
+        List[Dict[str, Any]]: Resultados na ordem em que terminaram
+    """
+    scheduler = RequestScheduler.shared()
+    if client is None:
+        client = openai.OpenAI(
+            api_key=os.getenv("OPENAI_API_KEY"),
+            http_client=HttpTransport.shared().openai_http_client()
+        )
+    # As novas tentativas ficam por conta do agendador
+    client = client.with_options(max_retries=0)
+    # O orçamento vale para o lote inteiro: BudgetExceeded interrompe antes de começar
+    model = UsageTracker.shared().choose_model(model or os.getenv("JARVIS_CHAT_MODEL", "gpt-4o"))
+
+    def run(path):
+        start = time.perf_counter()
+        result: Dict[str, Any] = {"path": path}
+        try:
+            result["description"] = describe_image(client, path, model, scheduler)
+        except Exception as e:
+            log.error(f"Erro ao analisar {path}: {e}")
+            result["error"] = str(e)
+        result["seconds"] = round(time.perf_counter() - start, 2)
+        return result
+
+    log.info(f"Analisando {len(image_paths)} imagens com concorrência {concurrency}")
+    start = time.perf_counter()
+    results: List[Dict[str, Any]] = []
+    sink = open(output, "a", encoding="utf-8") if output else None
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="jarvis-batch") as executor:
+            futures = [executor.submit(run, path) for path in image_paths]
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+                if sink:
+                    sink.write(json.dumps(result, ensure_ascii=False) + "\n")
+                    sink.flush()
+                else:
+                    text = result.get("description") or f"Erro: {result['error']}"
+                    print(f"== {result['path']} ==\n{text}\n", flush=True)
+    finally:
+        if sink:
+            sink.close()
+
+    elapsed = time.perf_counter() - start
+    failures = sum(1 for r in results if "error" in r)
+    log.info(f"Lote concluído: {len(results) - failures} imagens em {elapsed:.1f}s, {failures} falhas")
+    return results
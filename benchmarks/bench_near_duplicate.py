@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# filepath: /home/comunikime/code/jarvis/benchmarks/bench_near_duplicate.py
+"""
+Benchmark do índice de perguntas parecidas (near_duplicate_cache): tempo de
+indexação, latência das buscas (acertos por paráfrase e faltas) e memória
+ocupada com 100 mil perguntas cacheadas.
+
+Uso: python benchmarks/bench_near_duplicate.py [--entries 100000] [--queries 2000]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from near_duplicate_cache import NearDuplicateIndex  # noqa: E402
+from prompt_normalizer import PromptNormalizer  # noqa: E402
+
+_OPENINGS = ["o que e", "explique", "como funciona", "quem foi", "qual e a", "defina", "por que o", "quantos"]
+_TOPICS = (
+    "protocolo rede memoria cache processo thread banco dados indice arvore grafo fila pilha "
+    "compilador linguagem funcao classe objeto heranca modulo pacote servidor cliente requisicao "
+    "resposta latencia throughput disco arquivo sistema kernel agendador semaforo mutex bloqueio "
+    "transacao replica particao consenso eleicao lider seguidor log evento stream lote janela "
+    "historia ciencia fisica quimica biologia planeta estrela galaxia oceano montanha rio cidade"
+).split()
+_SYLLABLES = "ba be ca co da de fa fi ga go la li ma mo na ne pa pe ra ri sa so ta te va vi za zu".split()
+
+
+def _vocabulary(rng: random.Random, size: int = 8000):
+    """Palavras reais de tecnologia e ciência mais pseudopalavras, como nomes próprios."""
+    words = set(_TOPICS)
+    while len(words) < size:
+        words.add("".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def make_prompt(rng: random.Random, vocabulary) -> str:
+    """Gera uma pergunta sintética com 4 a 8 palavras de conteúdo."""
+    return " ".join([rng.choice(_OPENINGS)] + rng.sample(vocabulary, rng.randint(4, 8)))
+
+
+def paraphrase(prompt: str, rng: random.Random) -> str:
+    """Troca a flexão de uma palavra, como numa transcrição diferente."""
+    words = prompt.split()
+    i = rng.randrange(len(words))
+    words[i] = words[i][:-1] + ("s" if not words[i].endswith("s") else "")
+    return " ".join(words)
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--entries", type=int, default=100_000, help="Perguntas indexadas")
+    parser.add_argument("--queries", type=int, default=2000, help="Buscas de cada tipo")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    normalizer = PromptNormalizer()
+    vocabulary = _vocabulary(rng)
+    prompts = [normalizer.normalize(make_prompt(rng, vocabulary)) for _ in range(args.entries)]
+
+    index = NearDuplicateIndex()
+    start = time.perf_counter()
+    for i, prompt in enumerate(prompts):
+        index.add("bench", prompt, str(i))
+    build = time.perf_counter() - start
+
+    # tracemalloc deixa a indexação lenta: a memória é medida numa amostra
+    sample = prompts[:min(len(prompts), 10_000)]
+    tracemalloc.start()
+    sampled = NearDuplicateIndex()
+    for i, prompt in enumerate(sample):
+        sampled.add("bench", prompt, str(i))
+    per_entry = tracemalloc.get_traced_memory()[0] / max(1, len(sampled))
+    tracemalloc.stop()
+    del sampled
+
+    def timed(queries):
+        latencies, hits = [], 0
+        for query in queries:
+            start = time.perf_counter()
+            hits += index.lookup("bench", query) is not None
+            latencies.append((time.perf_counter() - start) * 1000)
+        return latencies, hits
+
+    near = [paraphrase(rng.choice(prompts), rng) for _ in range(args.queries)]
+    unseen = [normalizer.normalize(make_prompt(rng, vocabulary)) for _ in range(args.queries)]
+    near_latency, near_hits = timed(near)
+    miss_latency, false_hits = timed(unseen)
+
+    print(f"Entradas indexadas: {len(index)} de {args.entries} em {build:.1f}s "
+          f"({build / args.entries * 1e6:.0f} µs por entrada)")
+    print(f"Memória do índice: ~{per_entry * len(index) / 2**20:.1f} MiB ({per_entry:.0f} bytes por entrada)")
+    for label, latencies, hits in (("paráfrases", near_latency, near_hits),
+                                   ("perguntas novas", miss_latency, false_hits)):
+        print(f"Busca ({label}): mediana {statistics.median(latencies):.2f} ms, "
+              f"p99 {percentile(latencies, 0.99):.2f} ms, acertos {hits}/{len(latencies)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,549 @@
+#!/usr/bin/env python3
+# filepath: /home/comunikime/code/jarvis/cache_backends.py
+"""
+Módulo com os armazenamentos persistentes do CacheManager: um arquivo JSON
+por chave (formato original) ou um único banco SQLite em modo WAL, com a
+validade indexada pelo timestamp.
+"""
+
+import glob
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from log_manager import LogManager
+
+# Configura o logger
+log = LogManager().logger
+
+BACKEND_FILE = "file"
+BACKEND_SQLITE = "sqlite"
+
+_SQLITE_FILE = "cache.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    timestamp REAL NOT NULL,
+    data TEXT NOT NULL,
+    accessed REAL NOT NULL DEFAULT 0,
+    size INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS entries_timestamp ON entries (timestamp);
+"""
+
+# Colunas acrescentadas depois da primeira versão do banco
+_MIGRATIONS = (
+    ("accessed", "ALTER TABLE entries ADD COLUMN accessed REAL NOT NULL DEFAULT 0"),
+    ("size", "ALTER TABLE entries ADD COLUMN size INTEGER NOT NULL DEFAULT 0"),
+)
+
+# Fração de páginas livres do banco a partir da qual compact() roda VACUUM
+_VACUUM_FREE_RATIO = 0.25
+
+# Espera máxima (segundos) da conexão de compact() por gravações em andamento
+_COMPACT_TIMEOUT = 30
+
+
+class CacheBackend:
+    """
+    Interface dos armazenamentos do cache. Cada entrada é um dicionário
+    {"timestamp": float, "data": Any}, identificado pela chave hash.
+    """
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Lê uma entrada.
+
+        Args:
+            key: Chave hash
+
+        Returns:
+            Optional[Dict[str, Any]]: Entrada, ou None se não existir ou
+            estiver corrompida
+        """
+        raise NotImplementedError
+
+    def set(self, key: str, entry: Dict[str, Any]) -> None:
+        """
+        Grava (ou substitui) uma entrada.
+
+        Args:
+            key: Chave hash
+            entry: Entrada com timestamp e data
+        """
+        raise NotImplementedError
+
+    def set_many(self, entries: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Grava um lote de entradas.
+
+        Args:
+            entries: Entrada de cada chave
+        """
+        for key, entry in entries.items():
+            self.set(key, entry)
+
+    def delete(self, key: str) -> None:
+        """
+        Remove uma entrada, se existir.
+
+        Args:
+            key: Chave hash
+        """
+        raise NotImplementedError
+
+    def expire(self, cutoff: float, limit: Optional[int] = None) -> int:
+        """
+        Remove as entradas gravadas antes de um instante.
+
+        Args:
+            cutoff: Timestamp limite
+            limit: Máximo aproximado de entradas removidas na chamada (None
+                remove todas)
+
+        Returns:
+            int: Número de entradas removidas
+        """
+        raise NotImplementedError
+
+    def usage(self) -> int:
+        """
+        Tamanho ocupado pelas entradas.
+
+        Returns:
+            int: Bytes dos dados guardados
+        """
+        raise NotImplementedError
+
+    def touch(self, accessed: Dict[str, float]) -> None:
+        """
+        Registra os últimos usos de entradas, que ordenam o despejo.
+
+        Args:
+            accessed: Instante do último uso de cada chave
+        """
+
+    def evict(self, max_bytes: int, limit: int) -> int:
+        """
+        Remove as entradas usadas há mais tempo até caber na cota.
+
+        Args:
+            max_bytes: Cota de disco
+            limit: Máximo de entradas removidas na chamada
+
+        Returns:
+            int: Número de entradas removidas
+        """
+        raise NotImplementedError
+
+    def compact(self) -> None:
+        """Recupera o espaço deixado pelas entradas removidas."""
+
+    def close(self) -> None:
+        """Libera os recursos do armazenamento."""
+
+
+class FileCacheBackend(CacheBackend):
+    """
+    Um arquivo JSON por chave em um diretório plano, com um índice de
+    validade em faixas de tempo: expiry/<faixa> lista as chaves gravadas
+    naquele intervalo, e expirar só abre as faixas vencidas.
+    """
+
+    def __init__(self, cache_dir: str, bucket_seconds: int = 3600):
+        """
+        Inicializa o armazenamento.
+
+        Args:
+            cache_dir: Diretório dos arquivos
+            bucket_seconds: Largura de cada faixa do índice de validade
+        """
+        self.cache_dir = cache_dir
+        self.bucket_seconds = bucket_seconds
+        self.index_dir = os.path.join(cache_dir, "expiry")
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        if not os.path.isdir(self.index_dir):
+            self._build_index()
+
+    def _get_cache_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _bucket_path(self, bucket: int) -> str:
+        return os.path.join(self.index_dir, str(bucket))
+
+    def _build_index(self) -> None:
+        """Indexa (uma única vez) os arquivos gravados antes do índice existir."""
+        os.makedirs(self.index_dir, exist_ok=True)
+        buckets: Dict[int, list] = {}
+        for filename in os.listdir(self.cache_dir):
+            if not filename.endswith(".json"):
+                continue
+            key = filename[:-len(".json")]
+            entry = self.get(key)
+            if entry is not None:
+                buckets.setdefault(int(entry["timestamp"] // self.bucket_seconds), []).append(key)
+        for bucket, keys in buckets.items():
+            with open(self._bucket_path(bucket), "a") as f:
+                f.write("".join(f"{key}\n" for key in keys))
+        if buckets:
+            log.info(f"Cache {self.cache_dir}: índice de validade criado para "
+                     f"{sum(len(keys) for keys in buckets.values())} entradas")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        cache_path = self._get_cache_path(key)
+        try:
+            with open(cache_path, "r") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (json.JSONDecodeError, OSError):
+            entry = None
+        if not isinstance(entry, dict) or "timestamp" not in entry or "data" not in entry:
+            # Arquivo corrompido: remove
+            self.delete(key)
+            return None
+        return entry
+
+    def set(self, key: str, entry: Dict[str, Any]) -> None:
+        try:
+            with open(self._get_cache_path(key), "w") as f:
+                json.dump(entry, f)
+            # Regravar uma chave deixa a referência antiga na faixa anterior;
+            # expire() confere o timestamp antes de apagar
+            with self._lock, open(self._bucket_path(int(entry["timestamp"] // self.bucket_seconds)), "a") as f:
+                f.write(f"{key}\n")
+        except OSError:
+            # Ignora erros de escrita no arquivo
+            pass
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self._get_cache_path(key))
+        except OSError:
+            pass
+
+    def expire(self, cutoff: float, limit: Optional[int] = None) -> int:
+        """
+        Remove as entradas gravadas antes de um instante, abrindo só as
+        faixas do índice que começam antes dele: o custo acompanha o número
+        de entradas vencidas (mais uma faixa parcial), não o total guardado.
+
+        Args:
+            cutoff: Timestamp limite
+            limit: Para após a faixa em que as remoções atingirem o limite
+
+        Returns:
+            int: Número de entradas removidas
+        """
+        removed_count = 0
+        with self._lock:
+            try:
+                buckets = sorted(int(name) for name in os.listdir(self.index_dir) if name.isdigit())
+            except OSError:
+                return 0
+            for bucket in buckets:
+                if bucket * self.bucket_seconds >= cutoff or (limit and removed_count >= limit):
+                    break
+                bucket_path = self._bucket_path(bucket)
+                try:
+                    with open(bucket_path, "r") as f:
+                        keys = set(f.read().split())
+                except OSError:
+                    continue
+
+                remaining = []
+                for key in keys:
+                    entry = self.get(key)
+                    if entry is None:
+                        continue
+                    if entry["timestamp"] < cutoff:
+                        self.delete(key)
+                        removed_count += 1
+                    elif int(entry["timestamp"] // self.bucket_seconds) == bucket:
+                        # Faixa que o limite corta ao meio: a entrada ainda vale
+                        remaining.append(key)
+
+                try:
+                    if remaining:
+                        with open(bucket_path, "w") as f:
+                            f.write("".join(f"{key}\n" for key in remaining))
+                    else:
+                        os.remove(bucket_path)
+                except OSError:
+                    pass
+
+        return removed_count
+
+    def _entries(self) -> List[os.DirEntry]:
+        return [entry for entry in os.scandir(self.cache_dir)
+                if entry.name.endswith(".json") and entry.is_file()]
+
+    def usage(self) -> int:
+        total = 0
+        for entry in self._entries():
+            try:
+                total += entry.stat().st_size
+            except OSError:
+                pass
+        return total
+
+    def touch(self, accessed: Dict[str, float]) -> None:
+        # O mtime do arquivo marca o último uso; a validade vem do JSON
+        for key, when in accessed.items():
+            try:
+                os.utime(self._get_cache_path(key), (when, when))
+            except OSError:
+                pass
+
+    def evict(self, max_bytes: int, limit: int) -> int:
+        files = []
+        for entry in self._entries():
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, entry.name[:-len(".json")]))
+        excess = sum(size for _, size, _ in files) - max_bytes
+        removed_count = 0
+        for _, size, key in sorted(files):
+            if excess <= 0 or removed_count >= limit:
+                break
+            self.delete(key)
+            excess -= size
+            removed_count += 1
+        return removed_count
+
+    def compact(self) -> None:
+        """Tira do índice de validade as chaves cujos arquivos já foram removidos."""
+        with self._lock:
+            try:
+                names = [name for name in os.listdir(self.index_dir) if name.isdigit()]
+            except OSError:
+                return
+            for name in names:
+                bucket_path = os.path.join(self.index_dir, name)
+                try:
+                    with open(bucket_path, "r") as f:
+                        keys = set(f.read().split())
+                    remaining = [key for key in keys if os.path.exists(self._get_cache_path(key))]
+                    if not remaining:
+                        os.remove(bucket_path)
+                    elif len(remaining) < len(keys):
+                        with open(bucket_path, "w") as f:
+                            f.write("".join(f"{key}\n" for key in remaining))
+                except OSError:
+                    pass
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """Todas as entradas em um único banco SQLite (WAL), indexado por timestamp."""
+
+    def __init__(self, cache_dir: str):
+        """
+        Abre (ou cria) o banco no diretório do cache, importando os
+        arquivos JSON deixados pelo armazenamento em arquivos.
+
+        Args:
+            cache_dir: Diretório do banco
+        """
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, _SQLITE_FILE)
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(self.path, check_same_thread=False)
+        # WAL: leituras não bloqueiam a escrita e cada commit é um append
+        # no log, sem fsync a cada entrada (synchronous=NORMAL)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(_SCHEMA)
+        self._migrate()
+        self._import_files(cache_dir)
+
+    def _migrate(self) -> None:
+        """Acrescenta as colunas de uso e tamanho a bancos antigos."""
+        columns = {row[1] for row in self.db.execute("PRAGMA table_info(entries)")}
+        missing = [sql for column, sql in _MIGRATIONS if column not in columns]
+        if missing:
+            with self.db:
+                for sql in missing:
+                    self.db.execute(sql)
+                self.db.execute("UPDATE entries SET accessed = timestamp, size = length(data)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+
+    def _import_files(self, cache_dir: str) -> None:
+        """Migra (uma única vez) as entradas do formato de um arquivo por chave."""
+        # O índice de validade do armazenamento em arquivos não serve ao banco
+        shutil.rmtree(os.path.join(cache_dir, "expiry"), ignore_errors=True)
+        paths = glob.glob(os.path.join(cache_dir, "*.json"))
+        if not paths:
+            return
+        start = time.perf_counter()
+        rows = []
+        for path in paths:
+            try:
+                with open(path, "r") as f:
+                    entry = json.load(f)
+                data = json.dumps(entry["data"])
+                rows.append((os.path.basename(path)[:-len(".json")], entry["timestamp"], data,
+                             os.path.getmtime(path), len(data)))
+            except (json.JSONDecodeError, KeyError, TypeError, OSError):
+                pass
+        with self._lock, self.db:
+            self.db.executemany(
+                "INSERT OR IGNORE INTO entries (key, timestamp, data, accessed, size) "
+                "VALUES (?, ?, ?, ?, ?)", rows
+            )
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        log.info(f"Cache {cache_dir}: {len(rows)} entradas migradas para SQLite "
+                 f"em {time.perf_counter() - start:.2f}s")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with self._lock:
+                row = self.db.execute(
+                    "SELECT timestamp, data FROM entries WHERE key = ?", (key,)
+                ).fetchone()
+            if row is None:
+                return None
+            return {"timestamp": row[0], "data": json.loads(row[1])}
+        except json.JSONDecodeError:
+            self.delete(key)
+            return None
+        except sqlite3.Error as e:
+            log.error(f"Erro ao ler cache: {e}")
+            return None
+
+    def set(self, key: str, entry: Dict[str, Any]) -> None:
+        self.set_many({key: entry})
+
+    def set_many(self, entries: Dict[str, Dict[str, Any]]) -> None:
+        # Um lote inteiro em uma única transação (um commit no WAL)
+        rows = []
+        for key, entry in entries.items():
+            try:
+                data = json.dumps(entry["data"])
+            except (TypeError, ValueError) as e:
+                log.error(f"Erro ao gravar cache: {e}")
+                continue
+            rows.append((key, entry["timestamp"], data, entry["timestamp"], len(data)))
+        try:
+            with self._lock, self.db:
+                self.db.executemany(
+                    "INSERT OR REPLACE INTO entries (key, timestamp, data, accessed, size) "
+                    "VALUES (?, ?, ?, ?, ?)", rows
+                )
+        except sqlite3.Error as e:
+            log.error(f"Erro ao gravar cache: {e}")
+
+    def delete(self, key: str) -> None:
+        try:
+            with self._lock, self.db:
+                self.db.execute("DELETE FROM entries WHERE key = ?", (key,))
+        except sqlite3.Error as e:
+            log.error(f"Erro ao remover entrada do cache: {e}")
+
+    def expire(self, cutoff: float, limit: Optional[int] = None) -> int:
+        try:
+            with self._lock, self.db:
+                if limit is None:
+                    return self.db.execute("DELETE FROM entries WHERE timestamp < ?", (cutoff,)).rowcount
+                return self.db.execute(
+                    "DELETE FROM entries WHERE key IN "
+                    "(SELECT key FROM entries WHERE timestamp < ? LIMIT ?)", (cutoff, limit)
+                ).rowcount
+        except sqlite3.Error as e:
+            log.error(f"Erro ao expirar cache: {e}")
+            return 0
+
+    def usage(self) -> int:
+        try:
+            with self._lock:
+                return self.db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        except sqlite3.Error as e:
+            log.error(f"Erro ao medir cache: {e}")
+            return 0
+
+    def touch(self, accessed: Dict[str, float]) -> None:
+        try:
+            with self._lock, self.db:
+                self.db.executemany(
+                    "UPDATE entries SET accessed = MAX(accessed, ?) WHERE key = ?",
+                    [(when, key) for key, when in accessed.items()],
+                )
+        except sqlite3.Error as e:
+            log.error(f"Erro ao registrar uso do cache: {e}")
+
+    def evict(self, max_bytes: int, limit: int) -> int:
+        try:
+            with self._lock, self.db:
+                excess = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0] - max_bytes
+                if excess <= 0:
+                    return 0
+                victims = []
+                for key, size in self.db.execute(
+                    "SELECT key, size FROM entries ORDER BY accessed LIMIT ?", (limit,)
+                ).fetchall():
+                    if excess <= 0:
+                        break
+                    victims.append((key,))
+                    excess -= size
+                self.db.executemany("DELETE FROM entries WHERE key = ?", victims)
+                return len(victims)
+        except sqlite3.Error as e:
+            log.error(f"Erro ao aplicar cota do cache: {e}")
+            return 0
+
+    def compact(self) -> None:
+        """
+        Devolve o WAL ao tamanho zero e roda VACUUM se sobrar muita página
+        livre, em uma conexão própria e sem o lock: as leituras do turno
+        seguem pela conexão principal (no WAL elas não esperam o VACUUM), e
+        só as gravações, já adiadas pela fila, aguardam o fim.
+        """
+        try:
+            db = sqlite3.connect(self.path, timeout=_COMPACT_TIMEOUT)
+            try:
+                db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                pages = db.execute("PRAGMA page_count").fetchone()[0]
+                free = db.execute("PRAGMA freelist_count").fetchone()[0]
+                if pages and free / pages > _VACUUM_FREE_RATIO:
+                    db.execute("VACUUM")
+                    # No WAL o banco reescrito fica no log até o checkpoint
+                    db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                    log.debug(f"Cache {self.path}: VACUUM liberou {free} páginas")
+            finally:
+                db.close()
+        except sqlite3.Error as e:
+            log.error(f"Erro ao compactar cache: {e}")
+
+    def close(self) -> None:
+        with self._lock:
+            self.db.close()
+
+
+def create_backend(cache_dir: str, kind: Optional[str] = None) -> CacheBackend:
+    """
+    Cria o armazenamento do cache.
+
+    Args:
+        cache_dir: Diretório do cache
+        kind: "sqlite" ou "file" (padrão: JARVIS_CACHE_BACKEND ou sqlite)
+
+    Returns:
+        CacheBackend: Armazenamento pronto para uso
+    """
+    kind = (kind or os.getenv("JARVIS_CACHE_BACKEND", BACKEND_SQLITE)).lower()
+    if kind == BACKEND_FILE:
+        return FileCacheBackend(cache_dir)
+    if kind != BACKEND_SQLITE:
+        log.warning(f"Armazenamento de cache desconhecido: {kind}; usando sqlite")
+    return SQLiteCacheBackend(cache_dir)
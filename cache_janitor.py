@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# filepath: /home/comunikime/code/jarvis/cache_janitor.py
+"""
+Módulo com a manutenção em segundo plano de um CacheManager: expira as
+entradas vencidas, aplica a cota de disco despejando as usadas há mais
+tempo e compacta o armazenamento, em lotes pequenos e só quando o cache
+está ocioso, para não disputar disco com o turno em andamento.
+"""
+
+import os
+import threading
+import time
+from typing import Callable, List, Optional
+
+from log_manager import LogManager
+
+# Configura o logger
+log = LogManager().logger
+
+
+class CacheJanitor:
+    """Thread de manutenção periódica de um cache."""
+
+    def __init__(self, cache, interval: Optional[float] = None, max_disk_bytes: Optional[int] = None,
+                 batch_size: int = 200, pause: float = 0.05, idle_seconds: float = 2.0):
+        """
+        Inicializa a manutenção (a thread só começa em start()).
+
+        Args:
+            cache: CacheManager mantido
+            interval: Segundos entre as rodadas (padrão:
+                JARVIS_CACHE_JANITOR_INTERVAL ou 900; 0 desativa)
+            max_disk_bytes: Cota de disco do cache (padrão:
+                JARVIS_CACHE_MAX_DISK_BYTES ou 256 MiB; 0 desativa)
+            batch_size: Entradas removidas por lote
+            pause: Pausa entre lotes, em segundos
+            idle_seconds: Tempo sem leituras nem gravações no cache exigido
+                antes de cada lote
+        """
+        if interval is None:
+            interval = float(os.getenv("JARVIS_CACHE_JANITOR_INTERVAL", "900"))
+        if max_disk_bytes is None:
+            max_disk_bytes = int(os.getenv("JARVIS_CACHE_MAX_DISK_BYTES", str(256 * 1024 * 1024)))
+        self.cache = cache
+        self.interval = interval
+        self.max_disk_bytes = max_disk_bytes
+        self.batch_size = batch_size
+        self.pause = pause
+        self.idle_seconds = idle_seconds
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._tasks: List[Callable[[], int]] = []
+
+    @property
+    def enabled(self) -> bool:
+        return self.interval > 0
+
+    def add_task(self, task: Callable[[], int]) -> None:
+        """
+        Acrescenta uma tarefa executada ao fim de cada rodada, com o cache
+        ocioso (ex: podar um índice derivado das entradas).
+
+        Args:
+            task: Função sem argumentos que retorna quantos itens removeu
+        """
+        self._tasks.append(task)
+
+    def start(self) -> None:
+        """Inicia a thread daemon de manutenção, se habilitada."""
+        if not self.enabled or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._loop, name="jarvis-cache-janitor", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """
+        Interrompe a manutenção, esperando o lote em andamento.
+
+        Args:
+            timeout: Espera máxima pela thread, em segundos
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception as e:
+                log.warning(f"Erro na manutenção do cache {self.cache.cache_dir}: {e}")
+
+    def _wait_idle(self) -> bool:
+        """
+        Espera o cache ficar ocioso antes de um lote.
+
+        Returns:
+            bool: False se a manutenção foi interrompida
+        """
+        while not self._stop.is_set():
+            remaining = self.idle_seconds - self.cache.idle_for()
+            if remaining <= 0:
+                return True
+            self._stop.wait(remaining)
+        return False
+
+    def run_once(self) -> None:
+        """Executa uma rodada completa de manutenção."""
+        start = time.perf_counter()
+
+        expired = 0
+        while self._wait_idle():
+            removed = self.cache.clear(limit=self.batch_size)
+            expired += removed
+            if removed < self.batch_size:
+                break
+            self._stop.wait(self.pause)
+
+        evicted = 0
+        if self.max_disk_bytes > 0:
+            while self._wait_idle():
+                # Os usos anotados até agora decidem quem sai primeiro
+                self.cache.flush_touches()
+                removed = self.cache.backend.evict(self.max_disk_bytes, self.batch_size)
+                evicted += removed
+                if removed < self.batch_size:
+                    break
+                self._stop.wait(self.pause)
+
+        if self._wait_idle():
+            self.cache.flush_touches()
+            if expired or evicted:
+                self.cache.backend.compact()
+
+        for task in self._tasks:
+            if self._wait_idle():
+                task()
+
+        if expired or evicted:
+            log.info(
+                f"Manutenção do cache {self.cache.cache_dir}: {expired} entradas expiradas, "
+                f"{evicted} despejadas pela cota em {time.perf_counter() - start:.2f}s"
+            )
@@ -8,19 +8,47 @@ reduzindo chamadas desnecessárias à API.
 import os
 import json
 import hashlib
+import threading
 import time
+import weakref
+from collections import OrderedDict
 from typing import Dict, Any, Optional
 
+from cache_backends import CacheBackend, create_backend
+from cache_janitor import CacheJanitor
+from cache_writer import WriteBehindQueue
+
 class CacheManager:
     """Gerencia o cache local para reduzir chamadas repetitivas à API."""
     
-    def __init__(self, cache_dir: str = None, max_age_seconds: int = 86400):
+    # Caches abertos no processo, para flush_all() no encerramento
+    _instances: "weakref.WeakSet[CacheManager]" = weakref.WeakSet()
+    _shared_lock = threading.Lock()
+    
+    def __init__(self, cache_dir: str = None, max_age_seconds: int = 86400,
+                 backend: Optional[CacheBackend] = None, max_entries: Optional[int] = None,
+                 max_bytes: Optional[int] = None, janitor_interval: Optional[float] = None,
+                 max_disk_bytes: Optional[int] = None, write_behind: Optional[bool] = None):
         """
         Inicializa o gerenciador de cache.
         
         Args:
             cache_dir: Diretório para armazenar arquivos de cache
             max_age_seconds: Tempo máximo em segundos para um item de cache ser considerado válido
+            backend: Armazenamento persistente (padrão: o escolhido por
+                JARVIS_CACHE_BACKEND, sqlite ou file, dentro de cache_dir)
+            max_entries: Limite de entradas em memória (padrão:
+                JARVIS_CACHE_MEMORY_ENTRIES ou 1000)
+            max_bytes: Limite do tamanho serializado das entradas em memória
+                (padrão: JARVIS_CACHE_MEMORY_BYTES ou 16 MiB)
+            janitor_interval: Segundos entre as rodadas de manutenção em
+                segundo plano (padrão: JARVIS_CACHE_JANITOR_INTERVAL ou 900;
+                0 desativa)
+            max_disk_bytes: Cota de disco aplicada pela manutenção (padrão:
+                JARVIS_CACHE_MAX_DISK_BYTES ou 256 MiB; 0 desativa)
+            write_behind: Grava no disco em segundo plano, em lotes, em vez
+                de no thread de set() (padrão: JARVIS_CACHE_WRITE_BEHIND ou
+                ativado)
         """
         self.max_age_seconds = max_age_seconds
         
@@ -30,9 +58,34 @@ class CacheManager:
         
         self.cache_dir = cache_dir
         os.makedirs(self.cache_dir, exist_ok=True)
+        self.backend = backend or create_backend(cache_dir)
+        if write_behind is None:
+            write_behind = os.getenv("JARVIS_CACHE_WRITE_BEHIND", "1").lower() not in ("0", "false", "no")
+        self.writer = WriteBehindQueue(self.backend) if write_behind else None
+        
+        # Cache em memória para acesso mais rápido, limitado em entradas e
+        # bytes; a ordem do OrderedDict é a de uso (LRU no início)
+        if max_entries is None:
+            max_entries = int(os.getenv("JARVIS_CACHE_MEMORY_ENTRIES", "1000"))
+        if max_bytes is None:
+            max_bytes = int(os.getenv("JARVIS_CACHE_MEMORY_BYTES", str(16 * 1024 * 1024)))
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.memory_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._memory_sizes: Dict[str, int] = {}
+        self._memory_bytes = 0
+        self._lock = threading.RLock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "expired": 0}
+        
+        # Manutenção em segundo plano; os acessos são anotados em memória e
+        # gravados por ela, para ordenar o despejo da cota de disco
+        self._last_activity = time.monotonic()
+        self._touched: Dict[str, float] = {}
+        self.janitor = CacheJanitor(self, interval=janitor_interval, max_disk_bytes=max_disk_bytes)
+        self.janitor.start()
         
-        # Cache em memória para acesso mais rápido
-        self.memory_cache: Dict[str, Dict[str, Any]] = {}
+        with CacheManager._shared_lock:
+            CacheManager._instances.add(self)
     
     def _generate_key(self, data: Any) -> str:
         """
@@ -49,18 +102,6 @@ class CacheManager:
         # Gera hash SHA-256
         return hashlib.sha256(data_str.encode()).hexdigest()
     
-    def _get_cache_path(self, key: str) -> str:
-        """
-        Obtém o caminho do arquivo de cache para uma chave.
-        
-        Args:
-            key: Chave do cache
-            
-        Returns:
-            str: Caminho completo do arquivo
-        """
-        return os.path.join(self.cache_dir, f"{key}.json")
-    
     def get(self, key_data: Any) -> Optional[Dict[str, Any]]:
         """
         Obtém um valor do cache se existir e for válido.
@@ -72,35 +113,42 @@ class CacheManager:
             Optional[Dict[str, Any]]: Valor do cache ou None se não existir ou estiver expirado
         """
         key = self._generate_key(key_data)
+        self._last_activity = time.monotonic()
         
         # Primeiro tenta o cache em memória
-        if key in self.memory_cache:
-            cached = self.memory_cache[key]
-            if time.time() - cached["timestamp"] < self.max_age_seconds:
-                return cached["data"]
-            # Se expirou, remove do cache de memória
-            del self.memory_cache[key]
-        
-        # Se não existir em memória, tenta do arquivo
-        cache_path = self._get_cache_path(key)
-        if os.path.exists(cache_path):
-            try:
-                with open(cache_path, "r") as f:
-                    cached = json.load(f)
-                
-                # Verifica se o cache ainda é válido
+        with self._lock:
+            cached = self.memory_cache.get(key)
+            if cached is not None:
                 if time.time() - cached["timestamp"] < self.max_age_seconds:
-                    # Armazena em memória para acesso mais rápido da próxima vez
-                    self.memory_cache[key] = cached
+                    self.memory_cache.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    self._touch(key)
                     return cached["data"]
-                else:
-                    # Remove arquivo de cache expirado
-                    os.remove(cache_path)
-            except (json.JSONDecodeError, KeyError, OSError):
-                # Em caso de erro, ignora o cache
-                if os.path.exists(cache_path):
-                    os.remove(cache_path)
+                # Se expirou, remove do cache de memória
+                self._forget(key)
+                self._stats["expired"] += 1
         
+        # Se não existir em memória, tenta as gravações pendentes e depois o
+        # armazenamento persistente
+        cached = self.writer.get(key) if self.writer else None
+        if cached is None:
+            cached = self.backend.get(key)
+        if cached is not None:
+            # Verifica se o cache ainda é válido
+            if time.time() - cached["timestamp"] < self.max_age_seconds:
+                # Armazena em memória para acesso mais rápido da próxima vez
+                self._remember(key, cached)
+                self._count("disk_hits")
+                with self._lock:
+                    self._touch(key)
+                return cached["data"]
+            # Remove entrada expirada
+            if self.writer:
+                self.writer.discard(key)
+            self.backend.delete(key)
+            self._count("expired")
+        
+        self._count("misses")
         return None
     
     def set(self, key_data: Any, value: Any) -> None:
@@ -112,29 +160,29 @@ class CacheManager:
             value: Valor a ser armazenado
         """
         key = self._generate_key(key_data)
+        self._last_activity = time.monotonic()
         cache_data = {
             "timestamp": time.time(),
             "data": value
         }
         
         # Armazena em memória
-        self.memory_cache[key] = cache_data
+        self._remember(key, cache_data)
         
-        # Armazena em arquivo
-        cache_path = self._get_cache_path(key)
-        try:
-            with open(cache_path, "w") as f:
-                json.dump(cache_data, f)
-        except OSError:
-            # Ignora erros de escrita no arquivo
-            pass
+        # Armazena no disco (ou enfileira a gravação)
+        if self.writer:
+            self.writer.put(key, cache_data)
+        else:
+            self.backend.set(key, cache_data)
     
-    def clear(self, max_age_seconds: Optional[int] = None) -> int:
+    def clear(self, max_age_seconds: Optional[int] = None, limit: Optional[int] = None) -> int:
         """
         Limpa entradas de cache expiradas.
         
         Args:
             max_age_seconds: Tempo máximo em segundos ou None para usar o tempo padrão
+            limit: Máximo aproximado de entradas removidas do disco (None
+                remove todas)
             
         Returns:
             int: Número de entradas removidas
@@ -144,34 +192,121 @@ class CacheManager:
         
         # Limpa cache em memória
         current_time = time.time()
-        keys_to_remove = [
-            k for k, v in self.memory_cache.items() 
-            if current_time - v["timestamp"] > max_age_seconds
-        ]
-        
-        for k in keys_to_remove:
-            del self.memory_cache[k]
+        with self._lock:
+            keys_to_remove = [
+                k for k, v in self.memory_cache.items() 
+                if current_time - v["timestamp"] > max_age_seconds
+            ]
+            
+            for k in keys_to_remove:
+                self._forget(k)
         
-        # Limpa arquivos de cache
+        # Limpa o armazenamento persistente, com as gravações pendentes já feitas
+        self.flush()
         removed_count = len(keys_to_remove)
-        for filename in os.listdir(self.cache_dir):
-            if not filename.endswith(".json"):
-                continue
-                
-            file_path = os.path.join(self.cache_dir, filename)
-            try:
-                with open(file_path, "r") as f:
-                    cached = json.load(f)
-                
-                if current_time - cached["timestamp"] > max_age_seconds:
-                    os.remove(file_path)
-                    removed_count += 1
-            except (json.JSONDecodeError, KeyError, OSError):
-                # Remove arquivos inválidos
-                try:
-                    os.remove(file_path)
-                    removed_count += 1
-                except OSError:
-                    pass
+        removed_count += self.backend.expire(current_time - max_age_seconds, limit)
         
         return removed_count
+    
+    def _remember(self, key: str, cached: Dict[str, Any]) -> None:
+        """
+        Guarda uma entrada em memória como a mais recente, descartando as
+        menos usadas até respeitar os limites.
+        
+        Args:
+            key: Chave hash
+            cached: Entrada com timestamp e data
+        """
+        try:
+            size = len(json.dumps(cached["data"]))
+        except (TypeError, ValueError):
+            return
+        with self._lock:
+            self._forget(key)
+            if size > self.max_bytes or self.max_entries <= 0:
+                # Maior que o orçamento inteiro: fica só no disco
+                return
+            self.memory_cache[key] = cached
+            self._memory_sizes[key] = size
+            self._memory_bytes += size
+            while len(self.memory_cache) > self.max_entries or self._memory_bytes > self.max_bytes:
+                oldest = next(iter(self.memory_cache))
+                self._forget(oldest)
+                self._stats["evictions"] += 1
+    
+    def _forget(self, key: str) -> None:
+        """Remove uma entrada da memória (chamado com o lock)."""
+        if self.memory_cache.pop(key, None) is not None:
+            self._memory_bytes -= self._memory_sizes.pop(key)
+    
+    def _touch(self, key: str) -> None:
+        """Anota o uso de uma entrada (chamado com o lock)."""
+        if self.janitor.enabled:
+            self._touched[key] = time.time()
+    
+    def flush_touches(self) -> None:
+        """Grava no armazenamento os usos anotados desde a última gravação."""
+        with self._lock:
+            touched, self._touched = self._touched, {}
+        if touched:
+            self.backend.touch(touched)
+    
+    def flush(self) -> int:
+        """
+        Grava imediatamente as entradas pendentes do modo write-behind.
+        
+        Returns:
+            int: Número de entradas gravadas
+        """
+        return self.writer.flush() if self.writer else 0
+    
+    @classmethod
+    def flush_all(cls) -> int:
+        """
+        Grava as entradas pendentes de todos os caches abertos no processo.
+        
+        Returns:
+            int: Número de entradas gravadas
+        """
+        with cls._shared_lock:
+            caches = list(cls._instances)
+        return sum(cache.flush() for cache in caches)
+    
+    def idle_for(self) -> float:
+        """
+        Tempo desde a última leitura ou gravação.
+        
+        Returns:
+            float: Segundos
+        """
+        return time.monotonic() - self._last_activity
+    
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+    
+    def stats(self) -> Dict[str, int]:
+        """
+        Retorna os contadores do cache.
+        
+        Returns:
+            Dict[str, int]: Acertos em memória e em disco, faltas, entradas
+            descartadas pelo LRU, entradas expiradas lidas, a ocupação atual
+            da memória (entradas e bytes) e, no modo write-behind, os
+            contadores da fila (write_*)
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self.memory_cache)
+            stats["bytes"] = self._memory_bytes
+        if self.writer:
+            stats.update({f"write_{name}": value for name, value in self.writer.stats.items()})
+        return stats
+    
+    def close(self) -> None:
+        """Interrompe a manutenção, grava as pendências e fecha o armazenamento persistente."""
+        self.janitor.stop()
+        if self.writer:
+            self.writer.close()
+        self.flush_touches()
+        self.backend.close()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# filepath: /home/comunikime/code/jarvis/cache_writer.py
+"""
+Módulo com a gravação adiada (write-behind) do CacheManager: as entradas
+vão para uma fila limitada, regravações da mesma chave se fundem, e uma
+thread as grava em lotes, fora do caminho da resposta ao usuário.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from cache_backends import CacheBackend
+from log_manager import LogManager
+
+# Configura o logger
+log = LogManager().logger
+
+
+class WriteBehindQueue:
+    """Fila de gravações pendentes de um armazenamento de cache."""
+
+    def __init__(self, backend: CacheBackend, max_pending: int = 1000, batch_size: int = 100,
+                 delay: float = 0.5):
+        """
+        Inicializa a fila e sua thread de gravação.
+
+        Args:
+            backend: Armazenamento que recebe as gravações
+            max_pending: Chaves pendentes a partir das quais set() espera
+                a thread esvaziar a fila
+            batch_size: Entradas gravadas por lote
+            delay: Espera após a primeira gravação pendente, para juntar as
+                seguintes no mesmo lote
+        """
+        self.backend = backend
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.delay = delay
+        self._pending: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        # Serializa os lotes da thread e os de flush()
+        self._writing = threading.Lock()
+        self._closed = False
+        self.stats = {"queued": 0, "coalesced": 0, "written": 0, "batches": 0, "waits": 0}
+        self._thread = threading.Thread(target=self._loop, name="jarvis-cache-writer", daemon=True)
+        self._thread.start()
+
+    def put(self, key: str, entry: Dict[str, Any]) -> None:
+        """
+        Enfileira uma gravação; uma pendente da mesma chave é substituída.
+
+        Se a fila estiver cheia, espera a thread liberar espaço.
+
+        Args:
+            key: Chave hash
+            entry: Entrada com timestamp e data
+        """
+        with self._changed:
+            if self._closed:
+                self.backend.set(key, entry)
+                return
+            if key in self._pending:
+                self.stats["coalesced"] += 1
+                self._pending.move_to_end(key)
+            else:
+                while len(self._pending) >= self.max_pending and not self._closed:
+                    self.stats["waits"] += 1
+                    self._changed.notify_all()
+                    self._changed.wait()
+            self._pending[key] = entry
+            self.stats["queued"] += 1
+            self._changed.notify_all()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Retorna a entrada ainda não gravada de uma chave.
+
+        Args:
+            key: Chave hash
+
+        Returns:
+            Optional[Dict[str, Any]]: Entrada pendente, ou None
+        """
+        with self._lock:
+            return self._pending.get(key)
+
+    def discard(self, key: str) -> None:
+        """
+        Cancela a gravação pendente de uma chave.
+
+        Args:
+            key: Chave hash
+        """
+        with self._lock:
+            self._pending.pop(key, None)
+
+    def _take(self) -> Dict[str, Dict[str, Any]]:
+        """Retira um lote da fila (chamado com o lock)."""
+        batch = {}
+        while self._pending and len(batch) < self.batch_size:
+            key, entry = self._pending.popitem(last=False)
+            batch[key] = entry
+        self._changed.notify_all()
+        return batch
+
+    def _write(self, batch: Dict[str, Dict[str, Any]]) -> None:
+        """Grava um lote (chamado com _writing)."""
+        if not batch:
+            return
+        self.backend.set_many(batch)
+        with self._lock:
+            self.stats["written"] += len(batch)
+            self.stats["batches"] += 1
+
+    def _loop(self) -> None:
+        while True:
+            with self._changed:
+                while not self._pending and not self._closed:
+                    self._changed.wait()
+                if self._closed:
+                    return
+            # Junta as gravações que chegarem logo depois, exceto com a fila cheia
+            deadline = time.monotonic() + self.delay
+            with self._changed:
+                while (not self._closed and len(self._pending) < self.max_pending
+                       and time.monotonic() < deadline):
+                    self._changed.wait(deadline - time.monotonic())
+            with self._writing:
+                with self._lock:
+                    batch = self._take()
+                try:
+                    self._write(batch)
+                except Exception as e:
+                    log.error(f"Erro ao gravar lote do cache: {e}")
+
+    def flush(self) -> int:
+        """
+        Grava imediatamente todas as entradas pendentes, no thread atual.
+
+        Returns:
+            int: Número de entradas gravadas
+        """
+        written = 0
+        with self._writing:
+            while True:
+                with self._lock:
+                    batch = self._take()
+                if not batch:
+                    return written
+                self._write(batch)
+                written += len(batch)
+
+    def close(self) -> None:
+        """Grava o que estiver pendente e encerra a thread."""
+        self.flush()
+        with self._changed:
+            self._closed = True
+            self._changed.notify_all()
+        self._thread.join(5.0)
+        # Gravações que chegaram entre o flush e o fechamento
+        self.flush()
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# filepath: /home/comunikime/code/jarvis/github_commands.py
+"""
+Módulo com os comandos GitHub do Jarvis (!github list/get e consultas em
+linguagem natural), compartilhado pelos clientes OpenAI síncrono e assíncrono.
+"""
+
+import re
+from typing import Optional
+
+from log_manager import LogManager
+
+# Configura o logger
+log = LogManager().logger
+
+class GitHubCommands:
+    """Converte pedidos do usuário em consultas ao repositório GitHub."""
+    
+    def __init__(self, retriever):
+        """
+        Inicializa os comandos GitHub.
+        
+        Args:
+            retriever: Instância de GitHubRetriever usada nas consultas
+        """
+        self.retriever = retriever
+    
+    def route(self, content: str) -> Optional[str]:
+        """
+        Responde localmente a consultas GitHub e comandos !github.
+        
+        Args:
+            content: Texto da mensagem do usuário
+            
+        Returns:
+            Resposta processada ou None se a mensagem deve ir ao assistente
+        """
+        # Primeiro verifica se é uma consulta em linguagem natural
+        github_response = self.process_github_query(content)
+        if github_response:
+            return github_response
+            
+        # Se não for linguagem natural, verifica comandos explícitos
+        if content.startswith("!github"):
+            return self.handle_command(content)
+        
+        return None
+    
+    def handle_command(self, content: str) -> str:
+        """
+        Executa um comando explícito !github.
+        
+        Args:
+            content: Texto do comando (ex: "!github list src")
+            
+        Returns:
+            str: Resultado do comando ou mensagem de uso
+        """
+        parts = content.split(maxsplit=2)
+        if len(parts) < 2:
+            return "Comando inválido. Use !github list [caminho] ou !github get [arquivo]"
+        
+        command = parts[1]
+        
+        if command == "list":
+            path = parts[2] if len(parts) > 2 else ""
+            return self.list_github_files(path)
+        
+        if command == "get":
+            if len(parts) < 3:
+                return "Especifique o caminho do arquivo. Ex: !github get src/main.py"
+            return self.get_github_file(parts[2])
+        
+        return f"Comando GitHub desconhecido: {command}. Comandos disponíveis: list, get."
+    
+    def get_github_file(self, file_path: str) -> Optional[str]:
+        """
+        Obtém o conteúdo de um arquivo do GitHub.
+        
+        Args:
+            file_path: Caminho do arquivo no repositório
+            
+        Returns:
+            Conteúdo do arquivo ou None se não encontrado/disponível
+        """
+        if not self.retriever.is_enabled():
+            return "Integração com GitHub não está configurada. Configure as variáveis GITHUB_API_TOKEN, GITHUB_REPO_OWNER e GITHUB_REPO_NAME no arquivo .env."
+        
+        content = self.retriever.get_file_content(file_path)
+        if content is None:
+            return f"Não foi possível obter o arquivo {file_path}."
+        
+        return content
+
+    def list_github_files(self, path: str = "", extension: str = None) -> str:
+        """
+        Lista arquivos do repositório GitHub.
+        
+        Args:
+            path: Caminho dentro do repositório
+            extension: Extensão para filtrar
+            
+        Returns:
+            String formatada com lista de arquivos
+        """
+        if not self.retriever.is_enabled():
+            return "Integração com GitHub não está configurada. Configure as variáveis GITHUB_API_TOKEN, GITHUB_REPO_OWNER e GITHUB_REPO_NAME no arquivo .env."
+        
+        files = self.retriever.list_files(path, extension)
+        if not files:
+            return f"Nenhum arquivo encontrado no caminho: {path}"
+        
+        result = "Arquivos encontrados:\n"
+        for file in files:
+            result += f"- {file['path']} ({file['size']} bytes)\n"
+        
+        return result
+    
+    def process_github_query(self, content: str) -> Optional[str]:
+        """
+        Processa consultas sobre GitHub em linguagem natural e as converte
+        em comandos apropriados.
+        
+        Args:
+            content: Texto da mensagem do usuário
+            
+        Returns:
+            Resposta processada ou None se não for uma consulta GitHub
+        """
+        # Verificar se a integração com GitHub está ativada
+        if not self.retriever.is_enabled():
+            return None
+            
+        # Palavras-chave que indicam consulta ao GitHub
+        github_keywords = [
+            "github", "repositório", "repositorio", "repo", "git", 
+            "código fonte", "codigo fonte", "arquivos do projeto"
+        ]
+        
+        content_lower = content.lower()
+        is_github_query = any(keyword in content_lower for keyword in github_keywords)
+        
+        if not is_github_query:
+            return None
+            
+        log.info("Processando consulta GitHub")
+        
+        # Detecção de pedidos de visão geral do repositório
+        overview_keywords = [
+            "visão geral", "visao geral", "overview", "resumo", "estrutura", 
+            "arquivos", "me mostre", "me dê", "me de"
+        ]
+        
+        if any(keyword in content_lower for keyword in overview_keywords):
+            return self.get_repo_overview()
+            
+        # Detecção de pedido de arquivo específico
+        file_patterns = [
+            r"arquivo\s+(.+?)[\s\.\?]",
+            r"conteúdo\s+de\s+(.+?)[\s\.\?]",
+            r"conteudo\s+de\s+(.+?)[\s\.\?]",
+            r"ver\s+arquivo\s+(.+?)[\s\.\?]",
+            r"ver\s+(.+\.(py|js|md|html|css|json))[\s\.\?]",
+            r"abrir\s+(.+?)[\s\.\?]"
+        ]
+        
+        for pattern in file_patterns:
+            match = re.search(pattern, content_lower)
+            if match:
+                file_path = match.group(1).strip()
+                return self.get_github_file(file_path)
+        
+        # Detecção de pedido para listar diretório específico
+        dir_patterns = [
+            r"listar\s+(.+?)[\s\.\?]",
+            r"arquivos\s+em\s+(.+?)[\s\.\?]",
+            r"diretório\s+(.+?)[\s\.\?]",
+            r"diretorio\s+(.+?)[\s\.\?]",
+            r"pasta\s+(.+?)[\s\.\?]"
+        ]
+        
+        for pattern in dir_patterns:
+            match = re.search(pattern, content_lower)
+            if match:
+                dir_path = match.group(1).strip()
+                return self.list_github_files(dir_path)
+        
+        # Se não conseguir determinar um comando específico, 
+        # mas for relacionado ao GitHub, mostrar visão geral
+        return self.get_repo_overview()
+        
+    def get_repo_overview(self) -> str:
+        """
+        Fornece uma visão geral do repositório GitHub configurado.
+        
+        Returns:
+            String formatada com visão geral do repositório
+        """
+        if not self.retriever.is_enabled():
+            return "Integração com GitHub não está configurada. Configure as variáveis GITHUB_API_TOKEN, GITHUB_REPO_OWNER e GITHUB_REPO_NAME no arquivo .env."
+        
+        # Obter lista de arquivos na raiz
+        files = self.retriever.list_files()
+        
+        # Obter commits recentes
+        commits = self.retriever.get_recent_commits(5)
+        
+        # Formatar resposta
+        result = f"# Visão Geral do Repositório: {self.retriever.repo_owner}/{self.retriever.repo_name}\n\n"
+        
+        # Adicionar estrutura de arquivos
+        result += "## Estrutura de Arquivos (raiz):\n"
+        if files:
+            for file in files:
+                # Adicionar ícone de pasta ou arquivo
+                icon = "📁 " if file["type"] == "dir" else "📄 "
+                result += f"{icon}{file['path']}\n"
+        else:
+            result += "Nenhum arquivo encontrado na raiz do repositório.\n"
+        
+        # Adicionar commits recentes
+        result += "\n## Commits Recentes:\n"
+        if commits:
+            for i, commit in enumerate(commits, 1):
+                date = commit["date"]
+                message = commit["message"].split("\n")[0]  # Primeira linha da mensagem
+                author = commit["author"]
+                result += f"{i}. **{message}** (por {author} em {date})\n"
+        else:
+            result += "Não foi possível obter commits recentes.\n"
+            
+        # Adicionar instruções para comandos específicos
+        result += "\n## Comandos Disponíveis:\n"
+        result += "- Para listar arquivos de um diretório específico: `!github list [caminho]`\n"
+        result += "- Para ver o conteúdo de um arquivo específico: `!github get [arquivo]`\n"
+            
+        return result
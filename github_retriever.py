@@ -8,9 +8,13 @@ acessar arquivos de um repositório para pair programming.
 import os
 import base64
 from typing import List, Dict, Any, Optional
-from github import Github, GithubException
 
 from log_manager import LogManager
+from lazy_import import lazy_import
+from transport import HttpTransport
+
+# PyGithub só é carregado quando a integração é de fato configurada
+github = lazy_import("github")
 
 # Configurar logger
 log = LogManager().logger
@@ -38,12 +42,13 @@ class GitHubRetriever:
             return
             
         try:
-            self.github = Github(github_token)
+            # Mesmos timeouts e tamanho de pool do transporte HTTP compartilhado
+            self.github = github.Github(github_token, **HttpTransport.shared().github_options())
             # Testa a conexão tentando acessar o repositório
             self.repo = self.github.get_repo(f"{self.repo_owner}/{self.repo_name}")
             self.enabled = True
             log.info(f"Integração com GitHub ativada para repositório: {self.repo_owner}/{self.repo_name}")
-        except GithubException as e:
+        except github.GithubException as e:
             log.error(f"Erro ao conectar ao GitHub: {e}")
             self.github = None
             self.enabled = False
@@ -87,7 +92,7 @@ class GitHubRetriever:
                     })
             
             return files
-        except GithubException as e:
+        except github.GithubException as e:
             log.error(f"Erro ao listar arquivos do GitHub: {e}")
             return []
     
@@ -109,7 +114,7 @@ class GitHubRetriever:
             file_content = self.repo.get_contents(file_path)
             decoded_content = base64.b64decode(file_content.content).decode('utf-8')
             return decoded_content
-        except GithubException as e:
+        except github.GithubException as e:
             log.error(f"Erro ao obter conteúdo do arquivo {file_path}: {e}")
             return None
     
@@ -141,7 +146,7 @@ class GitHubRetriever:
                 })
                 
             return result
-        except GithubException as e:
+        except github.GithubException as e:
             log.error(f"Erro ao obter commits do GitHub: {e}")
             return []
     
@@ -175,7 +180,7 @@ class GitHubRetriever:
                 })
                 
             return result
-        except GithubException as e:
+        except github.GithubException as e:
             log.error(f"Erro ao obter pull requests do GitHub: {e}")
             return []
     
@@ -213,7 +218,7 @@ class GitHubRetriever:
                 })
                 
             return result
-        except GithubException as e:
+        except github.GithubException as e:
             log.error(f"Erro ao obter issues do GitHub: {e}")
             return []
     
@@ -241,7 +246,7 @@ class GitHubRetriever:
                 })
                 
             return result
-        except GithubException as e:
+        except github.GithubException as e:
             log.error(f"Erro ao obter colaboradores do GitHub: {e}")
             return []
     
@@ -270,6 +275,6 @@ class GitHubRetriever:
                 "commit_message": branch.commit.commit.message,
                 "protected": branch.protected
             }
-        except GithubException as e:
+        except github.GithubException as e:
             log.error(f"Erro ao obter informações da branch {branch_name}: {e}")
             return None
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# filepath: /home/comunikime/code/jarvis/image_pipeline.py
+"""
+Módulo de pré-processamento das imagens enviadas ao assistente: identifica
+o formato real pelo conteúdo, reduz a resolução ao máximo aproveitado pelo
+modelo e recodifica em um formato compacto antes do base64.
+"""
+
+import base64
+import importlib.util
+import io
+import os
+import time
+from typing import NamedTuple, Optional, Tuple
+
+from lazy_import import lazy_import
+from log_manager import LogManager
+
+# Pillow é opcional (sem ele as imagens são enviadas como estão) e só é
+# importado na primeira imagem, fora da inicialização
+HAS_PILLOW = importlib.util.find_spec("PIL") is not None
+Image = lazy_import("PIL.Image")
+ImageOps = lazy_import("PIL.ImageOps")
+
+# Configura o logger
+log = LogManager().logger
+
+# Assinaturas (magic bytes) dos formatos aceitos pela API
+_SIGNATURES = [
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+]
+
+# No detail "high" a imagem é reduzida para caber em 2048x2048 e depois até
+# o menor lado ter 768 px; no detail "low" o modelo a vê em 512x512
+_HIGH_MAX_SIDE = 2048
+_HIGH_SHORT_SIDE = 768
+_LOW_SIDE = 512
+
+_JPEG_QUALITY = 85
+
+
+class PreparedImage(NamedTuple):
+    """Imagem pronta para envio."""
+
+    data: bytes
+    mime_type: str
+    detail: str
+    original_bytes: int
+
+    def data_url(self) -> str:
+        """
+        Codifica a imagem como data URL em base64.
+
+        Returns:
+            str: URL no formato data:<mime>;base64,<dados>
+        """
+        return f"data:{self.mime_type};base64,{base64.b64encode(self.data).decode('utf-8')}"
+
+
+def sniff_format(data: bytes) -> Optional[str]:
+    """
+    Identifica o formato da imagem pelos primeiros bytes.
+
+    Args:
+        data: Conteúdo do arquivo
+
+    Returns:
+        Optional[str]: Tipo MIME, ou None se não for um formato aceito pela API
+    """
+    for signature, mime_type in _SIGNATURES:
+        if data.startswith(signature):
+            return mime_type
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+def choose_detail(width: int, height: int) -> str:
+    """
+    Escolhe o nível de detalhe adequado à resolução da imagem.
+
+    Args:
+        width: Largura em pixels
+        height: Altura em pixels
+
+    Returns:
+        str: "low" para imagens que já cabem em 512x512, senão "high"
+    """
+    return "low" if max(width, height) <= _LOW_SIDE else "high"
+
+
+def target_size(width: int, height: int, detail: str) -> Tuple[int, int]:
+    """
+    Calcula a maior resolução que o modelo de fato aproveita.
+
+    Args:
+        width: Largura original em pixels
+        height: Altura original em pixels
+        detail: Nível de detalhe ("low" ou "high")
+
+    Returns:
+        Tuple[int, int]: Nova largura e altura (nunca maiores que as originais)
+    """
+    if detail == "low":
+        scale = _LOW_SIDE / max(width, height)
+    else:
+        scale = min(_HIGH_MAX_SIDE / max(width, height), _HIGH_SHORT_SIDE / min(width, height))
+    scale = min(scale, 1.0)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def prepare_image(path: str, detail: str = "auto") -> PreparedImage:
+    """
+    Lê e prepara uma imagem para envio ao modelo.
+
+    Args:
+        path: Caminho da imagem
+        detail: "auto" (escolhe pela resolução), "low" ou "high"
+
+    Returns:
+        PreparedImage: Bytes, tipo MIME real e detail a usar
+
+    Raises:
+        ValueError: Se o formato não for suportado
+    """
+    start = time.perf_counter()
+    with open(path, "rb") as fp:
+        data = fp.read()
+    mime_type = sniff_format(data)
+
+    prepared = None
+    if HAS_PILLOW:
+        try:
+            prepared = _reencode(data, mime_type, detail)
+        except Exception as e:
+            # Formatos que o Pillow não decodifica seguem como estão
+            log.warning(f"Não foi possível processar a imagem {path}: {e}")
+
+    if prepared is None:
+        if mime_type is None:
+            raise ValueError(f"Formato de imagem não suportado: {path}")
+        prepared = PreparedImage(data, mime_type, "high" if detail == "auto" else detail, len(data))
+
+    elapsed = (time.perf_counter() - start) * 1000
+    log.info(
+        f"Imagem {os.path.basename(path)}: {prepared.original_bytes} -> {len(prepared.data)} bytes "
+        f"({prepared.original_bytes - len(prepared.data)} economizados, {prepared.mime_type}, "
+        f"detail={prepared.detail}) em {elapsed:.0f} ms"
+    )
+    return prepared
+
+
+def _reencode(data: bytes, mime_type: Optional[str], detail: str) -> PreparedImage:
+    """
+    Reduz e recodifica a imagem com o Pillow.
+
+    Imagens com transparência viram PNG; as demais, JPEG. Se a imagem não
+    precisou ser reduzida, girada ou achatada (GIF animado) e a
+    recodificação não a deixou menor, os bytes originais são mantidos.
+
+    Args:
+        data: Conteúdo original
+        mime_type: Formato identificado, ou None se desconhecido
+        detail: "auto", "low" ou "high"
+
+    Returns:
+        PreparedImage: Imagem processada
+    """
+    with Image.open(io.BytesIO(data)) as image:
+        # A API não aceita GIF animado nem aplica a orientação EXIF
+        changed = getattr(image, "is_animated", False) or image.getexif().get(0x0112, 1) != 1
+        image = ImageOps.exif_transpose(image)
+        width, height = image.size
+        if detail == "auto":
+            detail = choose_detail(width, height)
+
+        size = target_size(width, height, detail)
+        if size != image.size:
+            image = image.resize(size, Image.LANCZOS)
+
+        has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+        output = io.BytesIO()
+        if has_alpha:
+            image.save(output, "PNG", optimize=True)
+            new_type = "image/png"
+        else:
+            image.convert("RGB").save(output, "JPEG", quality=_JPEG_QUALITY, optimize=True)
+            new_type = "image/jpeg"
+
+    encoded = output.getvalue()
+    if not changed and size == (width, height) and mime_type and len(encoded) >= len(data):
+        return PreparedImage(data, mime_type, detail, len(data))
+    return PreparedImage(encoded, new_type, detail, len(data))
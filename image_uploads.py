@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# filepath: /home/comunikime/code/jarvis/image_uploads.py
+"""
+Módulo com o cache de uploads de imagens: cada imagem é enviada uma única
+vez pela Files API e referenciada depois pelo file_id, encontrado a partir
+do hash do seu conteúdo em um índice local persistente.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from image_pipeline import prepare_image
+from log_manager import LogManager
+from rate_limiter import RequestScheduler
+
+# Configura o logger
+log = LogManager().logger
+
+_INDEX_FILE = os.path.expanduser("~/.jarvis/image_uploads.json")
+
+
+class ImageUploadCache:
+    """Índice persistente hash da imagem → arquivo enviado à OpenAI."""
+
+    def __init__(self, client, path: str = _INDEX_FILE,
+                 max_entries: Optional[int] = None, max_age_days: Optional[float] = None):
+        """
+        Inicializa o cache, carregando o índice salvo.
+
+        Args:
+            client: Cliente OpenAI síncrono (usado para enviar e apagar arquivos)
+            path: Arquivo JSON do índice
+            max_entries: Máximo de imagens mantidas (padrão:
+                JARVIS_IMAGE_CACHE_MAX_ENTRIES ou 100)
+            max_age_days: Idade máxima de um upload, em dias (padrão:
+                JARVIS_IMAGE_CACHE_MAX_AGE_DAYS ou 30)
+        """
+        self.client = client
+        self.scheduler = RequestScheduler.shared()
+        self.path = path
+        if max_entries is None:
+            max_entries = int(os.getenv("JARVIS_IMAGE_CACHE_MAX_ENTRIES", "100"))
+        if max_age_days is None:
+            max_age_days = float(os.getenv("JARVIS_IMAGE_CACHE_MAX_AGE_DAYS", "30"))
+        self.max_entries = max_entries
+        self.max_age = max_age_days * 86400
+        self._lock = threading.Lock()
+        # Caminho local de cada file_id desta sessão, para reenvio em base64
+        self._paths: Dict[str, str] = {}
+
+        self.index: Dict[str, Dict[str, Any]] = {}
+        try:
+            with open(self.path) as fp:
+                self.index = json.load(fp)
+        except FileNotFoundError:
+            pass
+        except (json.JSONDecodeError, OSError) as e:
+            log.error(f"Erro ao carregar índice de imagens enviadas: {e}")
+
+    def image_part(self, image_path: str, detail: str = "auto") -> Dict[str, Any]:
+        """
+        Monta a parte de mensagem que referencia a imagem por file_id,
+        enviando-a apenas se o hash ainda não estiver no índice.
+
+        Args:
+            image_path: Caminho da imagem
+            detail: "auto", "low" ou "high"
+
+        Returns:
+            Dict[str, Any]: Parte do tipo image_file
+
+        Raises:
+            ValueError: Se o formato da imagem não for suportado
+        """
+        with open(image_path, "rb") as fp:
+            digest = hashlib.sha256(fp.read()).hexdigest()
+        key = f"{digest}:{detail}"
+
+        with self._lock:
+            entry = self.index.get(key)
+            if entry and time.time() - entry["created"] < self.max_age:
+                entry["last_used"] = time.time()
+                self._save()
+                log.info(f"Imagem já enviada, reutilizando arquivo {entry['file_id']}")
+            else:
+                entry = None
+
+        if entry is None:
+            image = prepare_image(image_path, detail=detail)
+            uploaded = self.scheduler.call(
+                "interactive", self.client.files.create,
+                file=(os.path.basename(image_path), image.data, image.mime_type),
+                purpose="vision"
+            )
+            log.info(f"Imagem enviada como arquivo {uploaded.id} ({len(image.data)} bytes)")
+            now = time.time()
+            entry = {"file_id": uploaded.id, "detail": image.detail, "bytes": len(image.data),
+                     "created": now, "last_used": now}
+            with self._lock:
+                previous = self.index.get(key)
+                self.index[key] = entry
+                expired = self._evict()
+                if previous:
+                    expired.append(previous["file_id"])
+                self._save()
+            self._delete_remote(expired)
+
+        self._paths[entry["file_id"]] = image_path
+        return {"type": "image_file", "image_file": {"file_id": entry["file_id"], "detail": entry["detail"]}}
+
+    def inline_part(self, part: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Troca uma parte image_file rejeitada (ex: arquivo apagado no servidor)
+        pela imagem em base64, removendo o file_id do índice.
+
+        Args:
+            part: Parte do tipo image_file
+
+        Returns:
+            Optional[Dict[str, Any]]: Parte image_url equivalente, ou None se
+            a imagem não foi referenciada nesta sessão
+        """
+        file_id = part["image_file"]["file_id"]
+        image_path = self._paths.pop(file_id, None)
+        with self._lock:
+            for key in [k for k, e in self.index.items() if e["file_id"] == file_id]:
+                del self.index[key]
+            self._save()
+        if image_path is None:
+            return None
+
+        image = prepare_image(image_path, detail=part["image_file"]["detail"])
+        return {"type": "image_url", "image_url": {"url": image.data_url(), "detail": image.detail}}
+
+    def _evict(self) -> List[str]:
+        """
+        Remove do índice os uploads expirados e os menos usados além do limite.
+        Deve ser chamado com o lock adquirido.
+
+        Returns:
+            List[str]: file_ids removidos do índice
+        """
+        now = time.time()
+        expired = [k for k, e in self.index.items() if now - e["created"] >= self.max_age]
+        by_use = sorted((k for k in self.index if k not in expired), key=lambda k: self.index[k]["last_used"])
+        excess = len(by_use) - self.max_entries
+        if excess > 0:
+            expired += by_use[:excess]
+        return [self.index.pop(key)["file_id"] for key in expired]
+
+    def _delete_remote(self, file_ids: List[str]) -> None:
+        """
+        Apaga os arquivos despejados do servidor em segundo plano.
+
+        Args:
+            file_ids: IDs dos arquivos a apagar
+        """
+        if not file_ids:
+            return
+
+        def run():
+            for file_id in file_ids:
+                try:
+                    self.scheduler.call("background", self.client.files.delete, file_id)
+                    log.debug(f"Arquivo de imagem {file_id} apagado")
+                except Exception as e:
+                    log.warning(f"Não foi possível apagar o arquivo {file_id}: {e}")
+
+        threading.Thread(target=run, name="jarvis-image-evict", daemon=True).start()
+
+    def _save(self) -> None:
+        """Persiste o índice. Deve ser chamado com o lock adquirido."""
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "w") as fp:
+                json.dump(self.index, fp, indent=2)
+        except OSError as e:
+            log.error(f"Erro ao salvar índice de imagens enviadas: {e}")
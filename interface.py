@@ -5,7 +5,6 @@ Módulo para gerenciar a interface do usuário do Jarvis, incluindo
 o ciclo principal de execução e interação com o usuário via texto ou voz.
 """
 
-import os
 import sys
 import re
 
@@ -15,6 +14,23 @@ from log_manager import LogManager
 # Configura o logger
 log = LogManager().logger
 
+# Fim de frase: pontuação final seguida de espaço, ou quebra de linha
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?…])\s+|\n+")
+
+
+def split_sentences(buffer):
+    """
+    Separa as frases completas do texto acumulado.
+
+    Args:
+        buffer: Texto recebido até agora
+
+    Returns:
+        tuple: (lista de frases completas, resto ainda incompleto)
+    """
+    pieces = _SENTENCE_BOUNDARY.split(buffer)
+    return [p for p in pieces[:-1] if p.strip()], pieces[-1]
+
 class JarvisInterface:
     """Gerencia a interface do usuário e o ciclo principal de execução do Jarvis."""
     
@@ -38,8 +54,19 @@ class JarvisInterface:
             image_path: Caminho para a imagem a ser analisada
         """
         log.info(f"Analisando imagem: {image_path}")
-        response = self.openai_client.send_message("O que você vê nesta imagem?", image_path=image_path)
-        self.audio_handler.speak(response)
+        self._speak_stream(self.openai_client.stream_message("O que você vê nesta imagem?", image_path=image_path))
+    
+    def is_new_conversation(self, user_input):
+        """
+        Verifica se o usuário pediu para começar uma nova conversa.
+        
+        Args:
+            user_input: A pergunta ou comando do usuário
+            
+        Returns:
+            Boolean indicando se é o comando de nova conversa
+        """
+        return user_input.strip().lower() in ["nova conversa", "!nova"]
     
     def is_github_query(self, user_input):
         """
@@ -84,6 +111,86 @@ class JarvisInterface:
         Returns:
             str: Resposta com informações do GitHub
         """
+        response = self._answer_github_locally(user_input)
+        if response is not None:
+            return response
+        
+        # Para outras consultas, passamos para o LLM responder com contexto do GitHub
+        return self.openai_client.send_message(self._github_prompt(user_input))
+    
+    def _response_stream(self, user_input):
+        """
+        Produz a resposta para a entrada do usuário em partes.
+        
+        Args:
+            user_input: A pergunta ou comando do usuário
+            
+        Yields:
+            str: Trechos da resposta
+        """
+        if self.is_github_query(user_input):
+            log.info("Processando consulta GitHub")
+            response = self._answer_github_locally(user_input)
+            if response is not None:
+                yield response
+                return
+            user_input = self._github_prompt(user_input)
+        
+        log.debug("Enviando mensagem para o assistente")
+        yield from self.openai_client.stream_message(user_input)
+    
+    def _speak_stream(self, parts):
+        """
+        Apresenta uma resposta transmitida, sem esperar o texto completo.
+        
+        No modo texto cada trecho é exibido assim que chega; no modo voz
+        cada frase completa é falada enquanto o restante ainda é gerado.
+        
+        Args:
+            parts: Iterável com os trechos da resposta
+        """
+        if self.audio_handler.text_only:
+            print("Jarvis: ", end="", flush=True)
+            response = ""
+            for part in parts:
+                print(part, end="", flush=True)
+                response += part
+            print()
+            log.debug(f"Jarvis (texto): {response}")
+            return
+        
+        buffer = ""
+        for part in parts:
+            buffer += part
+            sentences, buffer = split_sentences(buffer)
+            for sentence in sentences:
+                self.audio_handler.speak(sentence)
+        if buffer.strip():
+            self.audio_handler.speak(buffer)
+    
+    def _github_prompt(self, user_input):
+        """
+        Monta a pergunta enviada ao assistente com o contexto do repositório.
+        
+        Args:
+            user_input: A pergunta do usuário relacionada ao GitHub
+            
+        Returns:
+            str: Pergunta contextualizada
+        """
+        retriever = self.openai_client.github_retriever
+        return f"Esta é uma pergunta sobre o repositório GitHub {retriever.repo_owner}/{retriever.repo_name}: {user_input}"
+    
+    def _answer_github_locally(self, user_input):
+        """
+        Responde consultas GitHub que não precisam do assistente.
+        
+        Args:
+            user_input: A pergunta ou comando do usuário relacionado ao GitHub
+            
+        Returns:
+            str: Resposta local, ou None se a pergunta deve ir ao assistente
+        """
         # Verifica se o GitHub está habilitado
         if not self.openai_client.github_retriever.is_enabled():
             return "Desculpe, a integração com GitHub não está configurada. Verifique se as variáveis GITHUB_API_TOKEN, GITHUB_REPO_OWNER e GITHUB_REPO_NAME estão definidas no arquivo .env."
@@ -121,8 +228,7 @@ class JarvisInterface:
             
             return response
         
-        # Para outras consultas, passamos para o LLM responder com contexto do GitHub
-        return self.openai_client.send_message(f"Esta é uma pergunta sobre o repositório GitHub {self.openai_client.github_retriever.repo_owner}/{self.openai_client.github_retriever.repo_name}: {user_input}")
+        return None
     
     def run_conversation(self, with_voice=True):
         """
@@ -133,8 +239,7 @@ class JarvisInterface:
         """
         try:
             # Verifica se estamos usando uma thread existente ou nova
-            thread_id = os.environ.get("JARVIS_THREAD_ID")
-            if thread_id and thread_id == self.openai_client.thread.id:
+            if self.openai_client.thread_resumed:
                 # Usando thread existente, saudação para conversa contínua
                 log.info("Continuando conversa com thread existente")
                 self.audio_handler.speak("Olá novamente. Continuando nossa conversa.")
@@ -179,17 +284,13 @@ class JarvisInterface:
                     # Log a entrada do usuário
                     log.info(f"Entrada do usuário: {user_input}")
                     
-                    # Verifica se é uma consulta relacionada ao GitHub
-                    if self.is_github_query(user_input):
-                        log.info("Processando consulta GitHub")
-                        response = self.process_github_query(user_input)
-                    else:
-                        # Get response from assistant (método padrão)
-                        log.debug("Enviando mensagem para o assistente")
-                        response = self.openai_client.send_message(user_input)
+                    if self.is_new_conversation(user_input):
+                        self.openai_client.new_conversation()
+                        self.audio_handler.speak("Certo, começando uma nova conversa.")
+                        continue
                     
-                    # Speak the response
-                    self.audio_handler.speak(response)
+                    # Mostra e fala a resposta à medida que ela chega
+                    self._speak_stream(self._response_stream(user_input))
                     
                 except KeyboardInterrupt:
                     log.warning("Interrupção de teclado durante a conversa")
@@ -212,6 +313,7 @@ class JarvisInterface:
         
         finally:
             # Limpar recursos ao sair
+            log.info(self.openai_client.cache.summary())
             self.audio_handler.cleanup()
             print("Jarvis encerrado.")
     
@@ -6,17 +6,30 @@ e interface do usuário para criar um assistente de voz completo.
 """
 
 import argparse
+import asyncio
 import os
 import sys
 import atexit
 import traceback
+
+# O perfil de importação precisa ser instalado antes das demais importações
+from lazy_import import ImportProfiler
+if "--startup-profile" in sys.argv:
+    ImportProfiler.install()
+
 from dotenv import load_dotenv
 
-# Importações de módulos locais
+# Importações de módulos locais (dependências pesadas são carregadas sob demanda)
 from audio_handler import AudioHandler
 from openai_client import OpenAIClient
+from github_retriever import GitHubRetriever
+from startup import StartupOrchestrator
+from batch_images import analyze_batch, expand_image_paths, is_batch_spec
+from cache_manager import CacheManager
 from interface import JarvisInterface
 from log_manager import LogManager
+from transport import HttpTransport
+from usage_tracker import BudgetExceeded, UsageTracker
 
 # Inicializa o logger global
 log = LogManager().logger
@@ -24,8 +37,78 @@ log = LogManager().logger
 def cleanup_resources():
     """Limpa recursos antes de encerrar o programa."""
     log.info("Realizando limpeza de recursos antes de encerrar")
+    # Respostas ainda na fila de gravação do cache
+    flushed = CacheManager.flush_all()
+    if flushed:
+        log.info(f"{flushed} entradas pendentes gravadas no cache")
+    transport = HttpTransport.active()
+    if transport:
+        log.info(transport.stats.summary())
+    usage = UsageTracker.active()
+    if usage:
+        log.info(usage.session_summary())
     # Qualquer limpeza adicional pode ser adicionada aqui
 
+def print_startup_profile():
+    """Exibe o perfil de importação, se --startup-profile foi informado."""
+    profiler = ImportProfiler.installed()
+    if profiler:
+        print(profiler.report(), file=sys.stderr)
+
+def run_batch(args):
+    """
+    Analisa em lote as imagens de um diretório ou padrão glob, sem áudio,
+    assistente ou thread.
+    
+    Args:
+        args: Argumentos de linha de comando já processados
+    """
+    image_paths = expand_image_paths(args.image)
+    if not image_paths:
+        log.error(f"Nenhuma imagem encontrada em: {args.image}")
+        sys.exit(1)
+    
+    log.info(f"Modo de análise em lote: {args.image}")
+    try:
+        analyze_batch(image_paths, concurrency=args.concurrency, output=args.output)
+    except BudgetExceeded as e:
+        log.error(f"Análise em lote recusada: {e}")
+        sys.exit(1)
+
+async def run_async(args):
+    """
+    Executa o Jarvis sobre asyncio, com o cliente AsyncOpenAI.
+    
+    Args:
+        args: Argumentos de linha de comando já processados
+    """
+    # Importação tardia: o modo assíncrono é opcional
+    from async_openai_client import AsyncOpenAIClient
+    from async_interface import AsyncJarvisInterface
+    
+    # Assistente, thread e áudio inicializam em paralelo; o GitHub termina em
+    # segundo plano e é aguardado só no primeiro uso
+    startup = StartupOrchestrator()
+    github_future = startup.add("github", GitHubRetriever)
+    log.debug("Inicializando cliente OpenAI assíncrono")
+    openai_client = AsyncOpenAIClient(github_retriever=github_future)
+    audio_handler, _ = await asyncio.gather(
+        asyncio.to_thread(AudioHandler, openai_client.get_raw_client(), text_only=args.text),
+        openai_client.start()
+    )
+    startup.shutdown()
+    
+    interface = AsyncJarvisInterface(openai_client, audio_handler)
+    print_startup_profile()
+    log.info("Jarvis está pronto.")
+    
+    if args.image:
+        log.info(f"Modo de análise de imagem: {args.image}")
+        await interface.analyze_image(args.image)
+    else:
+        log.info(f"Iniciando conversa no modo: {'texto' if args.text else 'voz'}")
+        await interface.run_conversation(with_voice=not args.text)
+
 def main():
     """Função principal do programa Jarvis."""
     # Registra função de limpeza para ser executada na saída
@@ -35,8 +118,13 @@ def main():
     
     parser = argparse.ArgumentParser(description="Jarvis - Assistente pessoal inteligente")
     parser.add_argument("--text", action="store_true", help="Executar em modo somente texto (sem saída de voz)")
-    parser.add_argument("--image", type=str, help="Caminho para uma imagem para análise")
+    parser.add_argument("--image", type=str, help="Imagem para análise, ou diretório/padrão glob para análise em lote")
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("JARVIS_BATCH_CONCURRENCY", "4")), help="Análises simultâneas no modo em lote")
+    parser.add_argument("--output", type=str, help="Arquivo JSONL para os resultados do modo em lote (padrão: terminal)")
     parser.add_argument("--debug", action="store_true", help="Ativar modo de depuração com logs detalhados")
+    parser.add_argument("--fast", action="store_true", help="Modo rápido: chat completions em streaming, sem threads da API Assistants")
+    parser.add_argument("--async", dest="async_mode", action="store_true", help="Usar o motor de conversação assíncrono (asyncio)")
+    parser.add_argument("--startup-profile", action="store_true", help="Exibir o tempo de importação de cada componente na inicialização")
     args = parser.parse_args()
     
     # Configurar nível de log com base nos argumentos
@@ -65,13 +153,37 @@ def main():
         sys.exit(1)
     
     try:
-        # Inicializar cliente OpenAI
+        if args.image and is_batch_spec(args.image):
+            run_batch(args)
+            return
+        
+        if args.async_mode:
+            log.info("Usando motor de conversação assíncrono")
+            asyncio.run(run_async(args))
+            return
+        
+        # Inicializar componentes em paralelo: GitHub, assistente, thread e áudio
+        startup = StartupOrchestrator()
+        github_future = startup.add("github", GitHubRetriever)
+        
         log.debug("Inicializando cliente OpenAI")
-        openai_client = OpenAIClient()
+        openai_client = OpenAIClient(
+            backend="chat" if args.fast else "assistants",
+            github_retriever=github_future,
+            connect=False
+        )
+        startup.add("assistant", openai_client.connect_assistant)
+        startup.add("thread", openai_client.connect_thread)
         
-        # Inicializar manipulador de áudio
         log.debug("Inicializando manipulador de áudio")
-        audio_handler = AudioHandler(openai_client.get_raw_client(), text_only=args.text)
+        startup.add("audio", AudioHandler, openai_client.get_raw_client(), text_only=args.text)
+        
+        # A conversa começa assim que os componentes mínimos estiverem prontos;
+        # o GitHub termina em segundo plano e é aguardado só no primeiro uso
+        audio_handler = startup.wait_for("assistant", "thread", "audio")["audio"]
+        startup.report()
+        startup.shutdown()
+        print_startup_profile()
         
         # Inicializar interface do usuário
         log.debug("Inicializando interface do usuário")
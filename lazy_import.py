@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# filepath: /home/comunikime/code/jarvis/lazy_import.py
+"""
+Módulo para importação tardia das dependências pesadas do Jarvis (pygame,
+speech_recognition, openai, PyGithub) e para o perfil de tempo de
+importação exibido por --startup-profile.
+"""
+
+import importlib
+import importlib.abc
+import importlib.util
+import sys
+import threading
+import time
+import types
+from typing import Dict, List, Optional, Tuple
+
+# Módulos medidos pelo perfil: componentes do Jarvis e dependências pesadas
+PROFILED_MODULES = {
+    "log_manager", "cache_manager", "run_monitor", "github_retriever",
+    "github_commands", "openai_client", "audio_handler", "interface",
+    "startup", "async_openai_client", "async_interface", "image_pipeline",
+    "image_uploads", "batch_images", "rate_limiter", "transport",
+    "usage_tracker", "thread_context", "response_cache",
+    "prompt_normalizer", "near_duplicate_cache", "cache_backends",
+    "cache_janitor", "cache_writer",
+    "dotenv", "openai", "httpx", "pygame", "speech_recognition", "github", "PIL",
+}
+
+class LazyModule(types.ModuleType):
+    """Módulo importado apenas no primeiro acesso a um de seus atributos."""
+
+    def __init__(self, name: str):
+        """
+        Registra o módulo sem importá-lo.
+
+        Args:
+            name: Nome completo do módulo (ex: "speech_recognition")
+        """
+        super().__init__(name)
+        self._lazy_name = name
+        self._lazy_module = None
+        self._lazy_lock = threading.Lock()
+
+    def _load(self) -> types.ModuleType:
+        """Importa o módulo real, uma única vez mesmo entre threads."""
+        if self._lazy_module is None:
+            with self._lazy_lock:
+                if self._lazy_module is None:
+                    self._lazy_module = importlib.import_module(self._lazy_name)
+        return self._lazy_module
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+def lazy_import(name: str) -> LazyModule:
+    """
+    Cria um módulo de importação tardia.
+
+    Args:
+        name: Nome completo do módulo
+
+    Returns:
+        LazyModule: Substituto que importa o módulo no primeiro uso
+    """
+    return LazyModule(name)
+
+class _TimedLoader(importlib.abc.Loader):
+    """Carregador que mede o tempo de criação e execução de um módulo."""
+
+    def __init__(self, loader, profiler: "ImportProfiler", name: str):
+        self.loader = loader
+        self.profiler = profiler
+        self.name = name
+
+    def __getattr__(self, attr):
+        # get_data, is_package, get_resource_reader etc. vêm do carregador real
+        return getattr(self.loader, attr)
+
+    def create_module(self, spec):
+        start = time.perf_counter()
+        try:
+            return self.loader.create_module(spec)
+        finally:
+            self.profiler.add(self.name, time.perf_counter() - start, start)
+
+    def exec_module(self, module):
+        start = time.perf_counter()
+        try:
+            self.loader.exec_module(module)
+        finally:
+            self.profiler.add(self.name, time.perf_counter() - start, start)
+
+class ImportProfiler(importlib.abc.MetaPathFinder):
+    """
+    Mede o tempo de importação dos módulos do Jarvis, como -X importtime,
+    mas restrito a PROFILED_MODULES. Os tempos são cumulativos: incluem os
+    submódulos importados por cada módulo.
+    """
+
+    _installed: Optional["ImportProfiler"] = None
+
+    def __init__(self):
+        self.timings: Dict[str, Tuple[float, float]] = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def install(cls) -> "ImportProfiler":
+        """
+        Instala o perfilador no início de sys.meta_path (apenas uma vez).
+
+        Returns:
+            ImportProfiler: Perfilador instalado
+        """
+        if cls._installed is None:
+            cls._installed = cls()
+            sys.meta_path.insert(0, cls._installed)
+        return cls._installed
+
+    @classmethod
+    def installed(cls) -> Optional["ImportProfiler"]:
+        """Retorna o perfilador instalado, se houver."""
+        return cls._installed
+
+    def find_spec(self, fullname, path, target=None):
+        if fullname not in PROFILED_MODULES or getattr(self._local, "searching", False):
+            return None
+        # Delega a busca aos demais finders, evitando recursão neste
+        self._local.searching = True
+        try:
+            spec = importlib.util.find_spec(fullname)
+        finally:
+            self._local.searching = False
+        if spec is None or spec.loader is None:
+            return None
+        spec.loader = _TimedLoader(spec.loader, self, fullname)
+        return spec
+
+    def add(self, name: str, seconds: float, start: float) -> None:
+        """
+        Acumula o tempo gasto importando um módulo.
+
+        Args:
+            name: Nome do módulo
+            seconds: Tempo gasto
+            start: Instante de início (perf_counter), para ordenação
+        """
+        with self._lock:
+            total, first = self.timings.get(name, (0.0, start))
+            self.timings[name] = (total + seconds, min(first, start))
+
+    def report(self) -> str:
+        """
+        Formata o perfil de importação em ordem de carregamento.
+
+        Returns:
+            str: Tabela com o tempo de importação de cada módulo
+        """
+        with self._lock:
+            rows: List[Tuple[float, str, float]] = [
+                (first, name, total) for name, (total, first) in self.timings.items()
+            ]
+        lines = ["Perfil de importação (ms, cumulativo):"]
+        for _, name, total in sorted(rows):
+            lines.append(f"  {total * 1000:9.1f}  {name}")
+        pending = sorted(
+            name for name in PROFILED_MODULES
+            if name not in self.timings and name not in sys.modules
+        )
+        if pending:
+            lines.append(f"  não carregados: {', '.join(pending)}")
+        return "\n".join(lines)
@@ -0,0 +1,454 @@
+#!/usr/bin/env python3
+# filepath: /home/comunikime/code/jarvis/near_duplicate_cache.py
+"""
+Módulo com o índice aproximado do cache de respostas: assinaturas MinHash
+(one permutation hashing com densificação) das perguntas normalizadas e um
+índice LSH por faixas, para encontrar localmente, sem API de embeddings,
+uma pergunta já respondida parecida o bastante com a atual.
+"""
+
+import base64
+import json
+import os
+import re
+import sys
+import threading
+import time
+import zlib
+from array import array
+from typing import Dict, List, Optional, Tuple, Union
+
+from log_manager import LogManager
+
+# Configura o logger
+log = LogManager().logger
+
+# Hash universal (a·x + b) mod p aplicado uma única vez a cada shingle
+_PRIME = (1 << 61) - 1
+_HASH_A = 0x5DEECE66D1F3B7
+_HASH_B = 0x2F6B3A9C1D4E
+# Deslocamento somado aos valores emprestados por bins vazios
+_DENSIFY_OFFSET = 0x9E3779B1
+
+_MAX_VALUE = (1 << 32) - 1
+
+# Perguntas com menos shingles que isso geram assinaturas pouco confiáveis
+_MIN_SHINGLES = 8
+
+# Em perguntas curtas a estimativa MinHash erra para mais: candidatos com
+# estimativa até essa margem abaixo do limiar têm a similaridade exata
+# calculada, e só ela decide o acerto
+_CANDIDATE_MARGIN = 0.15
+
+# Tokens que mudam a resposta por inteiro ("2 + 2" e "2 * 3", "c++" e
+# "c#"): precisam ser idênticos, na mesma ordem, para um acerto
+_EXACT_TOKEN = re.compile(r"[\d+\-*/#%]")
+
+
+def _encode_signature(signature: array) -> str:
+    """Serializa uma assinatura para o arquivo do índice (little-endian, base64)."""
+    if sys.byteorder == "big":
+        signature = array("I", signature)
+        signature.byteswap()
+    return base64.b64encode(signature.tobytes()).decode("ascii")
+
+
+def _decode_signature(data: Optional[str], num_bins: int) -> Optional[array]:
+    """Recupera uma assinatura salva; None se faltar ou tiver outro tamanho."""
+    if not data:
+        return None
+    signature = array("I")
+    try:
+        signature.frombytes(base64.b64decode(data))
+    except (ValueError, TypeError):
+        return None
+    if len(signature) != num_bins:
+        return None
+    if sys.byteorder == "big":
+        signature.byteswap()
+    return signature
+
+
+def shingles(text: str) -> List[str]:
+    """
+    Extrai os shingles de uma pergunta normalizada: trigramas de
+    caracteres (robustos a variações de flexão) e as palavras inteiras.
+
+    Args:
+        text: Pergunta já normalizada
+
+    Returns:
+        List[str]: Shingles sem repetição
+    """
+    padded = f" {text} "
+    grams = {padded[i:i + 3] for i in range(len(padded) - 2)}
+    grams.update(f"w:{word}" for word in text.split())
+    return list(grams)
+
+
+def exact_tokens(text: str) -> Tuple[str, ...]:
+    """
+    Extrai os números e operadores de uma pergunta normalizada.
+
+    Args:
+        text: Pergunta já normalizada
+
+    Returns:
+        Tuple[str, ...]: Tokens com dígitos ou símbolos, na ordem do texto
+    """
+    return tuple(token for token in text.split() if _EXACT_TOKEN.search(token))
+
+
+def jaccard(a: str, b: str) -> float:
+    """
+    Similaridade de Jaccard exata entre os shingles de duas perguntas.
+
+    Args:
+        a: Pergunta normalizada
+        b: Pergunta normalizada
+
+    Returns:
+        float: Entre 0 e 1
+    """
+    first, second = set(shingles(a)), set(shingles(b))
+    if not first and not second:
+        return 1.0
+    return len(first & second) / len(first | second)
+
+
+class _Entries:
+    """Entradas do índice em listas paralelas e os buckets do LSH que as apontam."""
+
+    def __init__(self):
+        self.signatures: List[array] = []
+        self.namespaces: List[str] = []
+        self.payloads: List[str] = []
+        # Texto de cada entrada, para conferir a similaridade exata
+        self.texts: List[str] = []
+        self.created: List[float] = []
+        # Quase todo bucket tem uma só entrada: guarda o número dela e só
+        # vira lista na primeira colisão
+        self.buckets: Dict[int, Union[int, List[int]]] = {}
+
+    def __len__(self) -> int:
+        return len(self.payloads)
+
+    def add(self, namespace: str, text: str, payload: str, created: float, signature: array,
+            band_keys: List[int]) -> None:
+        entry = len(self.payloads)
+        self.signatures.append(signature)
+        self.namespaces.append(sys.intern(namespace))
+        self.payloads.append(payload)
+        self.texts.append(text)
+        self.created.append(created)
+        for key in band_keys:
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                self.buckets[key] = entry
+            elif isinstance(bucket, int):
+                self.buckets[key] = [bucket, entry]
+            else:
+                bucket.append(entry)
+
+    def copy_from(self, other: "_Entries", entry: int, band_keys: List[int]) -> None:
+        self.add(other.namespaces[entry], other.texts[entry], other.payloads[entry],
+                 other.created[entry], other.signatures[entry], band_keys)
+
+    def record(self, entry: int) -> Dict:
+        return {"ns": self.namespaces[entry], "text": self.texts[entry],
+                "payload": self.payloads[entry], "created": self.created[entry],
+                "sig": _encode_signature(self.signatures[entry])}
+
+
+class NearDuplicateIndex:
+    """Índice MinHash/LSH das perguntas cacheadas, separado por namespace."""
+
+    def __init__(self, path: Optional[str] = None, threshold: Optional[float] = None,
+                 num_bins: int = 128, bands: int = 16, max_age_seconds: Optional[float] = None,
+                 max_entries: Optional[int] = None):
+        """
+        Inicializa o índice. As entradas persistidas são recarregadas em uma
+        thread daemon; até o fim da carga, lookup() não encontra nada.
+
+        Args:
+            path: Arquivo JSONL onde as entradas são acrescentadas (None
+                mantém o índice só em memória)
+            threshold: Similaridade de Jaccard mínima para um acerto
+                (padrão: JARVIS_CACHE_SIMILARITY ou 0.85)
+            num_bins: Tamanho da assinatura MinHash
+            bands: Faixas do LSH (num_bins deve ser múltiplo de bands)
+            max_age_seconds: Entradas mais antigas são descartadas ao carregar
+                e por prune()
+            max_entries: Entradas mantidas por prune(), as mais recentes
+                (padrão: JARVIS_CACHE_NEAR_MAX_ENTRIES ou 20000)
+        """
+        if num_bins % bands:
+            raise ValueError("num_bins deve ser múltiplo de bands")
+        if threshold is None:
+            threshold = float(os.getenv("JARVIS_CACHE_SIMILARITY", "0.85"))
+        if max_entries is None:
+            max_entries = int(os.getenv("JARVIS_CACHE_NEAR_MAX_ENTRIES", "20000"))
+        self.threshold = threshold
+        self.num_bins = num_bins
+        self.bands = bands
+        self.rows = num_bins // bands
+        self.path = path
+        self.max_age = max_age_seconds
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        # Serializa os acréscimos ao arquivo e sua reescrita em prune()
+        self._file_lock = threading.Lock()
+        self._entries = _Entries()
+        self._loaded = threading.Event()
+        try:
+            # Só o que já estava no arquivo é carregado: o que add() acrescentar
+            # durante a carga já está na memória
+            size = os.path.getsize(path) if path else 0
+        except OSError:
+            size = 0
+        if size:
+            threading.Thread(target=self._load, args=(size,), name="jarvis-near-index", daemon=True).start()
+        else:
+            self._loaded.set()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def wait_loaded(self, timeout: Optional[float] = None) -> bool:
+        """
+        Espera o fim da carga das entradas persistidas.
+
+        Args:
+            timeout: Espera máxima, em segundos (None espera sem limite)
+
+        Returns:
+            bool: True se a carga terminou
+        """
+        return self._loaded.wait(timeout)
+
+    def signature(self, text: str) -> Optional[array]:
+        """
+        Calcula a assinatura MinHash de uma pergunta com um único hash por
+        shingle: o hash escolhe o bin e o restante dele é o valor mínimo
+        disputado no bin. Bins vazios emprestam o valor do próximo bin
+        preenchido (densificação por rotação).
+
+        Args:
+            text: Pergunta já normalizada
+
+        Returns:
+            Optional[array]: Assinatura de num_bins inteiros de 32 bits, ou
+            None se a pergunta for curta demais
+        """
+        grams = shingles(text)
+        if len(grams) < _MIN_SHINGLES:
+            return None
+
+        k = self.num_bins
+        bins = [-1] * k
+        for gram in grams:
+            h = (_HASH_A * zlib.crc32(gram.encode()) + _HASH_B) % _PRIME
+            index, value = h % k, (h // k) & _MAX_VALUE
+            if bins[index] < 0 or value < bins[index]:
+                bins[index] = value
+
+        for i in range(k):
+            if bins[i] < 0:
+                for distance in range(1, k):
+                    donor = bins[(i + distance) % k]
+                    if donor >= 0:
+                        bins[i] = (donor + distance * _DENSIFY_OFFSET) & _MAX_VALUE
+                        break
+        return array("I", bins)
+
+    def _band_keys(self, namespace: str, signature: array) -> List[int]:
+        # Bins vizinhos compartilham valores emprestados pela densificação:
+        # cada faixa pega bins espaçados para que suas linhas sejam independentes
+        return [
+            hash((namespace, band, tuple(signature[band::self.bands])))
+            for band in range(self.bands)
+        ]
+
+    def similarity(self, a: array, b: array) -> float:
+        """
+        Estima a similaridade de Jaccard pela fração de bins iguais.
+
+        Args:
+            a: Assinatura
+            b: Assinatura
+
+        Returns:
+            float: Entre 0 e 1
+        """
+        return sum(x == y for x, y in zip(a, b)) / self.num_bins
+
+    def add(self, namespace: str, text: str, payload: str) -> bool:
+        """
+        Indexa uma pergunta respondida.
+
+        Args:
+            namespace: Escopo da entrada (só perguntas do mesmo namespace se
+                encontram)
+            text: Pergunta normalizada
+            payload: Dado devolvido no acerto (ex: a chave exata do cache)
+
+        Returns:
+            bool: False se a pergunta for curta demais para ser indexada
+        """
+        signature = self.signature(text)
+        if signature is None:
+            return False
+        created = time.time()
+        band_keys = self._band_keys(namespace, signature)
+        with self._lock:
+            self._entries.add(namespace, text, payload, created, signature, band_keys)
+        if self.path:
+            self._append({"ns": namespace, "text": text, "payload": payload, "created": created,
+                          "sig": _encode_signature(signature)})
+        return True
+
+    def lookup(self, namespace: str, text: str) -> Optional[Tuple[str, float]]:
+        """
+        Procura a pergunta indexada mais parecida no mesmo namespace.
+
+        A assinatura só seleciona os candidatos: o acerto exige a
+        similaridade de Jaccard exata acima do limiar e os mesmos números e
+        operadores da pergunta.
+
+        Args:
+            namespace: Escopo da consulta
+            text: Pergunta normalizada
+
+        Returns:
+            Optional[Tuple[str, float]]: Payload e similaridade exata do
+            melhor candidato acima do limiar, ou None
+        """
+        if not self._loaded.is_set():
+            return None
+        signature = self.signature(text)
+        if signature is None:
+            return None
+        required = exact_tokens(text)
+        with self._lock:
+            entries = self._entries
+            candidates = set()
+            for key in self._band_keys(namespace, signature):
+                bucket = entries.buckets.get(key)
+                if isinstance(bucket, int):
+                    candidates.add(bucket)
+                elif bucket:
+                    candidates.update(bucket)
+            shortlist = [
+                (entries.payloads[entry], entries.texts[entry]) for entry in candidates
+                if entries.namespaces[entry] == namespace
+                and self.similarity(signature, entries.signatures[entry]) >= self.threshold - _CANDIDATE_MARGIN
+            ]
+        best, best_score = None, self.threshold
+        for payload, stored in shortlist:
+            if exact_tokens(stored) != required:
+                continue
+            score = jaccard(text, stored)
+            if score >= best_score:
+                best, best_score = payload, score
+        if best is None:
+            return None
+        return best, best_score
+
+    def prune(self) -> int:
+        """
+        Descarta as entradas mais antigas que max_age e as que passam de
+        max_entries, reescrevendo o arquivo. O índice novo é montado fora do
+        lock (as assinaturas são reaproveitadas), para não travar as buscas.
+
+        Returns:
+            int: Número de entradas descartadas
+        """
+        self._loaded.wait()
+        oldest = time.time() - self.max_age if self.max_age else 0
+        with self._file_lock:
+            with self._lock:
+                current = self._entries
+                count = len(current)
+            # As entradas estão em ordem de criação: as mantidas são um sufixo
+            keep = [entry for entry in range(count) if current.created[entry] >= oldest]
+            keep = keep[-self.max_entries:] if self.max_entries else keep
+            dropped = count - len(keep)
+            if not dropped:
+                return 0
+
+            fresh = _Entries()
+            for entry in keep:
+                fresh.copy_from(current, entry, self._band_keys(current.namespaces[entry], current.signatures[entry]))
+            with self._lock:
+                # Entradas acrescentadas enquanto o índice novo era montado
+                for entry in range(count, len(current)):
+                    fresh.copy_from(current, entry,
+                                    self._band_keys(current.namespaces[entry], current.signatures[entry]))
+                self._entries = fresh
+
+            if self.path:
+                try:
+                    with open(self.path, "w", encoding="utf-8") as fp:
+                        fp.writelines(json.dumps(fresh.record(entry), ensure_ascii=False) + "\n"
+                                      for entry in range(len(fresh)))
+                except OSError as e:
+                    log.error(f"Erro ao compactar índice de perguntas parecidas: {e}")
+        log.info(f"Índice de perguntas parecidas: {dropped} entradas descartadas, {len(fresh)} mantidas")
+        return dropped
+
+    def _append(self, record: Dict) -> None:
+        """Acrescenta uma entrada ao arquivo do índice."""
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with self._file_lock, open(self.path, "a", encoding="utf-8") as fp:
+                fp.write(json.dumps(record, ensure_ascii=False) + "\n")
+        except OSError as e:
+            log.error(f"Erro ao salvar índice de perguntas parecidas: {e}")
+
+    def _load(self, size: int) -> None:
+        """
+        Reconstrói o índice a partir do arquivo, reaproveitando as
+        assinaturas salvas, e o troca pelo índice em memória. Entradas
+        antigas ou além de max_entries são descartadas (o arquivo é
+        compactado por prune()).
+
+        Args:
+            size: Bytes do arquivo existentes na criação do índice
+        """
+        start = time.perf_counter()
+        try:
+            with open(self.path, "rb") as fp:
+                lines = fp.read(size).decode("utf-8", errors="replace").splitlines()
+        except OSError as e:
+            log.error(f"Erro ao carregar índice de perguntas parecidas: {e}")
+            self._loaded.set()
+            return
+
+        oldest = time.time() - self.max_age if self.max_age else 0
+        if self.max_entries:
+            # As linhas estão em ordem de criação: só as mais recentes ficam
+            lines = lines[-self.max_entries:]
+        loaded = _Entries()
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record.get("created", 0) < oldest:
+                continue
+            # Entradas gravadas antes das assinaturas irem para o arquivo
+            signature = _decode_signature(record.get("sig"), self.num_bins) or self.signature(record["text"])
+            if signature is None:
+                continue
+            loaded.add(record["ns"], record["text"], record["payload"], record.get("created", 0),
+                       signature, self._band_keys(record["ns"], signature))
+
+        with self._lock:
+            # Entradas acrescentadas durante a carga vêm depois das do arquivo
+            current = self._entries
+            for entry in range(len(current)):
+                loaded.copy_from(current, entry, self._band_keys(current.namespaces[entry], current.signatures[entry]))
+            self._entries = loaded
+        self._loaded.set()
+        log.debug(f"Índice de perguntas parecidas: {len(loaded)} entradas em {time.perf_counter() - start:.2f}s")
@@ -5,22 +5,59 @@ Módulo para interação com a API OpenAI, gerenciando assistentes e threads
 de conversação para o assistente Jarvis.
 """
 
-import base64
+import hashlib
 import json
 import os
+import threading
 import time
-from typing import Optional, Dict, Any, Union, Tuple, List
-
-from openai import OpenAI
+from concurrent.futures import Future
+from typing import Optional, Dict, Any, Union, Tuple, List, Iterator, Generator
 
 # Importações locais
-from cache_manager import CacheManager
 from log_manager import LogManager
+from lazy_import import lazy_import
 from github_retriever import GitHubRetriever
+from github_commands import GitHubCommands
+from image_pipeline import prepare_image
+from image_uploads import ImageUploadCache
+from run_monitor import PollSchedule, LatencyHistogram, RunTimer
+from rate_limiter import RequestScheduler, estimate_tokens
+from response_cache import ResponseCache
+from transport import HttpTransport
+from thread_context import ThreadContextManager
+from usage_tracker import BudgetExceeded, UsageTracker
 
 # Configura o logger
 log = LogManager().logger
 
+# O SDK da OpenAI é carregado na criação do primeiro cliente
+openai = lazy_import("openai")
+
+# Eventos do fluxo de uma run que indicam término sem sucesso
+_RUN_FAILURE_EVENTS = ("thread.run.failed", "thread.run.cancelled", "thread.run.expired")
+
+# Status de uma run que ainda ocupa a thread (novas mensagens são recusadas)
+_ACTIVE_RUN_STATUSES = ("queued", "in_progress", "requires_action", "cancelling")
+
+
+# Nome e modelo do assistente gerenciado pelo Jarvis
+_ASSISTANT_NAME = "Jarvis"
+_ASSISTANT_MODEL = "gpt-4o"  # visão já é nativa do modelo
+
+# Idade máxima de uma thread pré-criada no pool (threads inativas expiram)
+_THREAD_POOL_MAX_AGE = 30 * 24 * 3600
+
+# Máximo de mensagens pedidas ao buscar as posteriores à última vista
+_MESSAGES_AFTER_LIMIT = 5
+
+# Trocas de thread por compactação de contexto mantidas nos metadados
+_ROLLOVER_HISTORY = 50
+
+
+class RunError(Exception):
+    """Erro de execução de uma run do assistente (falha, cancelamento ou expiração)."""
+
+
 # ================= ASSISTANT / THREAD POOL =================
 _ASSISTANTS_FILE = os.path.expanduser("~/.jarvis/assistants.json")
 os.makedirs(os.path.dirname(_ASSISTANTS_FILE), exist_ok=True)
@@ -45,134 +82,941 @@ def _save_meta(meta):
     except OSError as e:
         log.error(f"Erro ao salvar metadados de assistentes: {e}")
 
+def build_instructions(github_retriever) -> str:
+    """
+    Monta as instruções do assistente Jarvis.
+    
+    Args:
+        github_retriever: Integração GitHub usada para incluir o repositório
+        
+    Returns:
+        str: Instruções do assistente
+    """
+    # Base de instruções para o assistente
+    instructions = (
+        "Você é Jarvis, um assistente pessoal inteligente e conciso. "
+        "Pode descrever imagens e responder por voz."
+    )
+        
+    # Adicionar instruções de pair programming se o GitHub estiver configurado
+    if github_retriever.is_enabled():
+        instructions += (
+            "\n\nVocê também atua como parceiro de programação (pair programming), "
+            "ajudando a analisar, revisar e escrever código. "
+            "Você tem acesso ao repositório GitHub do usuário e pode consultar "
+            "arquivos específicos quando solicitado. "
+            "Quando o usuário pedir para analisar código, pergunte qual arquivo "
+            "ou diretório deseja examinar. "
+            "Quando o usuário perguntar sobre acesso ao GitHub, sempre confirme "
+            f"que você tem acesso ao repositório: {github_retriever.repo_owner}/{github_retriever.repo_name}."
+        )
+    
+    return instructions
+
+def build_message_content(content, image_path=None, uploads=None) -> List[Dict[str, Any]]:
+    """
+    Monta a lista de partes (texto e imagem) da mensagem do usuário.
+
+    Args:
+        content: Texto da mensagem
+        image_path: Caminho opcional para uma imagem
+        uploads: Cache de uploads (ImageUploadCache) para referenciar a
+            imagem por file_id; sem ele a imagem vai em base64
+
+    Returns:
+        List[Dict[str, Any]]: Partes da mensagem no formato da API
+
+    Raises:
+        RunError: Se a imagem não existir ou nenhum conteúdo for fornecido
+    """
+    message_content = []
+
+    # Add text content if provided
+    if isinstance(content, str) and content.strip():
+        message_content.append({"type": "text", "text": content})
+
+    # Add image if provided
+    if image_path:
+        if not os.path.exists(image_path):
+            log.error(f"Arquivo de imagem não encontrado: {image_path}")
+            raise RunError(f"Arquivo de imagem não encontrado: {image_path}")
+
+        log.info(f"Processando imagem: {image_path}")
+        detail = os.getenv("JARVIS_IMAGE_DETAIL", "auto").lower()
+        part = None
+        try:
+            if uploads is not None:
+                try:
+                    part = uploads.image_part(image_path, detail=detail)
+                except ValueError:
+                    raise
+                except Exception as e:
+                    log.warning(f"Falha no upload da imagem, enviando em base64: {e}")
+            if part is None:
+                image = prepare_image(image_path, detail=detail)
+                part = {
+                    "type": "image_url",
+                    "image_url": {
+                        "url": image.data_url(),
+                        "detail": image.detail
+                    }
+                }
+        except ValueError as e:
+            log.error(str(e))
+            raise RunError(str(e))
+
+        message_content.append(part)
+
+    # If no content was added, return error
+    if not message_content:
+        log.error("Nenhum conteúdo fornecido")
+        raise RunError("Nenhum conteúdo fornecido")
+
+    return message_content
+
+# ================= MESSAGE STORE =================
+_MESSAGES_FILE = os.path.expanduser("~/.jarvis/messages.json")
+
+class MessageStore:
+    """Guarda localmente o ID da última mensagem vista em cada thread."""
+
+    def __init__(self, path: str = _MESSAGES_FILE):
+        self.path = path
+        self.last_seen: Dict[str, str] = {}
+        try:
+            with open(self.path) as fp:
+                self.last_seen = json.load(fp)
+        except FileNotFoundError:
+            pass
+        except (json.JSONDecodeError, OSError) as e:
+            log.error(f"Erro ao carregar índice de mensagens: {e}")
+        log.debug("MessageStore inicializado")
+
+    def last_message_id(self, thread_id: str) -> Optional[str]:
+        """
+        Retorna o ID da última mensagem vista na thread.
+        
+        Args:
+            thread_id: ID da thread
+            
+        Returns:
+            Optional[str]: ID da mensagem ou None se a thread for desconhecida
+        """
+        return self.last_seen.get(thread_id)
+
+    def remember(self, thread_id: str, message_id: str) -> None:
+        """
+        Registra uma mensagem como a última vista na thread.
+        
+        Args:
+            thread_id: ID da thread
+            message_id: ID da mensagem
+        """
+        if self.last_seen.get(thread_id) == message_id:
+            return
+        self.last_seen[thread_id] = message_id
+        try:
+            with open(self.path, "w") as fp:
+                json.dump(self.last_seen, fp, indent=2)
+        except OSError as e:
+            log.error(f"Erro ao salvar índice de mensagens: {e}")
+
+def instructions_fingerprint(instructions: str, model: str) -> str:
+    """
+    Calcula o hash que identifica uma configuração de assistente.
+    
+    Args:
+        instructions: Instruções do assistente
+        model: Modelo do assistente
+        
+    Returns:
+        str: Hash hexadecimal das instruções e do modelo
+    """
+    data = json.dumps({"instructions": instructions, "model": model}, sort_keys=True)
+    return hashlib.sha256(data.encode()).hexdigest()[:16]
+
 class AssistantManager:
     """Gerencia assistentes e threads da OpenAI, guardando IDs localmente."""
 
-    def __init__(self, client: OpenAI):
+    def __init__(self, client: "openai.OpenAI", pool_size: Optional[int] = None):
+        """
+        Inicializa o gerenciador.
+        
+        Args:
+            client: Cliente OpenAI síncrono
+            pool_size: Número de threads pré-criadas mantidas no pool
+                (padrão: JARVIS_THREAD_POOL_SIZE ou 2)
+        """
         self.client = client
+        self.scheduler = RequestScheduler.shared()
         self.meta = _load_meta()
-        self.cache = CacheManager(cache_dir=os.path.expanduser("~/.jarvis/cache/assistants"))
+        self._lock = threading.Lock()
+        self._refilling = set()
+        if pool_size is None:
+            pool_size = int(os.getenv("JARVIS_THREAD_POOL_SIZE", "2"))
+        self.pool_size = pool_size
         log.debug("AssistantManager inicializado")
 
-    def get(self, name: str, instructions: str) -> tuple[str, str]:
+    def cached(self, name: str) -> Dict[str, Any]:
         """
-        Obtém ou cria um assistente e thread para o nome fornecido.
+        Retorna os IDs persistidos para o nome, sem chamar a API.
         
         Args:
             name: Nome do assistente
-            instructions: Instruções para o assistente
             
         Returns:
-            tuple: (assistant_id, thread_id)
+            Dict[str, Any]: Cópia da entrada salva (vazia se não houver)
         """
-        if name in self.meta:
-            assistant_id = self.meta[name]["assistant_id"]
-            thread_id = self.meta[name]["thread_id"]
-            log.debug(f"Usando assistente e thread existentes: {assistant_id}, {thread_id}")
-            return assistant_id, thread_id
+        with self._lock:
+            return dict(self.meta.get(name, {}))
 
-        # novo assistant + thread
-        log.info(f"Criando novo assistente com nome: {name}")
-        a = self.client.beta.assistants.create(name=name, instructions=instructions, model="gpt-4o")
-        t = self.client.beta.threads.create()
-        self.meta[name] = {"assistant_id": a.id, "thread_id": t.id}
-        _save_meta(self.meta)
-        log.info(f"Assistente criado: {a.id}, Thread criado: {t.id}")
-        return a.id, t.id
-
-class OpenAIClient:
-    """Gerencia interações com a API OpenAI para o assistente Jarvis."""
-    
-    def __init__(self):
-        """Inicializa o cliente OpenAI e configura o assistente."""
-        # Verificar API key do arquivo .env
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            log.critical("OPENAI_API_KEY não encontrada no arquivo .env")
-            raise ValueError("OPENAI_API_KEY não encontrada no arquivo .env. Configure o arquivo .env com suas credenciais.")
+    def _update(self, name: str, **fields) -> None:
+        """Atualiza e persiste a entrada de um assistente."""
+        with self._lock:
+            self.meta.setdefault(name, {}).update(fields)
+            _save_meta(self.meta)
+
+    def ensure_assistant(self, name: str, instructions: str, model: str = _ASSISTANT_MODEL) -> str:
+        """
+        Garante um assistente com as instruções e modelo fornecidos.
         
-        # Inicializa o cache
-        self.cache = CacheManager(cache_dir=os.path.expanduser("~/.jarvis/cache/openai"))
-        log.debug("Cache inicializado")
+        Reaproveita o assistente já criado para o mesmo hash de instruções e
+        modelo (ou o atual, se suas instruções remotas coincidirem) e só cria
+        um novo quando as instruções de fato mudaram ou ele não existe mais.
         
-        # Inicializa cliente OpenAI
-        self.client = OpenAI(api_key=api_key)
-        log.debug("Cliente OpenAI inicializado")
+        Args:
+            name: Nome do assistente
+            instructions: Instruções para o assistente
+            model: Modelo do assistente
+            
+        Returns:
+            str: ID do assistente
+        """
+        fingerprint = instructions_fingerprint(instructions, model)
+        entry = self.cached(name)
+        known = dict(entry.get("assistants", {}))
         
-        # Inicializa integração com GitHub
-        self.github_retriever = GitHubRetriever()
-        log.debug("GitHub Retriever inicializado")
+        candidates = [known.get(fingerprint), entry.get("assistant_id")]
+        for candidate in dict.fromkeys(c for c in candidates if c):
+            try:
+                remote = self.scheduler.call("background", self.client.beta.assistants.retrieve, candidate)
+            except Exception as e:
+                log.warning(f"Assistente {candidate} indisponível: {e}")
+                continue
+            if candidate == known.get(fingerprint) or (
+                remote.instructions == instructions and remote.model == model
+            ):
+                known[fingerprint] = candidate
+                self._update(name, assistant_id=candidate, fingerprint=fingerprint, assistants=known)
+                return candidate
         
-        # Configurações para gerenciamento de assistentes
-        self.assistant_manager = AssistantManager(self.client)
+        log.info(f"Criando novo assistente com nome: {name}")
+        assistant = self.scheduler.call(
+            "background", self.client.beta.assistants.create,
+            name=name, instructions=instructions, model=model
+        )
+        known[fingerprint] = assistant.id
+        self._update(name, assistant_id=assistant.id, fingerprint=fingerprint, assistants=known)
+        log.info(f"Assistente criado: {assistant.id}")
+        return assistant.id
+
+    def ensure_thread(self, name: str, thread_id: Optional[str] = None) -> str:
+        """
+        Garante que a thread exista, criando uma nova se necessário.
+        
+        Args:
+            name: Nome do assistente dono da thread
+            thread_id: ID da thread a verificar, ou None para criar uma
+            
+        Returns:
+            str: ID de uma thread válida
+        """
+        if thread_id:
+            try:
+                self.scheduler.call("background", self.client.beta.threads.retrieve, thread_id)
+                self.remember_thread(name, thread_id)
+                return thread_id
+            except Exception as e:
+                log.warning(f"Erro ao recuperar thread {thread_id}: {e}")
         
-        # Create or retrieve assistant
-        self.assistant = self._get_or_create_assistant()
+        return self.new_thread(name)
+
+    def new_thread(self, name: str) -> str:
+        """
+        Inicia uma thread nova, retirada do pool sempre que possível.
         
-        # Create a new thread or use existing one
-        thread_id = os.getenv("JARVIS_THREAD_ID")
+        Args:
+            name: Nome do assistente dono da thread
+            
+        Returns:
+            str: ID da nova thread, já persistida como a thread em uso
+        """
+        thread_id = self.take_thread(name)
         if thread_id:
+            log.info(f"Usando thread pré-criada: {thread_id}")
+        else:
+            thread_id = self.scheduler.call("interactive", self.client.beta.threads.create).id
+            log.info(f"Nova thread criada: {thread_id}")
+        self.remember_thread(name, thread_id)
+        return thread_id
+
+    def take_thread(self, name: str) -> Optional[str]:
+        """
+        Retira uma thread pré-criada do pool, sem chamar a API.
+        
+        Threads antigas demais são descartadas e o pool é reabastecido em
+        segundo plano.
+        
+        Args:
+            name: Nome do assistente dono do pool
+            
+        Returns:
+            Optional[str]: ID da thread, ou None se o pool estiver vazio
+        """
+        now = time.time()
+        with self._lock:
+            entry = self.meta.setdefault(name, {})
+            pool = [t for t in entry.get("thread_pool", []) if now - t["created"] < _THREAD_POOL_MAX_AGE]
+            thread_id = pool.pop(0)["id"] if pool else None
+            entry["thread_pool"] = pool
+            _save_meta(self.meta)
+        self.refill_threads_async(name)
+        return thread_id
+
+    def refill_threads(self, name: str) -> int:
+        """
+        Cria threads até o pool atingir o tamanho configurado.
+        
+        Args:
+            name: Nome do assistente dono do pool
+            
+        Returns:
+            int: Número de threads criadas
+        """
+        created = 0
+        while True:
+            with self._lock:
+                if len(self.meta.get(name, {}).get("thread_pool", [])) >= self.pool_size:
+                    return created
+            thread = self.scheduler.call("background", self.client.beta.threads.create)
+            with self._lock:
+                pool = self.meta.setdefault(name, {}).setdefault("thread_pool", [])
+                pool.append({"id": thread.id, "created": time.time()})
+                _save_meta(self.meta)
+            created += 1
+            log.debug(f"Thread {thread.id} adicionada ao pool")
+
+    def refill_threads_async(self, name: str) -> None:
+        """
+        Reabastece o pool em uma thread daemon (no máximo uma por nome).
+        
+        Args:
+            name: Nome do assistente dono do pool
+        """
+        with self._lock:
+            if self.pool_size <= 0 or name in self._refilling:
+                return
+            self._refilling.add(name)
+        
+        def run():
             try:
-                self.thread = self.client.beta.threads.retrieve(thread_id)
-                log.info(f"Usando thread existente: {thread_id}")
+                self.refill_threads(name)
             except Exception as e:
-                log.warning(f"Erro ao recuperar thread existente: {e}")
-                self.thread = self.client.beta.threads.create()
-                log.info(f"Nova thread criada: {self.thread.id}")
+                log.warning(f"Erro ao reabastecer pool de threads: {e}")
+            finally:
+                with self._lock:
+                    self._refilling.discard(name)
+        
+        threading.Thread(target=run, name="jarvis-thread-pool", daemon=True).start()
+
+    def record_rollover(self, name: str, old_thread: str, new_thread: str, tokens: int) -> None:
+        """
+        Registra que a conversa de uma thread continua em outra, para que
+        JARVIS_THREAD_ID apontando para a antiga siga a cadeia de trocas.
+        
+        Args:
+            name: Nome do assistente dono das threads
+            old_thread: Thread compactada
+            new_thread: Thread que a substitui
+            tokens: Tamanho estimado da thread antiga
+        """
+        with self._lock:
+            entry = self.meta.setdefault(name, {})
+            rollovers = entry.setdefault("rollovers", {})
+            rollovers[old_thread] = {"to": new_thread, "tokens": tokens, "at": time.time()}
+            for stale in sorted(rollovers, key=lambda k: rollovers[k]["at"])[:-_ROLLOVER_HISTORY]:
+                del rollovers[stale]
+            _save_meta(self.meta)
+    
+    def latest_thread(self, name: str, thread_id: str) -> str:
+        """
+        Segue a cadeia de trocas de thread até a mais recente.
+        
+        Args:
+            name: Nome do assistente dono das threads
+            thread_id: Thread de partida
+            
+        Returns:
+            str: Thread onde a conversa continua (a própria, se não houve troca)
+        """
+        rollovers = self.cached(name).get("rollovers", {})
+        seen = {thread_id}
+        while thread_id in rollovers and rollovers[thread_id]["to"] not in seen:
+            thread_id = rollovers[thread_id]["to"]
+            seen.add(thread_id)
+        return thread_id
+    
+    def remember_thread(self, name: str, thread_id: str) -> None:
+        """
+        Persiste a thread em uso para ser retomada no próximo início.
+        
+        Args:
+            name: Nome do assistente dono da thread
+            thread_id: ID da thread
+        """
+        if self.cached(name).get("thread_id") != thread_id:
+            self._update(name, thread_id=thread_id)
+
+class _StreamedRun:
+    """Estado de uma run acompanhada pelo fluxo de eventos."""
+
+    def __init__(self, histogram: LatencyHistogram):
+        self.parts: List[str] = []
+        self.run_id: Optional[str] = None
+        self.start_time = time.time()
+        self.timer = RunTimer(histogram)
+        self.done = False
+
+class AssistantSession:
+    """
+    Ciclo de vida das runs comum aos clientes síncrono e assíncrono.
+    
+    Reúne o que não depende da forma de chamar a API: integração GitHub
+    resolvida no primeiro uso, verificação do assistente e da thread, cache,
+    preparação do turno e tratamento dos eventos e status das runs. As
+    subclasses fazem as requisições (bloqueantes ou com await) e definem
+    scheduler, assistant_manager, message_store, cache, usage, context,
+    latency_histogram, image_uploads e backend.
+    """
+    
+    @property
+    def github_retriever(self) -> GitHubRetriever:
+        """Integração GitHub, aguardando sua inicialização se ainda estiver em andamento."""
+        if self._github_retriever is None:
+            source = self._github_source
+            if source is None:
+                self._github_retriever = GitHubRetriever()
+            elif isinstance(source, Future):
+                self._github_retriever = source.result()
+            else:
+                self._github_retriever = source
+            log.debug("GitHub Retriever inicializado")
+        return self._github_retriever
+    
+    @property
+    def github_commands(self) -> GitHubCommands:
+        """Comandos GitHub sobre a integração configurada."""
+        if self._github_commands is None:
+            self._github_commands = GitHubCommands(self.github_retriever)
+        return self._github_commands
+    
+    def connect_assistant(self) -> None:
+        """
+        Prepara o assistente.
+        
+        Usa o ID persistido (ou JARVIS_ASSISTANT_ID) sem chamar a API e o
+        verifica em segundo plano; só cria um assistente de forma síncrona
+        quando não há nenhum salvo.
+        """
+        cached_id = self.assistant_manager.cached(_ASSISTANT_NAME).get("assistant_id")
+        self.assistant_id = os.getenv("JARVIS_ASSISTANT_ID") or cached_id
+        if self.assistant_id:
+            log.info(f"Usando assistente {self.assistant_id} (verificação em segundo plano)")
+            self._in_background(self._verify_assistant, "assistant")
+        else:
+            self.assistant_id = self._ensure_assistant()
+    
+    def connect_thread(self) -> None:
+        """
+        Prepara a thread de conversa.
+        
+        Retoma JARVIS_THREAD_ID ou a última thread persistida sem chamar a
+        API, verificando-a em segundo plano; cria uma nova apenas quando não
+        há nenhuma salva.
+        """
+        cached_id = self.assistant_manager.cached(_ASSISTANT_NAME).get("thread_id")
+        self.thread_id = os.getenv("JARVIS_THREAD_ID") or cached_id
+        self.thread_resumed = bool(self.thread_id)
+        if self.thread_id:
+            # A conversa pode ter sido compactada em outra thread
+            self.thread_id = self.assistant_manager.latest_thread(_ASSISTANT_NAME, self.thread_id)
+            log.info(f"Usando thread existente: {self.thread_id} (verificação em segundo plano)")
+            self._in_background(self._verify_thread, "thread")
         else:
-            self.thread = self.client.beta.threads.create()
-            log.info(f"Nova thread criada: {self.thread.id}")
-            log.info(f"Configure JARVIS_THREAD_ID={self.thread.id} para manter o histórico de conversa")
+            self.thread_id = self.assistant_manager.new_thread(_ASSISTANT_NAME)
+        self.assistant_manager.refill_threads_async(_ASSISTANT_NAME)
     
-    def _get_or_create_assistant(self):
+    def _ensure_assistant(self) -> str:
         """
-        Recupera um assistente existente ou cria um novo.
+        Garante um assistente com as instruções atuais (faz chamadas à API).
         
         Returns:
-            O assistente configurado
+            str: ID do assistente
+        """
+        instructions = build_instructions(self.github_retriever)
+        return self.assistant_manager.ensure_assistant(_ASSISTANT_NAME, instructions)
+    
+    def _verify_assistant(self) -> None:
+        """Confirma o assistente em uso e o troca se as instruções mudaram."""
+        env_id = os.getenv("JARVIS_ASSISTANT_ID")
+        if env_id and env_id == self.assistant_id:
+            # Assistente fixado pelo usuário: apenas confirma que existe
+            try:
+                self.scheduler.call("background", self.assistant_manager.client.beta.assistants.retrieve, env_id)
+                return
+            except Exception as e:
+                log.warning(f"Não foi possível recuperar o assistente com ID {env_id}: {e}")
+        
+        assistant_id = self._ensure_assistant()
+        if assistant_id != self.assistant_id:
+            log.info(f"Assistente atualizado: {self.assistant_id} -> {assistant_id}")
+            self.assistant_id = assistant_id
+    
+    def _verify_thread(self) -> None:
+        """Confirma que a thread em uso existe, substituindo-a se necessário."""
+        thread_id = self.assistant_manager.ensure_thread(_ASSISTANT_NAME, self.thread_id)
+        if thread_id != self.thread_id:
+            log.info(f"Thread substituída: {self.thread_id} -> {thread_id}")
+            self.thread_id = thread_id
+    
+    def _in_background(self, target, name: str) -> None:
         """
-        assistant_id = os.getenv("JARVIS_ASSISTANT_ID")
+        Executa uma verificação em uma thread daemon, registrando falhas no log.
         
-        if assistant_id:
+        Args:
+            target: Função sem argumentos a executar
+            name: Nome curto usado no nome da thread e nos logs
+        """
+        def run():
             try:
-                log.debug(f"Tentando recuperar assistente com ID {assistant_id}")
-                return self.client.beta.assistants.retrieve(assistant_id)
+                target()
             except Exception as e:
-                log.warning(f"Não foi possível recuperar o assistente com ID {assistant_id}. Criando novo assistente. Erro: {e}")
+                log.error(f"Falha na verificação em segundo plano ({name}): {e}")
         
-        # Create a new assistant
-        log.info("Criando novo assistente")
+        threading.Thread(target=run, name=f"jarvis-verify-{name}", daemon=True).start()
+    
+    def _conversation_state(self) -> Optional[str]:
+        """
+        Marcador do estado atual da conversa, usado nas chaves de cache
+        presas ao contexto.
         
-        # Base de instruções para o assistente
-        instructions = (
-            "Você é Jarvis, um assistente pessoal inteligente e conciso. "
-            "Pode descrever imagens e responder por voz."
-        )
+        Returns:
+            Optional[str]: ID da última mensagem vista na thread
+        """
+        return self.message_store.last_message_id(self.thread_id)
+    
+    def _cache_owner(self) -> Optional[str]:
+        """Assistente (ou modelo) que produz as respostas guardadas em cache."""
+        return self.assistant_id
+    
+    def _lookup_cache(self, content, image_path=None) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """
+        Procura a resposta da mensagem no cache (análises de imagem não
+        entram no cache).
+        
+        Args:
+            content: Texto da mensagem
+            image_path: Caminho opcional da imagem enviada
+            
+        Returns:
+            Tuple: Chave de cache (None se não se aplica) e resposta guardada
+        """
+        if image_path:
+            return None, None
+        cache_key = self.cache.key(content, self._cache_owner(), self.conversation_id, self._conversation_state())
+        cached_response = self.cache.get(cache_key) if cache_key else None
+        if cached_response:
+            log.info("Usando resposta em cache")
+        return cache_key, cached_response
+    
+    def _store_response(self, cache_key: Optional[Dict[str, Any]], response: str) -> None:
+        """Guarda a resposta do turno no cache, se ele tiver chave."""
+        if cache_key:
+            self.cache.set(cache_key, response)
+            log.debug("Resposta armazenada em cache")
+    
+    def _prepare_turn(self, message_content: List[Dict[str, Any]]) -> bool:
+        """
+        Escolhe o modelo do turno e estima seus tokens.
+        
+        Args:
+            message_content: Partes da mensagem do usuário
+            
+        Returns:
+            bool: True se a thread deve ser compactada antes do turno
+        """
+        self._turn_model = self.usage.choose_model(None)
+        self._turn_tokens = estimate_tokens(" ".join(p.get("text", "") for p in message_content))
+        return self.context.needs_rollover(self.thread_id)
+    
+    def _inline_uploaded_images(self, message_content: List[Dict[str, Any]]) -> bool:
+        """
+        Troca, na própria lista, as imagens referenciadas por file_id pela
+        versão em base64 (o arquivo pode ter sido apagado no servidor).
+        
+        Args:
+            message_content: Partes da mensagem do usuário
+            
+        Returns:
+            bool: True se alguma parte foi trocada
+        """
+        replaced = False
+        for i, part in enumerate(message_content):
+            if part["type"] == "image_file" and self.image_uploads is not None:
+                inline = self.image_uploads.inline_part(part)
+                if inline is not None:
+                    log.warning(f"Arquivo {part['image_file']['file_id']} recusado, reenviando imagem em base64")
+                    message_content[i] = inline
+                    replaced = True
+        return replaced
+    
+    def _summary_seed(self, completion, old_thread: str) -> str:
+        """
+        Registra o uso do resumo de uma thread e monta a mensagem que semeia
+        a thread seguinte.
+        
+        Args:
+            completion: Resposta de chat completions com o resumo
+            old_thread: Thread resumida
+            
+        Returns:
+            str: Mensagem inicial da nova thread
+        """
+        self.usage.record_completion(completion.usage, self.context.summary_model,
+                                     kind="summary", thread_id=old_thread)
+        return self.context.seed_message(completion.choices[0].message.content or "")
+    
+    def _finish_rollover(self, old_thread: str, new_thread: str, seed: str) -> None:
+        """Passa a conversa para a thread já semeada e registra a troca."""
+        before = self.context.rolled(old_thread, new_thread, seed)
+        self.assistant_manager.record_rollover(_ASSISTANT_NAME, old_thread, new_thread, before)
+        self.thread_id = new_thread
+    
+    def _record_first_token(self, seconds: float) -> None:
+        """
+        Registra o tempo até o primeiro trecho da resposta no histograma,
+        separado por backend para permitir a comparação entre eles.
         
-        # Adicionar instruções de pair programming se o GitHub estiver configurado
-        if self.github_retriever.is_enabled():
-            instructions += (
-                "\n\nVocê também atua como parceiro de programação (pair programming), "
-                "ajudando a analisar, revisar e escrever código. "
-                "Você tem acesso ao repositório GitHub do usuário e pode consultar "
-                "arquivos específicos quando solicitado. "
-                "Quando o usuário pedir para analisar código, pergunte qual arquivo "
-                "ou diretório deseja examinar. "
-                "Quando o usuário perguntar sobre acesso ao GitHub, sempre confirme "
-                f"que você tem acesso ao repositório: {self.github_retriever.repo_owner}/{self.github_retriever.repo_name}."
+        Args:
+            seconds: Tempo decorrido desde o envio da mensagem
+        """
+        log.info(f"Tempo até o primeiro token ({self.backend}): {seconds:.2f} segundos")
+        self.latency_histogram.record(f"ttft_{self.backend}", seconds)
+        # O modo rápido (chat) não passa por RunTimer.finish(), que é quem
+        # persiste o histograma nas runs
+        self.latency_histogram.save()
+    
+    def _run_options(self) -> Dict[str, Any]:
+        """
+        Parâmetros extras das runs do turno: modelo do orçamento suave e
+        truncamento do contexto (estratégia "truncate").
+        """
+        options = self.context.run_options(self.thread_id)
+        if self._turn_model:
+            options["model"] = self._turn_model
+        return options
+    
+    def _record_run(self, run) -> None:
+        """Registra o uso de uma run terminada e o novo tamanho da thread."""
+        self.usage.record_run(run, self.thread_id)
+        self.context.observe(self.thread_id, run)
+    
+    def _on_stream_event(self, event, streamed: _StreamedRun) -> Optional[str]:
+        """
+        Trata um evento do fluxo de uma run.
+        
+        Args:
+            event: Evento recebido do fluxo
+            streamed: Estado da run acompanhada (marcado como concluído no
+                evento de conclusão)
+            
+        Returns:
+            Optional[str]: Delta de texto a produzir, se o evento trouxer um
+            
+        Raises:
+            RunError: Se a run falhar, for cancelada ou expirar
+        """
+        name = event.event
+        if name.startswith("thread.run.") and not name.startswith("thread.run.step"):
+            streamed.timer.observe(event.data.status)
+        if name == "thread.run.created":
+            streamed.run_id = self.active_run_id = event.data.id
+        elif name == "thread.message.completed":
+            self.message_store.remember(self.thread_id, event.data.id)
+        elif name == "thread.message.delta":
+            text = "".join(
+                block.text.value for block in event.data.delta.content or []
+                if block.type == "text" and block.text and block.text.value
             )
+            if text:
+                if not streamed.parts:
+                    self._record_first_token(time.time() - streamed.start_time)
+                streamed.parts.append(text)
+                return text
+        elif name == "thread.run.completed":
+            self.active_run_id = None
+            self._record_run(event.data)
+            log.info(f"Processamento concluído em {time.time() - streamed.start_time:.2f} segundos")
+            streamed.done = True
+        elif name in _RUN_FAILURE_EVENTS:
+            self.active_run_id = None
+            self._record_run(event.data)
+            log.error(f"Processamento falhou: {event.data.status}")
+            raise RunError(event.data.last_error)
+        return None
+    
+    def _stream_fallback(self, error: Exception, streamed: _StreamedRun) -> Optional[float]:
+        """
+        Decide como seguir por polling depois que o fluxo de uma run falhou.
+        
+        Args:
+            error: Erro do fluxo
+            streamed: Estado da run acompanhada
+            
+        Returns:
+            Optional[float]: None se a run já existe e basta acompanhá-la;
+            senão, segundos a aguardar antes de criá-la
+        """
+        if streamed.run_id is not None:
+            log.warning(f"Streaming interrompido, acompanhando run {streamed.run_id} por polling: {error}")
+            return None
+        if isinstance(error, openai.RateLimitError):
+            # Limite de taxa ao abrir o fluxo: aguarda e segue por polling
+            # só neste turno, com as novas tentativas do agendador
+            delay = self.scheduler.backoff(error, 1)
+        else:
+            # O fluxo não chegou a criar a run: desativa o streaming nesta sessão
+            log.warning(f"Streaming indisponível, usando polling: {error}")
+            self.run_mode = "poll"
+            delay = 0.0
+        streamed.timer = RunTimer(self.latency_histogram)
+        return delay
+    
+    def _stream_remainder(self, streamed: _StreamedRun, response: str) -> str:
+        """
+        Parte da resposta completa que o fluxo interrompido não chegou a produzir.
+        
+        Args:
+            streamed: Estado da run acompanhada
+            response: Resposta completa obtida após a run
+            
+        Returns:
+            str: Trecho restante (ou a resposta inteira, se divergir do já produzido)
+        """
+        produced = "".join(streamed.parts)
+        remainder = response[len(produced):] if response.startswith(produced) else "\n" + response
+        streamed.parts.append(remainder)
+        return remainder
+    
+    def _on_run_status(self, run_status, timer: RunTimer, start_time: float) -> bool:
+        """
+        Trata o status de uma run consultado por polling.
         
-        # Criar o assistente
-        assistant = self.client.beta.assistants.create(
-            name="Jarvis",
-            instructions=instructions,
-            model="gpt-4o"  # visão já é nativa do modelo
+        Args:
+            run_status: Run retornada pela API
+            timer: Cronômetro da run
+            start_time: Início do acompanhamento
+            
+        Returns:
+            bool: True se a run foi concluída
+            
+        Raises:
+            RunError: Se a run falhar, for cancelada ou expirar
+        """
+        timer.observe(run_status.status)
+        if run_status.status == "completed":
+            self.active_run_id = None
+            self._record_run(run_status)
+            log.info(f"Processamento concluído em {time.time() - start_time:.2f} segundos")
+            return True
+        if run_status.status in ("failed", "cancelled", "expired"):
+            self.active_run_id = None
+            self._record_run(run_status)
+            log.error(f"Processamento falhou: {run_status.status}")
+            raise RunError(run_status.last_error)
+        return False
+    
+    def _deadline_error(self, run_id: str) -> RunError:
+        """Registra no log e monta o erro de uma run que excedeu o prazo de polling."""
+        log.error(f"Run {run_id} excedeu o prazo de {self.poll_schedule.deadline:.0f} segundos")
+        return RunError(f"Tempo limite de {self.poll_schedule.deadline:.0f} segundos excedido")
+    
+    def _recent_messages_params(self) -> Tuple[Dict[str, Any], bool]:
+        """
+        Parâmetros para listar só as mensagens posteriores à última vista,
+        sem paginar o histórico, quando a run não lista mensagens.
+        
+        Returns:
+            Tuple: Parâmetros da listagem e se o resultado vem em ordem
+            crescente (e deve ser invertido)
+        """
+        last_seen = self.message_store.last_message_id(self.thread_id)
+        log.debug(f"Run sem mensagens listadas, buscando após {last_seen}")
+        if last_seen:
+            return {"order": "asc", "after": last_seen, "limit": _MESSAGES_AFTER_LIMIT}, True
+        return {"order": "desc", "limit": 1}, False
+    
+    def _response_text(self, messages) -> Optional[str]:
+        """
+        Extrai o texto da primeira mensagem do assistente, registrando-a
+        como a última vista na thread.
+        
+        Args:
+            messages: Mensagens da thread, da mais recente para a mais antiga
+            
+        Returns:
+            Optional[str]: Texto da resposta ou None se não houver
+        """
+        for message in messages:
+            if message.role == "assistant":
+                self.message_store.remember(self.thread_id, message.id)
+                for content_item in message.content:
+                    if content_item.type == "text":
+                        return content_item.text.value
+        return None
+
+class OpenAIClient(AssistantSession):
+    """Gerencia interações com a API OpenAI para o assistente Jarvis."""
+    
+    def __init__(self, backend: str = "assistants", github_retriever=None, connect: bool = True):
+        """
+        Inicializa o cliente OpenAI e configura o assistente.
+        
+        Args:
+            backend: "assistants" (threads e runs da API Assistants) ou "chat"
+                (modo rápido: histórico local e uma única requisição de
+                chat completions em streaming por turno)
+            github_retriever: GitHubRetriever já criado, ou um Future que o
+                produz (inicialização em paralelo); se None, é criado no
+                primeiro uso
+            connect: Se False, não prepara assistente e thread; nesse caso
+                connect_assistant() e connect_thread() devem ser chamados
+                antes do primeiro turno
+        """
+        # Verificar API key do arquivo .env
+        api_key = os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            log.critical("OPENAI_API_KEY não encontrada no arquivo .env")
+            raise ValueError("OPENAI_API_KEY não encontrada no arquivo .env. Configure o arquivo .env com suas credenciais.")
+        
+        # Inicializa o cache de respostas (global ou preso ao estado da conversa)
+        self.cache = ResponseCache(cache_dir=os.path.expanduser("~/.jarvis/cache/openai"))
+        log.debug("Cache inicializado")
+        
+        # Índice local da última mensagem vista por thread
+        self.message_store = MessageStore()
+        
+        # Inicializa cliente OpenAI sobre o pool de conexões compartilhado; novas
+        # tentativas e limites de taxa ficam com o agendador, alimentado pelos
+        # cabeçalhos das respostas
+        self.scheduler = RequestScheduler.shared()
+        self.client = openai.OpenAI(
+            api_key=api_key,
+            max_retries=0,
+            http_client=HttpTransport.shared().openai_http_client()
         )
+        log.debug("Cliente OpenAI inicializado")
+        
+        # Integração com GitHub (resolvida no primeiro uso)
+        self._github_source = github_retriever
+        self._github_retriever = None
+        self._github_commands = None
+        
+        # Modo de execução das runs: "stream" (eventos SSE) ou "poll" (fallback)
+        self.run_mode = os.getenv("JARVIS_RUN_MODE", "stream").lower()
+        log.debug(f"Modo de execução das runs: {self.run_mode}")
+        
+        # Agenda adaptativa de polling e histograma de latência das runs
+        self.poll_schedule = PollSchedule.from_env()
+        self.latency_histogram = LatencyHistogram()
+        
+        # Run em andamento na thread; ao encontrar uma run ativa antes de um
+        # novo turno, "cancel" a cancela e "wait" aguarda seu término
+        self.active_run_id = None
+        self._run_requested = False
+        # Estimativa de tokens do turno atual, usada pelo agendador
+        self._turn_tokens = 0
+        # Consumo de tokens e orçamentos; após o orçamento suave o turno usa
+        # um modelo mais barato no lugar do modelo do assistente
+        self.usage = UsageTracker.shared()
+        self._turn_model = None
+        # Tamanho das threads; acima do limite a conversa é compactada
+        self.context = ThreadContextManager(self.usage)
+        self.active_run_policy = os.getenv("JARVIS_ACTIVE_RUN_POLICY", "cancel").lower()
         
-        log.info(f"Novo assistente criado com ID: {assistant.id}")
-        log.info(f"Configure JARVIS_ASSISTANT_ID={assistant.id} para reutilizar este assistente")
+        # Imagens já enviadas são referenciadas por file_id (só no backend
+        # "assistants": chat completions aceita apenas base64)
+        self.image_uploads = ImageUploadCache(self.client) if backend != "chat" else None
         
-        return assistant
+        self.backend = backend
+        log.info(f"Backend de conversa: {self.backend}")
+        
+        # Configurações para gerenciamento de assistentes
+        self.assistant_manager = AssistantManager(self.client)
+        
+        self.assistant_id = None
+        self.thread_id = None
+        self.thread_resumed = False
+        if self.backend == "chat":
+            # Modo rápido: sem assistente nem thread, histórico mantido localmente
+            self.chat_model = os.getenv("JARVIS_CHAT_MODEL", "gpt-4o")
+            self.chat_instructions = None
+            self.chat_history: List[Dict[str, Any]] = []
+            self.chat_history_turns = int(os.getenv("JARVIS_CHAT_HISTORY_TURNS", "20"))
+        
+        if connect:
+            self.connect_assistant()
+            self.connect_thread()
+    
+    def connect_assistant(self) -> None:
+        """
+        Prepara o assistente (ou as instruções do modo rápido).
+        
+        Usa o ID persistido (ou JARVIS_ASSISTANT_ID) sem chamar a API e o
+        verifica em segundo plano; só cria um assistente de forma síncrona
+        quando não há nenhum salvo.
+        """
+        if self.backend == "chat":
+            self.chat_instructions = build_instructions(self.github_retriever)
+            return
+        super().connect_assistant()
+    
+    def connect_thread(self) -> None:
+        """
+        Prepara a thread de conversa (nada a fazer no modo rápido).
+        
+        Retoma JARVIS_THREAD_ID ou a última thread persistida sem chamar a
+        API, verificando-a em segundo plano; cria uma nova apenas quando não
+        há nenhuma salva.
+        """
+        if self.backend != "chat":
+            super().connect_thread()
+    
+    def new_conversation(self) -> None:
+        """
+        Começa uma conversa nova, sem histórico.
+        
+        No modo assistente troca para uma thread do pool; no modo rápido
+        apenas limpa o histórico local.
+        """
+        if self.backend == "chat":
+            self.chat_history = []
+        else:
+            if self.active_run_id:
+                self._abort_run("conversa encerrada")
+            self.thread_id = self.assistant_manager.new_thread(_ASSISTANT_NAME)
+        self.thread_resumed = False
+        log.info(f"Nova conversa iniciada: {self.conversation_id}")
     
     def send_message(self, content, image_path=None):
         """
@@ -185,134 +1029,488 @@ class OpenAIClient:
         Returns:
             str: Resposta do assistente ou mensagem de erro
         """
-        # Verifica consultas GitHub em linguagem natural
+        return "".join(self.stream_message(content, image_path=image_path))
+    
+    def stream_message(self, content, image_path=None) -> Iterator[str]:
+        """
+        Envia uma mensagem para o assistente e produz a resposta em partes,
+        à medida que o texto é gerado.
+        
+        No backend "assistants", em modo "stream" (padrão) os trechos vêm do
+        fluxo de eventos da run; em modo "poll" (JARVIS_RUN_MODE=poll) a
+        resposta completa é produzida de uma só vez após o término da run.
+        No backend "chat" os trechos vêm do streaming de chat completions.
+        
+        Args:
+            content: Texto da mensagem
+            image_path: Caminho opcional para uma imagem a ser analisada
+            
+        Yields:
+            str: Trechos da resposta do assistente ou mensagem de erro
+        """
+        # Verifica consultas GitHub em linguagem natural e comandos !github
         if isinstance(content, str):
-            # Primeiro verifica se é uma consulta em linguagem natural
-            github_response = self.process_github_query(content)
+            github_response = self.github_commands.route(content)
             if github_response:
-                return github_response
-                
-            # Se não for linguagem natural, verifica comandos explícitos
-            if content.startswith("!github"):
-                parts = content.split(maxsplit=2)
-                if len(parts) < 2:
-                    return "Comando inválido. Use !github list [caminho] ou !github get [arquivo]"
-                
-                command = parts[1]
-                
-                if command == "list":
-                    path = parts[2] if len(parts) > 2 else ""
-                    return self.list_github_files(path)
-                
-                if command == "get":
-                    if len(parts) < 3:
-                        return "Especifique o caminho do arquivo. Ex: !github get src/main.py"
-                    return self.get_github_file(parts[2])
-                
-                return f"Comando GitHub desconhecido: {command}. Comandos disponíveis: list, get."
-        
-        # Verifica se a resposta está em cache quando não há imagem
-        # (não fazemos cache de análise de imagens)
-        cache_key = None
-        if not image_path:
-            cache_key = {"content": content, "thread_id": self.thread.id}
-            cached_response = self.cache.get(cache_key)
-            if cached_response:
-                log.info("Usando resposta em cache")
-                return cached_response
+                yield github_response
+                return
+        
+        # Verifica se a resposta está em cache (não há cache de análise de imagens)
+        cache_key, cached_response = self._lookup_cache(content, image_path)
+        if cached_response:
+            yield cached_response
+            return
+        
+        try:
+            message_content = build_message_content(content, image_path, uploads=self.image_uploads)
+            
+            if self.backend == "chat":
+                response = yield from self._run_chat_completion(message_content)
+            else:
+                response = yield from self._run_assistant(message_content)
+            
+            if not response:
+                log.warning("Nenhuma resposta recebida do assistente")
+                yield "Nenhuma resposta recebida."
+                return
+            
+            self._store_response(cache_key, response)
+        
+        except (RunError, BudgetExceeded) as e:
+            yield f"Erro: {str(e)}"
+        except Exception as e:
+            log.exception(f"Erro ao processar mensagem: {str(e)}")
+            yield f"Erro: {str(e)}"
+    
+    @property
+    def conversation_id(self) -> str:
+        """Identificador da conversa atual (ID da thread ou "chat" no modo rápido)."""
+        return self.thread_id or "chat"
+    
+    def _conversation_state(self) -> Optional[str]:
+        """
+        Marcador do estado atual da conversa, usado nas chaves de cache
+        presas ao contexto.
+        
+        Returns:
+            Optional[str]: ID da última mensagem vista na thread ou, no modo
+            rápido, hash do histórico local
+        """
+        if self.backend == "chat":
+            return hashlib.sha256(json.dumps(self.chat_history, sort_keys=True).encode()).hexdigest()[:16]
+        return super()._conversation_state()
+    
+    def _cache_owner(self) -> Optional[str]:
+        """Assistente (ou, no modo rápido, modelo) que produz as respostas guardadas em cache."""
+        return self.chat_model if self.backend == "chat" else self.assistant_id
+    
+    def _run_assistant(self, message_content: List[Dict[str, Any]]) -> Generator[str, None, Optional[str]]:
+        """
+        Envia a mensagem à thread e executa o assistente.
+        
+        Args:
+            message_content: Partes da mensagem do usuário
+            
+        Yields:
+            str: Trechos da resposta
+            
+        Returns:
+            Optional[str]: Texto completo da resposta
+        """
+        if self._prepare_turn(message_content):
+            self._roll_thread()
+        self._post_user_message(message_content)
         
+        log.info("Processando...")
+        self._run_requested = True
         try:
-            message_content = []
-            
-            # Add text content if provided
-            if isinstance(content, str) and content.strip():
-                message_content.append({"type": "text", "text": content})
-            
-            # Add image if provided
-            if image_path:
-                if os.path.exists(image_path):
-                    log.info(f"Processando imagem: {image_path}")
-                    with open(image_path, "rb") as image_file:
-                        base64_image = base64.b64encode(image_file.read()).decode('utf-8')
-                    
-                    message_content.append({
-                        "type": "image_url",
-                        "image_url": {
-                            "url": f"data:image/jpeg;base64,{base64_image}",
-                            "detail": "high"
-                        }
-                    })
-                else:
-                    log.error(f"Arquivo de imagem não encontrado: {image_path}")
-                    return f"Erro: Arquivo de imagem não encontrado: {image_path}"
-            
-            # If no content was added, return error
-            if not message_content:
-                log.error("Nenhum conteúdo fornecido")
-                return "Erro: Nenhum conteúdo fornecido"
-            
-            # Send message to thread
-            log.debug(f"Enviando mensagem para thread {self.thread.id}")
-            self.client.beta.threads.messages.create(
-                thread_id=self.thread.id,
+            if self.run_mode == "stream":
+                return (yield from self._run_with_streaming())
+            
+            start_time = time.time()
+            run_id = self._create_run()
+            self._wait_for_run(run_id)
+            response = self._fetch_run_response(run_id)
+            if response:
+                self._record_first_token(time.time() - start_time)
+                yield response
+            return response
+        except (KeyboardInterrupt, GeneratorExit):
+            # Ctrl+C ou resposta abandonada: não deixa a run consumindo tokens
+            self._abort_run("interrompida")
+            raise
+        finally:
+            self._run_requested = False
+    
+    def _roll_thread(self) -> None:
+        """
+        Passa a conversa para uma thread nova, semeada com o resumo das
+        últimas mensagens da thread atual.
+        
+        Falhas são registradas no log e a conversa segue na thread atual.
+        """
+        old_thread = self.thread_id
+        if self.active_run_id:
+            self._resolve_active_run(self.active_run_id)
+        
+        try:
+            messages = self.scheduler.call(
+                "interactive", self.client.beta.threads.messages.list,
+                thread_id=old_thread, order="desc", limit=self.context.keep_messages
+            ).data
+            # Com a janela cheia, o resumo de uma compactação anterior (a
+            # primeira mensagem da thread) ficou de fora
+            first = None
+            if len(messages) >= self.context.keep_messages:
+                first = next(iter(self.scheduler.call(
+                    "interactive", self.client.beta.threads.messages.list,
+                    thread_id=old_thread, order="asc", limit=1
+                ).data), None)
+            request = self.context.summary_request(reversed(messages), first=first)
+            completion = self.scheduler.call(
+                "interactive", self.client.chat.completions.create,
+                tokens=estimate_tokens(request[1]["content"]),
+                model=self.context.summary_model,
+                messages=request
+            )
+            seed = self._summary_seed(completion, old_thread)
+        except Exception as e:
+            log.warning(f"Não foi possível resumir a thread {old_thread}, mantendo-a: {e}")
+            return
+        
+        new_thread = self.assistant_manager.new_thread(_ASSISTANT_NAME)
+        try:
+            self.scheduler.call(
+                "interactive", self.client.beta.threads.messages.create,
+                thread_id=new_thread, role="assistant", content=seed, idempotent=False
+            )
+        except Exception as e:
+            log.warning(f"Não foi possível semear a thread {new_thread}, mantendo {old_thread}: {e}")
+            self.assistant_manager.remember_thread(_ASSISTANT_NAME, old_thread)
+            return
+        
+        self._finish_rollover(old_thread, new_thread, seed)
+    
+    def _post_user_message(self, message_content: List[Dict[str, Any]]) -> None:
+        """
+        Adiciona a mensagem do usuário à thread, liberando-a antes se uma
+        run anterior ainda estiver ativa.
+        
+        Args:
+            message_content: Partes da mensagem do usuário
+        """
+        if self.active_run_id:
+            # O turno anterior terminou sem acompanhar a run até o fim
+            self._resolve_active_run(self.active_run_id)
+        
+        log.debug(f"Enviando mensagem para thread {self.thread_id}")
+        try:
+            user_message = self.scheduler.call(
+                "interactive", self.client.beta.threads.messages.create,
+                idempotent=False,
+                thread_id=self.thread_id,
+                role="user",
+                content=message_content
+            )
+        except openai.BadRequestError:
+            run_id = self._find_active_run()
+            if run_id is not None:
+                log.warning(f"Thread {self.thread_id} ocupada pela run {run_id}")
+                self._resolve_active_run(run_id)
+            elif not self._inline_uploaded_images(message_content):
+                raise
+            user_message = self.scheduler.call(
+                "interactive", self.client.beta.threads.messages.create,
+                idempotent=False,
+                thread_id=self.thread_id,
                 role="user",
                 content=message_content
             )
+        self.message_store.remember(self.thread_id, user_message.id)
+    
+    def _find_active_run(self) -> Optional[str]:
+        """
+        Procura uma run ainda ativa na thread atual.
+        
+        Returns:
+            Optional[str]: ID da run mais recente, se estiver ativa
+        """
+        runs = self.scheduler.call(
+            "interactive", self.client.beta.threads.runs.list,
+            thread_id=self.thread_id, limit=1
+        ).data
+        if runs and runs[0].status in _ACTIVE_RUN_STATUSES:
+            return runs[0].id
+        return None
+    
+    def _resolve_active_run(self, run_id: str) -> None:
+        """
+        Libera a thread de uma run ativa conforme JARVIS_ACTIVE_RUN_POLICY,
+        cancelando-a ou aguardando seu término.
+        
+        Args:
+            run_id: ID da run ativa
+            
+        Raises:
+            RunError: Se a run continuar ativa após o prazo de polling
+        """
+        if self.active_run_policy == "wait":
+            log.info(f"Aguardando a run {run_id} terminar")
+        else:
+            self._cancel_run(run_id, "substituída por nova mensagem")
+        
+        for interval in self.poll_schedule.intervals():
+            run_status = self.scheduler.call(
+                "poll", self.client.beta.threads.runs.retrieve,
+                thread_id=self.thread_id,
+                run_id=run_id
+            )
+            if run_status.status not in _ACTIVE_RUN_STATUSES:
+                self.active_run_id = None
+                return
+            time.sleep(interval)
+        
+        raise RunError(f"A run {run_id} continua ativa na thread")
+    
+    def _cancel_run(self, run_id: str, reason: str) -> bool:
+        """
+        Pede o cancelamento de uma run.
+        
+        Args:
+            run_id: ID da run
+            reason: Motivo registrado no log
             
-            # Run the assistant
-            log.debug(f"Executando assistente {self.assistant.id}")
-            run = self.client.beta.threads.runs.create(
-                thread_id=self.thread.id,
-                assistant_id=self.assistant.id
+        Returns:
+            bool: True se o cancelamento foi aceito
+        """
+        try:
+            self.scheduler.call(
+                "interactive", self.client.beta.threads.runs.cancel,
+                thread_id=self.thread_id, run_id=run_id
             )
+            log.info(f"Run {run_id} cancelada ({reason})")
+            return True
+        except Exception as e:
+            log.warning(f"Não foi possível cancelar a run {run_id}: {e}")
+            return False
+    
+    def _abort_run(self, reason: str) -> None:
+        """
+        Cancela a run do turno atual, se ainda estiver em andamento.
+        
+        Args:
+            reason: Motivo registrado no log
+        """
+        run_id = self.active_run_id
+        if run_id is None and self._run_requested:
+            # A run foi pedida mas o ID ainda não chegou pelo fluxo
+            try:
+                run_id = self._find_active_run()
+            except Exception as e:
+                log.warning(f"Não foi possível localizar a run em andamento: {e}")
+        if run_id and self._cancel_run(run_id, reason):
+            self.active_run_id = None
+    
+    def _run_chat_completion(self, message_content: List[Dict[str, Any]]) -> Generator[str, None, Optional[str]]:
+        """
+        Modo rápido: envia o histórico local em uma única requisição de chat
+        completions em streaming.
+        
+        Args:
+            message_content: Partes da mensagem do usuário
             
-            # Wait for completion with status updates
-            log.info("Processando...")
-            start_time = time.time()
-            while True:
-                run_status = self.client.beta.threads.runs.retrieve(
-                    thread_id=self.thread.id,
-                    run_id=run.id
+        Yields:
+            str: Deltas de texto da resposta
+            
+        Returns:
+            Optional[str]: Texto completo da resposta
+        """
+        messages = [{"role": "system", "content": self.chat_instructions}]
+        messages += self.chat_history
+        messages.append({"role": "user", "content": message_content})
+        
+        log.info("Processando...")
+        start_time = time.time()
+        prompt_text = " ".join(
+            m["content"] if isinstance(m["content"], str)
+            else " ".join(p.get("text", "") for p in m["content"])
+            for m in messages
+        )
+        model = self.usage.choose_model(self.chat_model)
+        stream = self.scheduler.call(
+            "interactive", self.client.chat.completions.create,
+            tokens=estimate_tokens(prompt_text),
+            model=model,
+            messages=messages,
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+        
+        parts: List[str] = []
+        usage = None
+        for chunk in stream:
+            if chunk.usage:
+                # O último chunk traz o uso do turno, sem choices
+                usage = chunk.usage
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                if not parts:
+                    self._record_first_token(time.time() - start_time)
+                parts.append(delta)
+                yield delta
+        log.info(f"Processamento concluído em {time.time() - start_time:.2f} segundos")
+        self.usage.record_completion(usage, model)
+        
+        response = "".join(parts) or None
+        if response:
+            # Imagens não entram no histórico para não reenviá-las a cada turno
+            text = " ".join(p["text"] for p in message_content if p["type"] == "text")
+            if any(p["type"] != "text" for p in message_content):
+                text = (text + " [imagem enviada]").strip()
+            self.chat_history.append({"role": "user", "content": text})
+            self.chat_history.append({"role": "assistant", "content": response})
+            del self.chat_history[:-2 * self.chat_history_turns]
+        return response
+    
+    def _create_run(self) -> str:
+        """
+        Cria uma run do assistente na thread atual.
+        
+        Returns:
+            str: ID da run criada
+        """
+        log.debug(f"Executando assistente {self.assistant_id}")
+        run = self.scheduler.call(
+            "interactive", self.client.beta.threads.runs.create,
+            idempotent=False,
+            tokens=self._turn_tokens,
+            thread_id=self.thread_id,
+            assistant_id=self.assistant_id,
+            **self._run_options()
+        )
+        self.active_run_id = run.id
+        return run.id
+    
+    def _run_with_streaming(self) -> Generator[str, None, Optional[str]]:
+        """
+        Executa o assistente consumindo o fluxo de eventos da run.
+        
+        Produz os deltas de texto assim que chegam e encerra no evento de
+        conclusão da run. Se o streaming falhar (ex: proxy que quebra SSE),
+        continua pelo caminho de polling, reaproveitando a run se ela já
+        tiver sido criada.
+        
+        Yields:
+            str: Deltas de texto da resposta
+            
+        Returns:
+            Optional[str]: Texto completo da resposta
+        """
+        streamed = _StreamedRun(self.latency_histogram)
+        
+        try:
+            log.debug(f"Executando assistente {self.assistant_id} (streaming)")
+            self.scheduler.acquire("interactive", tokens=self._turn_tokens)
+            with self.client.beta.threads.runs.stream(
+                thread_id=self.thread_id,
+                assistant_id=self.assistant_id,
+                **self._run_options()
+            ) as stream:
+                for event in stream:
+                    delta = self._on_stream_event(event, streamed)
+                    if delta:
+                        yield delta
+                    if streamed.done:
+                        break
+        except RunError:
+            streamed.timer.finish()
+            raise
+        except Exception as e:
+            delay = self._stream_fallback(e, streamed)
+            if delay is not None:
+                time.sleep(delay)
+                streamed.run_id = self._create_run()
+            
+            self._wait_for_run(streamed.run_id, timer=streamed.timer)
+            response = self._fetch_run_response(streamed.run_id)
+            if response:
+                yield self._stream_remainder(streamed, response)
+            return response
+        
+        streamed.timer.finish()
+        return "".join(streamed.parts) or None
+    
+    def _wait_for_run(self, run_id: str, timer: Optional[RunTimer] = None) -> None:
+        """
+        Aguarda a conclusão de uma run consultando seu status segundo a
+        agenda de polling configurada.
+        
+        Args:
+            run_id: ID da run
+            timer: Cronômetro da run, se já iniciado (ex: pelo streaming)
+            
+        Raises:
+            RunError: Se a run falhar, for cancelada, expirar ou exceder o prazo
+        """
+        timer = timer or RunTimer(self.latency_histogram)
+        start_time = time.time()
+        try:
+            for interval in self.poll_schedule.intervals():
+                run_status = self.scheduler.call(
+                    "poll", self.client.beta.threads.runs.retrieve,
+                    thread_id=self.thread_id,
+                    run_id=run_id
                 )
-                
-                if run_status.status == "completed":
-                    elapsed_time = time.time() - start_time
-                    log.info(f"Processamento concluído em {elapsed_time:.2f} segundos")
-                    break
-                elif run_status.status in ["failed", "cancelled", "expired"]:
-                    log.error(f"Processamento falhou: {run_status.status}")
-                    return f"Erro: {run_status.last_error}"
+                if self._on_run_status(run_status, timer, start_time):
+                    return
                 
                 # Log menos frequente para não sobrecarregar
-                log.debug(f"Status do processamento: {run_status.status}")
-                time.sleep(1)
-            
-            # Get the latest message
-            log.debug(f"Obtendo mensagens da thread {self.thread.id}")
-            messages = self.client.beta.threads.messages.list(
-                thread_id=self.thread.id
-            )
+                log.debug(f"Status do processamento: {run_status.status}, próxima consulta em {interval:.2f}s")
+                time.sleep(interval)
+        finally:
+            timer.finish()
+        
+        error = self._deadline_error(run_id)
+        if self._cancel_run(run_id, "tempo limite excedido"):
+            self.active_run_id = None
+        raise error
+    
+    def _fetch_run_response(self, run_id: str) -> Optional[str]:
+        """
+        Obtém o texto da resposta do assistente após a conclusão da run.
+        
+        Pede apenas a mensagem mais recente produzida pela run. Se a API não
+        retornar nada para o filtro, busca somente as mensagens posteriores à
+        última mensagem vista na thread, sem paginar o histórico.
+        
+        Args:
+            run_id: ID da run concluída
             
-            # Return the assistant's response
-            for message in messages.data:
-                if message.role == "assistant":
-                    for content_item in message.content:
-                        if content_item.type == "text":
-                            response = content_item.text.value
-                            
-                            # Armazena em cache se não for análise de imagem
-                            if cache_key:
-                                self.cache.set(cache_key, response)
-                                log.debug("Resposta armazenada em cache")
-                            
-                            return response
-            
-            log.warning("Nenhuma resposta recebida do assistente")
-            return "Nenhuma resposta recebida."
+        Returns:
+            Optional[str]: Texto da resposta ou None se não houver
+        """
+        log.debug(f"Obtendo resposta da run {run_id}")
+        messages = self.scheduler.call(
+            "interactive", self.client.beta.threads.messages.list,
+            thread_id=self.thread_id,
+            run_id=run_id,
+            order="desc",
+            limit=1
+        ).data
         
-        except Exception as e:
-            log.exception(f"Erro ao processar mensagem: {str(e)}")
-            return f"Erro: {str(e)}"
+        if not messages:
+            params, ascending = self._recent_messages_params()
+            messages = self.scheduler.call(
+                "interactive", self.client.beta.threads.messages.list,
+                thread_id=self.thread_id,
+                **params
+            ).data
+            if ascending:
+                messages = list(reversed(messages))
+        
+        return self._response_text(messages)
     
     def get_raw_client(self):
         """
@@ -333,14 +1531,7 @@ class OpenAIClient:
         Returns:
             Conteúdo do arquivo ou None se não encontrado/disponível
         """
-        if not self.github_retriever.is_enabled():
-            return "Integração com GitHub não está configurada. Configure as variáveis GITHUB_API_TOKEN, GITHUB_REPO_OWNER e GITHUB_REPO_NAME no arquivo .env."
-        
-        content = self.github_retriever.get_file_content(file_path)
-        if content is None:
-            return f"Não foi possível obter o arquivo {file_path}."
-        
-        return content
+        return self.github_commands.get_github_file(file_path)
 
     def list_github_files(self, path: str = "", extension: str = None) -> str:
         """
@@ -353,18 +1544,7 @@ class OpenAIClient:
         Returns:
             String formatada com lista de arquivos
         """
-        if not self.github_retriever.is_enabled():
-            return "Integração com GitHub não está configurada. Configure as variáveis GITHUB_API_TOKEN, GITHUB_REPO_OWNER e GITHUB_REPO_NAME no arquivo .env."
-        
-        files = self.github_retriever.list_files(path, extension)
-        if not files:
-            return f"Nenhum arquivo encontrado no caminho: {path}"
-        
-        result = "Arquivos encontrados:\n"
-        for file in files:
-            result += f"- {file['path']} ({file['size']} bytes)\n"
-        
-        return result
+        return self.github_commands.list_github_files(path, extension)
     
     def process_github_query(self, content: str) -> Optional[str]:
         """
@@ -377,68 +1557,7 @@ class OpenAIClient:
         Returns:
             Resposta processada ou None se não for uma consulta GitHub
         """
-        # Verificar se a integração com GitHub está ativada
-        if not self.github_retriever.is_enabled():
-            return None
-            
-        # Palavras-chave que indicam consulta ao GitHub
-        github_keywords = [
-            "github", "repositório", "repositorio", "repo", "git", 
-            "código fonte", "codigo fonte", "arquivos do projeto"
-        ]
-        
-        content_lower = content.lower()
-        is_github_query = any(keyword in content_lower for keyword in github_keywords)
-        
-        if not is_github_query:
-            return None
-            
-        log.info("Processando consulta GitHub")
-        
-        # Detecção de pedidos de visão geral do repositório
-        overview_keywords = [
-            "visão geral", "visao geral", "overview", "resumo", "estrutura", 
-            "arquivos", "me mostre", "me dê", "me de"
-        ]
-        
-        if any(keyword in content_lower for keyword in overview_keywords):
-            return self.get_repo_overview()
-            
-        # Detecção de pedido de arquivo específico
-        file_patterns = [
-            r"arquivo\s+(.+?)[\s\.\?]",
-            r"conteúdo\s+de\s+(.+?)[\s\.\?]",
-            r"conteudo\s+de\s+(.+?)[\s\.\?]",
-            r"ver\s+arquivo\s+(.+?)[\s\.\?]",
-            r"ver\s+(.+\.(py|js|md|html|css|json))[\s\.\?]",
-            r"abrir\s+(.+?)[\s\.\?]"
-        ]
-        
-        import re
-        for pattern in file_patterns:
-            match = re.search(pattern, content_lower)
-            if match:
-                file_path = match.group(1).strip()
-                return self.get_github_file(file_path)
-        
-        # Detecção de pedido para listar diretório específico
-        dir_patterns = [
-            r"listar\s+(.+?)[\s\.\?]",
-            r"arquivos\s+em\s+(.+?)[\s\.\?]",
-            r"diretório\s+(.+?)[\s\.\?]",
-            r"diretorio\s+(.+?)[\s\.\?]",
-            r"pasta\s+(.+?)[\s\.\?]"
-        ]
-        
-        for pattern in dir_patterns:
-            match = re.search(pattern, content_lower)
-            if match:
-                dir_path = match.group(1).strip()
-                return self.list_github_files(dir_path)
-        
-        # Se não conseguir determinar um comando específico, 
-        # mas for relacionado ao GitHub, mostrar visão geral
-        return self.get_repo_overview()
+        return self.github_commands.process_github_query(content)
         
     def get_repo_overview(self) -> str:
         """
@@ -447,42 +1566,4 @@ class OpenAIClient:
         Returns:
             String formatada com visão geral do repositório
         """
-        if not self.github_retriever.is_enabled():
-            return "Integração com GitHub não está configurada. Configure as variáveis GITHUB_API_TOKEN, GITHUB_REPO_OWNER e GITHUB_REPO_NAME no arquivo .env."
-        
-        # Obter lista de arquivos na raiz
-        files = self.github_retriever.list_files()
-        
-        # Obter commits recentes
-        commits = self.github_retriever.get_recent_commits(5)
-        
-        # Formatar resposta
-        result = f"# Visão Geral do Repositório: {self.github_retriever.repo_owner}/{self.github_retriever.repo_name}\n\n"
-        
-        # Adicionar estrutura de arquivos
-        result += "## Estrutura de Arquivos (raiz):\n"
-        if files:
-            for file in files:
-                # Adicionar ícone de pasta ou arquivo
-                icon = "📁 " if file["type"] == "dir" else "📄 "
-                result += f"{icon}{file['path']}\n"
-        else:
-            result += "Nenhum arquivo encontrado na raiz do repositório.\n"
-        
-        # Adicionar commits recentes
-        result += "\n## Commits Recentes:\n"
-        if commits:
-            for i, commit in enumerate(commits, 1):
-                date = commit["date"]
-                message = commit["message"].split("\n")[0]  # Primeira linha da mensagem
-                author = commit["author"]
-                result += f"{i}. **{message}** (por {author} em {date})\n"
-        else:
-            result += "Não foi possível obter commits recentes.\n"
-            
-        # Adicionar instruções para comandos específicos
-        result += "\n## Comandos Disponíveis:\n"
-        result += "- Para listar arquivos de um diretório específico: `!github list [caminho]`\n"
-        result += "- Para ver o conteúdo de um arquivo específico: `!github get [arquivo]`\n"
-            
-        return result
+        return self.github_commands.get_repo_overview()
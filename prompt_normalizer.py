@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# filepath: /home/comunikime/code/jarvis/prompt_normalizer.py
+"""
+Módulo de normalização das perguntas usadas como chave do cache de
+respostas: transcrições de voz da mesma pergunta variam em maiúsculas,
+pontuação, acentos e palavras de preenchimento ("é...", "tipo", "né").
+"""
+
+import os
+import re
+import unicodedata
+from typing import Iterable, Optional
+
+# Palavras de preenchimento comuns na fala, removidas das chaves. Ficam de
+# fora as que também têm sentido na pergunta ("e", que dobrado é também "é";
+# "ai", "sabe", "assim")
+DEFAULT_FILLERS = (
+    "ah", "ahn", "eh", "er", "hum", "hmm", "hm", "uh", "uhm", "tipo", "ne",
+    "entao", "olha", "jarvis", "por favor",
+)
+
+# Tokens mantidos na chave: números (com o sinal de menos inicial e a parte
+# decimal), palavras seguidas de + ou # (C++, C#, F#) e os operadores, que
+# distinguem "2+2" de "2*2"; o resto da pontuação é descartado
+_TOKENS = re.compile(r"(?<!\w)-?\d+(?:[.,]\d+)*|\w+[+#]*|[-+*/#%]")
+_SPACES = re.compile(r"\s+")
+
+# Hesitação no início da fala ("É... tipo", "Eh, ..."): só o "é" seguido de
+# reticências ou vírgula, aplicado antes de remover os acentos, para que o
+# "é" da pergunta ("o que é") e o "e" inicial ("E, depois...") fiquem
+_HESITATION = re.compile(r"^\s*(?:(?:é+h*|eh+)\s*(?:\.{2,}|,)\s*)+")
+
+
+def fold(text: str) -> str:
+    """
+    Aplica a dobra Unicode (NFKC e casefold) e remove os acentos.
+
+    Args:
+        text: Texto original
+
+    Returns:
+        str: Texto em minúsculas, sem acentos
+    """
+    text = unicodedata.normalize("NFKC", text).casefold()
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+
+class PromptNormalizer:
+    """Normaliza perguntas para que variações da mesma fala gerem a mesma chave."""
+
+    def __init__(self, fillers: Optional[Iterable[str]] = None):
+        """
+        Inicializa o normalizador.
+
+        Args:
+            fillers: Palavras ou expressões de preenchimento a remover
+                (padrão: JARVIS_CACHE_FILLERS, separadas por vírgula, ou
+                DEFAULT_FILLERS)
+        """
+        if fillers is None:
+            configured = os.getenv("JARVIS_CACHE_FILLERS")
+            fillers = configured.split(",") if configured is not None else DEFAULT_FILLERS
+        # As expressões passam pela mesma dobra do texto; as mais longas
+        # são removidas primeiro ("por favor" antes de "por")
+        folded = sorted({fold(f).strip() for f in fillers if f.strip()}, key=len, reverse=True)
+        self.fillers = folded
+        alternatives = "|".join(re.escape(f) for f in folded)
+        self._fillers = re.compile(r"\b(?:" + alternatives + r")\b") if folded else None
+        self._leading = re.compile(r"^(?:(?:" + alternatives + r")\b\s*)+") if folded else None
+
+    def clean(self, text: str) -> str:
+        """
+        Remove a hesitação inicial, dobra o texto e o reduz aos tokens da
+        chave, separados por espaço ("Quanto é 2+2?" vira "quanto e 2 + 2").
+
+        Args:
+            text: Texto original
+
+        Returns:
+            str: Texto limpo, ainda com as palavras de preenchimento
+        """
+        text = _HESITATION.sub("", unicodedata.normalize("NFKC", text).casefold())
+        return " ".join(_TOKENS.findall(fold(text)))
+
+    def trim(self, text: str) -> str:
+        """
+        Limpa o texto e remove só as palavras de preenchimento iniciais
+        ("é... tipo, o que é" vira "o que e"), preservando a estrutura da
+        pergunta para a classificação.
+
+        Args:
+            text: Texto original
+
+        Returns:
+            str: Texto limpo sem o preenchimento inicial
+        """
+        text = self.clean(text)
+        if self._leading is None:
+            return text
+        return self._leading.sub("", text) or text
+
+    def normalize(self, text: str) -> str:
+        """
+        Normaliza uma pergunta.
+
+        Se só restarem palavras de preenchimento, mantém o texto sem removê-las.
+
+        Args:
+            text: Pergunta original (digitada ou transcrita)
+
+        Returns:
+            str: Pergunta dobrada, sem pontuação (exceto operadores e sinais
+            de números), espaços repetidos nem palavras de preenchimento
+        """
+        text = self.clean(text)
+        if self._fillers is None:
+            return text
+        stripped = _SPACES.sub(" ", self._fillers.sub(" ", text)).strip()
+        return stripped or text
@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+# filepath: /home/comunikime/code/jarvis/rate_limiter.py
+"""
+Módulo com o agendador compartilhado de requisições à OpenAI: baldes de
+tokens para requisições/min e tokens/min ajustados pelos cabeçalhos
+x-ratelimit-* das respostas, prioridade por classe de requisição e novas
+tentativas com backoff (respeitando Retry-After) após erros 429.
+"""
+
+import asyncio
+import heapq
+import itertools
+import os
+import random
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from lazy_import import lazy_import
+from log_manager import LogManager
+
+# Configura o logger
+log = LogManager().logger
+
+openai = lazy_import("openai")
+
+# Classes de requisição, da mais para a menos prioritária: o turno
+# interativo passa na frente da fala, do polling e do trabalho de fundo
+PRIORITIES = {"interactive": 0, "speech": 1, "poll": 2, "background": 3, "batch": 4}
+
+_MAX_ATTEMPTS = 5
+_MAX_BACKOFF = 60.0
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_reset(value: Optional[str]) -> Optional[float]:
+    """
+    Converte a duração dos cabeçalhos x-ratelimit-reset-* em segundos.
+
+    Args:
+        value: Duração no formato da API (ex: "1s", "6m0s", "20ms")
+
+    Returns:
+        Optional[float]: Segundos, ou None se o valor for inválido
+    """
+    if not value:
+        return None
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def rate_limit_reset(headers, message: str = "") -> Optional[float]:
+    """
+    Calcula a espera de um 429 sem Retry-After pelos cabeçalhos x-ratelimit-reset-*.
+
+    Um 429 por tokens/min usa x-ratelimit-reset-tokens, que costuma ser bem
+    maior que o de requisições; os demais usam x-ratelimit-reset-requests.
+
+    Args:
+        headers: Cabeçalhos HTTP da resposta 429
+        message: Mensagem do erro (ex: "... on tokens per min (TPM) ...")
+
+    Returns:
+        Optional[float]: Segundos até a renovação do limite, ou None
+    """
+    tokens_limited = headers.get("x-ratelimit-remaining-tokens") == "0" or "tokens per min" in message.lower()
+    requests_limited = headers.get("x-ratelimit-remaining-requests") == "0"
+    requests = parse_reset(headers.get("x-ratelimit-reset-requests"))
+    tokens = parse_reset(headers.get("x-ratelimit-reset-tokens"))
+    if tokens_limited:
+        # Com os dois limites esgotados, só a renovação mais tardia libera
+        waits = [tokens, requests] if requests_limited else [tokens]
+    else:
+        waits = [requests]
+    waits = [w for w in waits if w is not None] or [w for w in (requests, tokens) if w is not None]
+    return max(waits) if waits else None
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estima o número de tokens de um texto (cerca de 4 caracteres por token).
+
+    Args:
+        text: Texto a estimar
+
+    Returns:
+        int: Estimativa de tokens
+    """
+    return len(text) // 4 + 1
+
+
+class TokenBucket:
+    """Balde de tokens com reabastecimento contínuo."""
+
+    def __init__(self, per_minute: float):
+        """
+        Inicializa o balde cheio.
+
+        Args:
+            per_minute: Capacidade e taxa de reabastecimento por minuto
+        """
+        self.capacity = float(per_minute)
+        self.level = float(per_minute)
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.capacity / 60.0)
+        self.updated = now
+
+    def delay(self, amount: float, now: float) -> float:
+        """
+        Calcula quanto falta para haver a quantidade pedida.
+
+        Args:
+            amount: Quantidade necessária
+            now: Instante atual (time.monotonic)
+
+        Returns:
+            float: Segundos de espera (0 se já houver o suficiente)
+        """
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) * 60.0 / self.capacity
+
+    def take(self, amount: float) -> None:
+        """Consome a quantidade (pode deixar o balde negativo após estimativas)."""
+        self.level -= min(amount, self.capacity)
+
+    def sync(self, limit: Optional[float], remaining: Optional[float], now: float) -> None:
+        """
+        Ajusta o balde ao estado informado pelo servidor.
+
+        Args:
+            limit: Limite por minuto da conta (x-ratelimit-limit-*)
+            remaining: Quantidade restante (x-ratelimit-remaining-*)
+            now: Instante atual (time.monotonic)
+        """
+        self._refill(now)
+        if limit:
+            self.capacity = float(limit)
+        if remaining is not None:
+            # O servidor é a fonte da verdade e corrige as estimativas locais
+            self.level = min(float(remaining), self.capacity)
+
+
+class RequestScheduler:
+    """Agendador de requisições compartilhado por todos os clientes OpenAI."""
+
+    _shared: Optional["RequestScheduler"] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, requests_per_minute: float = 500, tokens_per_minute: float = 30000):
+        """
+        Inicializa o agendador.
+
+        Args:
+            requests_per_minute: Limite inicial de requisições por minuto
+            tokens_per_minute: Limite inicial de tokens por minuto
+        """
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self._cond = threading.Condition()
+        self._waiting: List[Tuple[int, int]] = []
+        self._sequence = itertools.count()
+        self._resume_at = 0.0
+
+    @classmethod
+    def shared(cls) -> "RequestScheduler":
+        """
+        Retorna o agendador do processo, criado a partir de JARVIS_RATE_RPM
+        e JARVIS_RATE_TPM no primeiro uso.
+
+        Returns:
+            RequestScheduler: Agendador compartilhado
+        """
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls(
+                    requests_per_minute=float(os.getenv("JARVIS_RATE_RPM", "500")),
+                    tokens_per_minute=float(os.getenv("JARVIS_RATE_TPM", "30000")),
+                )
+            return cls._shared
+
+    # ---------------- reserva de capacidade ----------------
+
+    def _ticket(self, priority: str) -> Tuple[int, int]:
+        return (PRIORITIES.get(priority, PRIORITIES["background"]), next(self._sequence))
+
+    def _try_reserve(self, ticket: Tuple[int, int], tokens: int) -> Optional[float]:
+        """
+        Tenta reservar capacidade para o pedido. Deve ser chamado com o lock.
+
+        Returns:
+            Optional[float]: 0 se reservou; a espera estimada se for a vez do
+            pedido mas faltar capacidade; None se houver pedido mais prioritário
+        """
+        if self._waiting[0] != ticket:
+            return None
+        now = time.monotonic()
+        delay = max(self._resume_at - now, self.requests.delay(1, now), self.tokens.delay(tokens, now))
+        if delay > 0:
+            return delay
+        self.requests.take(1)
+        self.tokens.take(tokens)
+        heapq.heappop(self._waiting)
+        self._cond.notify_all()
+        return 0.0
+
+    def _withdraw(self, ticket: Tuple[int, int]) -> None:
+        """Remove um pedido abandonado da fila. Deve ser chamado com o lock."""
+        if ticket in self._waiting:
+            self._waiting.remove(ticket)
+            heapq.heapify(self._waiting)
+            self._cond.notify_all()
+
+    def acquire(self, priority: str = "interactive", tokens: int = 0) -> None:
+        """
+        Bloqueia até haver capacidade para uma requisição, respeitando a
+        prioridade dos pedidos que aguardam.
+
+        Args:
+            priority: Classe da requisição (ver PRIORITIES)
+            tokens: Estimativa de tokens consumidos pela requisição
+        """
+        with self._cond:
+            ticket = self._ticket(priority)
+            heapq.heappush(self._waiting, ticket)
+            try:
+                while True:
+                    delay = self._try_reserve(ticket, tokens)
+                    if delay == 0:
+                        return
+                    self._cond.wait(timeout=delay)
+            except BaseException:
+                self._withdraw(ticket)
+                raise
+
+    async def acquire_async(self, priority: str = "interactive", tokens: int = 0) -> None:
+        """
+        Versão assíncrona de acquire, que aguarda sem bloquear o loop.
+
+        Args:
+            priority: Classe da requisição (ver PRIORITIES)
+            tokens: Estimativa de tokens consumidos pela requisição
+        """
+        with self._cond:
+            ticket = self._ticket(priority)
+            heapq.heappush(self._waiting, ticket)
+        try:
+            while True:
+                with self._cond:
+                    delay = self._try_reserve(ticket, tokens)
+                if delay == 0:
+                    return
+                await asyncio.sleep(min(delay or 0.05, 1.0))
+        except BaseException:
+            with self._cond:
+                self._withdraw(ticket)
+            raise
+
+    # ---------------- 429 e cabeçalhos ----------------
+
+    def backoff(self, error: Exception, attempt: int) -> float:
+        """
+        Registra um erro que admite nova tentativa e calcula a espera.
+
+        Erros 429 suspendem todas as requisições até o fim da espera, que
+        segue o Retry-After ou, na falta dele, o x-ratelimit-reset-* do
+        limite atingido; os demais esperam só por si, com backoff exponencial
+        quando o servidor não envia Retry-After.
+
+        Args:
+            error: Exceção recebida
+            attempt: Número da tentativa que falhou (a partir de 1)
+
+        Returns:
+            float: Segundos de espera antes da próxima tentativa
+        """
+        delay = None
+        response = getattr(error, "response", None)
+        if response is not None:
+            try:
+                delay = float(response.headers.get("retry-after"))
+            except (TypeError, ValueError):
+                # Os cabeçalhos x-ratelimit-reset-* só explicam um 429; num
+                # 5xx eles descrevem a cota, não a falha
+                if isinstance(error, openai.RateLimitError):
+                    delay = rate_limit_reset(response.headers, str(error))
+        if delay is None:
+            delay = min(_MAX_BACKOFF, 2.0 ** attempt)
+        delay *= random.uniform(1.0, 1.25)
+
+        if isinstance(error, openai.RateLimitError):
+            with self._cond:
+                self._resume_at = max(self._resume_at, time.monotonic() + delay)
+                self._cond.notify_all()
+            log.warning(f"Limite de taxa atingido, pausando requisições por {delay:.1f}s")
+        return delay
+
+    def observe_headers(self, headers) -> None:
+        """
+        Ajusta os baldes a partir dos cabeçalhos x-ratelimit-* de uma resposta.
+
+        Args:
+            headers: Cabeçalhos HTTP da resposta
+        """
+        if "x-ratelimit-remaining-requests" not in headers and "x-ratelimit-remaining-tokens" not in headers:
+            return
+
+        def number(name):
+            try:
+                return float(headers.get(name))
+            except (TypeError, ValueError):
+                return None
+
+        now = time.monotonic()
+        with self._cond:
+            self.requests.sync(number("x-ratelimit-limit-requests"), number("x-ratelimit-remaining-requests"), now)
+            self.tokens.sync(number("x-ratelimit-limit-tokens"), number("x-ratelimit-remaining-tokens"), now)
+            self._cond.notify_all()
+
+    def observe_response(self, response) -> None:
+        """Hook de resposta para httpx.Client (event_hooks["response"])."""
+        self.observe_headers(response.headers)
+
+    async def observe_response_async(self, response) -> None:
+        """Hook de resposta para httpx.AsyncClient (event_hooks["response"])."""
+        self.observe_headers(response.headers)
+
+    # ---------------- execução ----------------
+
+    def _retryable(self, idempotent: bool) -> Tuple[type, ...]:
+        # Sem resposta (queda de conexão ou timeout) não há como saber se um
+        # POST não idempotente chegou a ser executado; repeti-lo duplicaria
+        # mensagens e runs na thread
+        if idempotent:
+            return (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError)
+        return (openai.RateLimitError, openai.InternalServerError)
+
+    def call(self, priority: str, func: Callable[..., Any], *args, tokens: int = 0,
+             idempotent: bool = True, **kwargs) -> Any:
+        """
+        Executa uma chamada à API sob o agendador, com novas tentativas.
+
+        Args:
+            priority: Classe da requisição (ver PRIORITIES)
+            func: Método do cliente OpenAI a chamar
+            *args: Argumentos posicionais para func
+            tokens: Estimativa de tokens consumidos pela requisição
+            idempotent: False para chamadas que criam estado no servidor
+                (messages.create, runs.create), que não são repetidas após
+                erros de conexão ou timeout
+            **kwargs: Argumentos nomeados para func
+
+        Returns:
+            Any: Resultado de func
+        """
+        for attempt in range(1, _MAX_ATTEMPTS + 1):
+            self.acquire(priority, tokens)
+            try:
+                return func(*args, **kwargs)
+            except self._retryable(idempotent) as e:
+                if attempt == _MAX_ATTEMPTS:
+                    raise
+                delay = self.backoff(e, attempt)
+                log.debug(f"Nova tentativa ({priority}) em {delay:.1f}s após: {e}")
+                time.sleep(delay)
+
+    async def call_async(self, priority: str, func: Callable[..., Any], *args, tokens: int = 0,
+                         idempotent: bool = True, **kwargs) -> Any:
+        """
+        Versão assíncrona de call, para métodos do cliente AsyncOpenAI.
+
+        Args:
+            priority: Classe da requisição (ver PRIORITIES)
+            func: Método assíncrono do cliente a chamar
+            *args: Argumentos posicionais para func
+            tokens: Estimativa de tokens consumidos pela requisição
+            idempotent: False para chamadas que criam estado no servidor
+                (messages.create, runs.create), que não são repetidas após
+                erros de conexão ou timeout
+            **kwargs: Argumentos nomeados para func
+
+        Returns:
+            Any: Resultado de func
+        """
+        for attempt in range(1, _MAX_ATTEMPTS + 1):
+            await self.acquire_async(priority, tokens)
+            try:
+                return await func(*args, **kwargs)
+            except self._retryable(idempotent) as e:
+                if attempt == _MAX_ATTEMPTS:
+                    raise
+                delay = self.backoff(e, attempt)
+                log.debug(f"Nova tentativa ({priority}) em {delay:.1f}s após: {e}")
+                await asyncio.sleep(delay)
+
+    def http_hooks(self, asynchronous: bool = False) -> Dict[str, list]:
+        """
+        Hooks de evento httpx que alimentam o agendador com os cabeçalhos.
+
+        Args:
+            asynchronous: True para httpx.AsyncClient
+
+        Returns:
+            Dict[str, list]: Valor para o parâmetro event_hooks do httpx
+        """
+        return {"response": [self.observe_response_async if asynchronous else self.observe_response]}
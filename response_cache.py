@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+# filepath: /home/comunikime/code/jarvis/response_cache.py
+"""
+Módulo com a política de cache de respostas do assistente: cada pergunta é
+classificada como independente do contexto (resposta compartilhada entre
+conversas), dependente do contexto (chaveada pelo estado da conversa, a
+última mensagem vista) ou volátil (hora, notícias, cotações; nunca cacheada).
+"""
+
+import json
+import os
+import re
+import threading
+from typing import Any, Dict, Optional
+
+from cache_manager import CacheManager
+from log_manager import LogManager
+from near_duplicate_cache import NearDuplicateIndex
+from prompt_normalizer import PromptNormalizer, fold
+
+# Configura o logger
+log = LogManager().logger
+
+SCOPE_GLOBAL = "global"
+SCOPE_CONTEXT = "context"
+SCOPE_NONE = "none"
+
+# Perguntas cuja resposta muda com o tempo ou a cada pedido
+_VOLATILE = re.compile(
+    r"\b(agora|hoje|amanha|ontem|horas?|horario|data|semana|mes|noticias?|ultim[oa]s?|atual|atualmente|"
+    r"recentes?|clima|previsao|temperatura|cotacao|precos?|placar|aleatori[oa]|sorteie|sorteia|piada|"
+    r"lembre|lembrete)\b"
+)
+
+# Referências ao que já foi dito, ao próprio usuário ou ao repositório
+_CONTEXTUAL = re.compile(
+    r"\b(isso|isto|esse|essa|esses|essas|aquilo|aquele|aquela|ele|ela|eles|elas|dele|dela|disso|"
+    r"anterior|acima|antes|continue|continua|prossiga|tambem|entao|novamente|de novo|outra vez|"
+    r"resuma|resumo|eu|me|meu|minha|meus|minhas|voce disse|arquivo|codigo|repositorio|projeto)\b"
+)
+
+# Perguntas de definição, explicação ou conversão, autocontidas
+_SELF_CONTAINED = re.compile(
+    r"^(o que (e|sao|significa|quer dizer)|quem (foi|e|sao|foram|inventou|escreveu|descobriu)|"
+    r"qual (e|foi) (a|o)|quais (sao|foram)|defina|definicao de|explique|como funciona|"
+    r"como (se )?(calcula|faz|escreve|pronuncia)|quantos|quantas|traduza|converta|"
+    r"por que o|por que a|por que os|por que as)\b"
+)
+
+# Perguntas muito curtas ("e agora?", "por quê?") dependem do que veio antes
+_MIN_GLOBAL_WORDS = 3
+
+
+def classify(content: str) -> str:
+    """
+    Classifica uma pergunta pelo quanto sua resposta depende do contexto.
+
+    Na dúvida a pergunta fica presa ao contexto: um acerto a menos é
+    preferível a uma resposta errada.
+
+    Args:
+        content: Texto da pergunta
+
+    Returns:
+        str: SCOPE_GLOBAL, SCOPE_CONTEXT ou SCOPE_NONE
+    """
+    text = fold(content).strip()
+    if _VOLATILE.search(text):
+        return SCOPE_NONE
+    if _CONTEXTUAL.search(text) or len(text.split()) < _MIN_GLOBAL_WORDS:
+        return SCOPE_CONTEXT
+    if _SELF_CONTAINED.search(text):
+        return SCOPE_GLOBAL
+    return SCOPE_CONTEXT
+
+
+class ResponseCache:
+    """Cache de respostas com escopo global ou preso ao estado da conversa."""
+
+    def __init__(self, cache_dir: str, context_max_age: Optional[int] = None,
+                 global_max_age: Optional[int] = None, normalizer: Optional[PromptNormalizer] = None,
+                 similarity: Optional[float] = None):
+        """
+        Inicializa os dois caches.
+
+        Args:
+            cache_dir: Diretório base; cada escopo usa um subdiretório
+            context_max_age: Validade das respostas presas ao contexto, em
+                segundos (padrão: JARVIS_CACHE_CONTEXT_TTL ou 86400)
+            global_max_age: Validade das respostas compartilhadas, em
+                segundos (padrão: JARVIS_CACHE_GLOBAL_TTL ou 604800)
+            normalizer: Normalizador das perguntas nas chaves (padrão: um
+                PromptNormalizer com as palavras de preenchimento configuradas)
+            similarity: Similaridade mínima para servir a resposta de uma
+                pergunta global parecida (padrão: JARVIS_CACHE_SIMILARITY ou
+                0.85; 0 desativa a busca aproximada)
+        """
+        if context_max_age is None:
+            context_max_age = int(os.getenv("JARVIS_CACHE_CONTEXT_TTL", "86400"))
+        if global_max_age is None:
+            global_max_age = int(os.getenv("JARVIS_CACHE_GLOBAL_TTL", "604800"))
+        self.caches = {
+            SCOPE_GLOBAL: CacheManager(os.path.join(cache_dir, SCOPE_GLOBAL), max_age_seconds=global_max_age),
+            SCOPE_CONTEXT: CacheManager(os.path.join(cache_dir, SCOPE_CONTEXT), max_age_seconds=context_max_age),
+        }
+        self.normalizer = normalizer or PromptNormalizer()
+        if similarity is None:
+            similarity = float(os.getenv("JARVIS_CACHE_SIMILARITY", "0.85"))
+        # Perguntas parecidas (paráfrases) são encontradas por MinHash/LSH.
+        # Só as globais: as do contexto mudam de estado a cada turno e nunca
+        # voltariam a ser encontradas
+        self.near = None
+        if similarity > 0:
+            self.near = NearDuplicateIndex(
+                path=os.path.join(cache_dir, "near_duplicates.jsonl"),
+                threshold=similarity,
+                max_age_seconds=global_max_age,
+            )
+            self.caches[SCOPE_GLOBAL].janitor.add_task(self.near.prune)
+        self._lock = threading.Lock()
+        # normalized_hits: acertos cuja pergunta original diferia da guardada;
+        # near_hits: acertos por similaridade, após uma falta exata
+        self.stats = {"global_hits": 0, "context_hits": 0, "normalized_hits": 0, "near_hits": 0,
+                      "misses": 0, "skipped": 0}
+
+    def key(self, content: Any, assistant: Optional[str], conversation: str,
+            state: Optional[str]) -> Optional[Dict[str, Any]]:
+        """
+        Monta a chave de cache de uma pergunta conforme sua classificação.
+
+        Args:
+            content: Texto da pergunta
+            assistant: Assistente (ou modelo) que responde; respostas
+                globais só são compartilhadas entre conversas do mesmo
+            conversation: ID da conversa atual
+            state: Marcador do estado da conversa antes da pergunta (ID da
+                última mensagem vista, ou resumo do histórico local)
+
+        Returns:
+            Optional[Dict[str, Any]]: Chave, ou None se a pergunta não deve
+            ser cacheada
+        """
+        if not isinstance(content, str) or not content.strip():
+            return None
+        scope = classify(self.normalizer.trim(content))
+        if scope == SCOPE_NONE:
+            self._count("skipped")
+            log.debug("Pergunta dependente do momento, sem cache")
+            return None
+        # A pergunta original acompanha a chave só para as métricas
+        prompt = self.normalizer.normalize(content)
+        if scope == SCOPE_GLOBAL:
+            return {"scope": scope, "content": prompt, "assistant": assistant, "original": content}
+        return {"scope": scope, "content": prompt, "conversation": conversation, "state": state,
+                "original": content}
+
+    @staticmethod
+    def _key_data(key: Dict[str, Any]) -> Dict[str, Any]:
+        """Campos da chave que identificam a entrada (sem a pergunta original)."""
+        return {k: v for k, v in key.items() if k != "original"}
+
+    @staticmethod
+    def _namespace(key: Dict[str, Any]) -> str:
+        """Campos da chave além da pergunta: só entradas iguais nisso se comparam."""
+        return json.dumps({k: v for k, v in key.items() if k not in ("content", "original")}, sort_keys=True)
+
+    def get(self, key: Dict[str, Any]) -> Optional[str]:
+        """
+        Busca a resposta de uma chave.
+
+        Args:
+            key: Chave retornada por key()
+
+        Returns:
+            Optional[str]: Resposta em cache, ou None
+        """
+        cached = self.caches[key["scope"]].get(self._key_data(key))
+        if isinstance(cached, str):
+            # Entrada gravada antes de a pergunta original ser guardada
+            cached = {"response": cached, "prompt": key["original"]}
+        if cached is None:
+            cached = self._get_similar(key)
+            if cached is not None:
+                self._count(f"{key['scope']}_hits")
+                self._count("near_hits")
+                return cached["response"]
+            self._count("misses")
+            return None
+
+        self._count(f"{key['scope']}_hits")
+        if cached.get("prompt") != key["original"]:
+            self._count("normalized_hits")
+            log.debug(f"Acerto no cache ({key['scope']}) graças à normalização: {cached.get('prompt')!r}")
+        else:
+            log.debug(f"Acerto no cache ({key['scope']})")
+        return cached["response"]
+
+    def _get_similar(self, key: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Busca a entrada de uma pergunta parecida com a da chave (só no
+        escopo global).
+
+        Args:
+            key: Chave retornada por key()
+
+        Returns:
+            Optional[Dict[str, Any]]: Entrada em cache, ou None
+        """
+        if self.near is None or key["scope"] != SCOPE_GLOBAL:
+            return None
+        match = self.near.lookup(self._namespace(key), key["content"])
+        if match is None:
+            return None
+        payload, score = match
+        cached = self.caches[key["scope"]].get(json.loads(payload))
+        if not isinstance(cached, dict):
+            # A entrada exata expirou: o índice aponta para nada
+            return None
+        log.info(f"Usando resposta de pergunta parecida ({score:.0%}): {cached.get('prompt')!r}")
+        return cached
+
+    def set(self, key: Dict[str, Any], response: str) -> None:
+        """
+        Guarda a resposta de uma chave.
+
+        Args:
+            key: Chave retornada por key()
+            response: Resposta do assistente
+        """
+        key_data = self._key_data(key)
+        self.caches[key["scope"]].set(key_data, {"response": response, "prompt": key["original"]})
+        if self.near is not None and key["scope"] == SCOPE_GLOBAL:
+            self.near.add(self._namespace(key), key["content"], json.dumps(key_data, sort_keys=True))
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.stats[name] += 1
+
+    def summary(self) -> str:
+        """
+        Resume os acertos do cache na sessão.
+
+        Returns:
+            str: Acertos por escopo (e quantos só ocorreram pela normalização
+            ou por similaridade), faltas, perguntas não cacheáveis e a
+            ocupação da memória
+        """
+        with self._lock:
+            stats = dict(self.stats)
+        lookups = stats["global_hits"] + stats["context_hits"] + stats["misses"]
+        rate = f"{(stats['global_hits'] + stats['context_hits']) / lookups:.0%}" if lookups else "-"
+        tiers = [cache.stats() for cache in self.caches.values()]
+        return (
+            f"Cache de respostas: {stats['global_hits']} acertos globais, {stats['context_hits']} "
+            f"no contexto ({stats['normalized_hits']} graças à normalização, {stats['near_hits']} por "
+            f"similaridade), {stats['misses']} faltas, "
+            f"{stats['skipped']} sem cache (acerto {rate}); em memória "
+            f"{sum(t['entries'] for t in tiers)} entradas, {sum(t['bytes'] for t in tiers) / 1024:.0f} KiB, "
+            f"{sum(t['evictions'] for t in tiers)} descartadas"
+        )
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+# filepath: /home/comunikime/code/jarvis/run_monitor.py
+"""
+Módulo para acompanhamento das runs do assistente, com o agendamento
+adaptativo de consultas de status e o histograma de latência das fases
+de cada run (queued → in_progress → completed).
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+
+from log_manager import LogManager
+
+# Configura o logger
+log = LogManager().logger
+
+# Limites superiores (em segundos) dos buckets do histograma
+_BUCKET_BOUNDS = [0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0, 64.0]
+
+_METRICS_FILE = os.path.expanduser("~/.jarvis/metrics/run_latency.json")
+
+
+class PollSchedule:
+    """Agenda de polling com intervalo crescente, teto e prazo máximo."""
+
+    def __init__(self, initial: float = 0.1, factor: float = 2.0,
+                 max_interval: float = 2.0, deadline: float = 300.0):
+        """
+        Inicializa a agenda de polling.
+
+        Args:
+            initial: Primeiro intervalo entre consultas, em segundos
+            factor: Fator multiplicativo aplicado a cada consulta
+            max_interval: Intervalo máximo entre consultas, em segundos
+            deadline: Tempo máximo total de espera, em segundos
+        """
+        self.initial = initial
+        self.factor = factor
+        self.max_interval = max_interval
+        self.deadline = deadline
+
+    @classmethod
+    def from_env(cls) -> "PollSchedule":
+        """
+        Cria a agenda a partir das variáveis JARVIS_POLL_*.
+
+        Returns:
+            PollSchedule: Agenda configurada
+        """
+        return cls(
+            initial=float(os.getenv("JARVIS_POLL_INITIAL", "0.1")),
+            factor=float(os.getenv("JARVIS_POLL_FACTOR", "2.0")),
+            max_interval=float(os.getenv("JARVIS_POLL_MAX_INTERVAL", "2.0")),
+            deadline=float(os.getenv("JARVIS_POLL_DEADLINE", "300")),
+        )
+
+    def intervals(self) -> Iterator[float]:
+        """
+        Produz os intervalos de espera até o prazo se esgotar.
+
+        O último intervalo é encurtado para não ultrapassar o prazo.
+
+        Yields:
+            float: Próximo intervalo de espera, em segundos
+        """
+        start = time.monotonic()
+        interval = self.initial
+        while True:
+            remaining = self.deadline - (time.monotonic() - start)
+            if remaining <= 0:
+                return
+            yield min(interval, remaining)
+            interval = min(interval * self.factor, self.max_interval)
+
+
+class LatencyHistogram:
+    """Histograma persistente de latências por fase das runs."""
+
+    def __init__(self, path: str = _METRICS_FILE):
+        """
+        Inicializa o histograma, carregando contagens salvas.
+
+        Args:
+            path: Arquivo JSON onde as contagens são persistidas
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self.phases: Dict[str, Dict[str, float]] = {}
+        try:
+            with open(self.path) as fp:
+                self.phases = json.load(fp)
+        except FileNotFoundError:
+            pass
+        except (json.JSONDecodeError, OSError) as e:
+            log.error(f"Erro ao carregar histograma de latência: {e}")
+
+    def _empty_phase(self) -> Dict[str, float]:
+        return {"count": 0, "sum": 0.0, "buckets": [0] * (len(_BUCKET_BOUNDS) + 1)}
+
+    def record(self, phase: str, seconds: float) -> None:
+        """
+        Registra uma amostra de latência em memória.
+
+        Args:
+            phase: Nome da fase (queued, in_progress, total)
+            seconds: Duração observada, em segundos
+        """
+        with self._lock:
+            data = self.phases.setdefault(phase, self._empty_phase())
+            index = len(_BUCKET_BOUNDS)
+            for i, bound in enumerate(_BUCKET_BOUNDS):
+                if seconds <= bound:
+                    index = i
+                    break
+            data["buckets"][index] += 1
+            data["count"] += 1
+            data["sum"] += seconds
+
+    def save(self) -> None:
+        """Persiste as contagens no arquivo de métricas."""
+        with self._lock:
+            snapshot = json.dumps(self.phases, indent=2)
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "w") as fp:
+                fp.write(snapshot)
+        except OSError as e:
+            log.error(f"Erro ao salvar histograma de latência: {e}")
+
+    def percentile(self, phase: str, fraction: float) -> Optional[float]:
+        """
+        Estima um percentil a partir dos buckets.
+
+        Args:
+            phase: Nome da fase
+            fraction: Percentil desejado entre 0 e 1 (ex: 0.9)
+
+        Returns:
+            Optional[float]: Limite superior do bucket que contém o percentil,
+            ou None se não houver amostras (inf para o último bucket)
+        """
+        data = self.phases.get(phase)
+        if not data or not data["count"]:
+            return None
+        target = fraction * data["count"]
+        accumulated = 0
+        for i, count in enumerate(data["buckets"]):
+            accumulated += count
+            if accumulated >= target:
+                return _BUCKET_BOUNDS[i] if i < len(_BUCKET_BOUNDS) else float("inf")
+        return float("inf")
+
+    def summary(self) -> str:
+        """
+        Formata um resumo legível das latências por fase.
+
+        Returns:
+            str: Resumo com contagem, média, p50 e p90 de cada fase
+        """
+        lines: List[str] = []
+        for phase, data in sorted(self.phases.items()):
+            if not data["count"]:
+                continue
+            mean = data["sum"] / data["count"]
+            lines.append(
+                f"{phase}: n={data['count']} média={mean:.2f}s "
+                f"p50<={self.percentile(phase, 0.5)}s p90<={self.percentile(phase, 0.9)}s"
+            )
+        return "\n".join(lines) or "Nenhuma run registrada."
+
+
+class RunTimer:
+    """Cronometra as transições de status de uma run."""
+
+    def __init__(self, histogram: LatencyHistogram):
+        """
+        Inicia a cronometragem de uma run recém-criada.
+
+        Args:
+            histogram: Histograma onde as fases serão registradas
+        """
+        self.histogram = histogram
+        self.started = time.monotonic()
+        self.transitions: Dict[str, float] = {}
+
+    def observe(self, status: str) -> None:
+        """
+        Registra o primeiro instante em que um status foi observado.
+
+        Args:
+            status: Status atual da run
+        """
+        self.transitions.setdefault(status, time.monotonic())
+
+    def finish(self) -> None:
+        """Registra as durações das fases no histograma e o persiste."""
+        in_progress = self.transitions.get("in_progress")
+        completed = self.transitions.get("completed")
+        if in_progress is not None:
+            self.histogram.record("queued", in_progress - self.started)
+            if completed is not None:
+                self.histogram.record("in_progress", completed - in_progress)
+        if completed is not None:
+            self.histogram.record("total", completed - self.started)
+        self.histogram.save()
+
+
+if __name__ == "__main__":
+    print(LatencyHistogram().summary())
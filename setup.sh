@@ -67,7 +67,7 @@ fi
 # Instalar dependências Python
 log_info "Instalando dependências Python..."
 pip install --upgrade pip
-pip install -q "openai==1.*" "SpeechRecognition==3.*" "requests" "pygame" "python-dotenv>=1.0.0" "coloredlogs"
+pip install -q "openai==1.*" "SpeechRecognition==3.*" "requests" "pygame" "python-dotenv>=1.0.0" "coloredlogs" "pillow"
 
 # Criar diretórios de cache e logs
 mkdir -p ~/.jarvis/cache ~/.jarvis/logs
@@ -126,4 +126,5 @@ fi
 log_success "Configuração concluída! Você pode executar o Jarvis com: python jarvis.py"
 log_info "Para modo de texto apenas: python jarvis.py --text"
 log_info "Para analisar uma imagem: python jarvis.py --image caminho/para/imagem.jpg"
+log_info "Para analisar uma pasta de imagens: python jarvis.py --image caminho/para/pasta --output resultados.jsonl"
 log_info "Para modo de depuração: python jarvis.py --debug"
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# filepath: /home/comunikime/code/jarvis/startup.py
+"""
+Módulo para orquestrar a inicialização do Jarvis, executando em paralelo
+os componentes independentes (OpenAI, GitHub, áudio) e medindo o tempo de
+cada um.
+"""
+
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from log_manager import LogManager
+
+# Configura o logger
+log = LogManager().logger
+
+class StartupOrchestrator:
+    """Inicializa componentes concorrentemente e reporta o tempo de cada um."""
+
+    def __init__(self, max_workers: int = 4):
+        """
+        Inicializa o orquestrador.
+
+        Args:
+            max_workers: Número máximo de componentes inicializados ao mesmo tempo
+        """
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="jarvis-startup")
+        self.started = time.perf_counter()
+        self.futures: Dict[str, Future] = {}
+        self.timings: Dict[str, float] = {}
+        self.reported = False
+
+    def add(self, name: str, func: Callable[..., Any], *args, **kwargs) -> Future:
+        """
+        Agenda a inicialização de um componente.
+
+        Args:
+            name: Nome do componente (usado no relatório)
+            func: Função que cria ou prepara o componente
+            *args: Argumentos posicionais para func
+            **kwargs: Argumentos nomeados para func
+
+        Returns:
+            Future: Resultado futuro da inicialização
+        """
+        def run():
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.timings[name] = time.perf_counter() - start
+                # Após o relatório, componentes tardios são anunciados no log
+                level = log.info if self.reported else log.debug
+                level(f"Componente '{name}' inicializado em {self.timings[name]:.2f}s")
+
+        future = self.executor.submit(run)
+        self.futures[name] = future
+        return future
+
+    def wait_for(self, *names: str) -> Dict[str, Any]:
+        """
+        Aguarda os componentes indicados, deixando os demais em andamento.
+
+        Args:
+            *names: Nomes dos componentes necessários
+
+        Returns:
+            Dict[str, Any]: Resultado de cada componente aguardado
+
+        Raises:
+            Exception: A primeira falha de inicialização encontrada
+        """
+        return {name: self.futures[name].result() for name in names}
+
+    def report(self) -> None:
+        """Registra no log o tempo de inicialização de cada componente."""
+        self.reported = True
+        elapsed = time.perf_counter() - self.started
+        log.info(f"Inicialização concluída em {elapsed:.2f}s")
+        for name, future in self.futures.items():
+            if name in self.timings:
+                status = "falhou" if future.done() and future.exception() else "pronto"
+                log.info(f"  {name}: {self.timings[name]:.2f}s ({status})")
+            else:
+                log.info(f"  {name}: em andamento (segundo plano)")
+
+    def shutdown(self) -> None:
+        """Libera o pool sem aguardar componentes ainda em andamento."""
+        self.executor.shutdown(wait=False)
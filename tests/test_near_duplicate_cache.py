@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# filepath: /home/comunikime/code/jarvis/tests/test_near_duplicate_cache.py
+"""
+Testes do cache de perguntas parecidas: paráfrases que devem reaproveitar a
+resposta e quase-duplicatas (outros números, operadores ou linguagens) que
+nunca podem recebê-la.
+
+Uso: python -m pytest tests
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from near_duplicate_cache import NearDuplicateIndex, exact_tokens, jaccard  # noqa: E402
+from prompt_normalizer import PromptNormalizer  # noqa: E402
+from response_cache import ResponseCache  # noqa: E402
+
+PARAPHRASES = [
+    ("O que é a fotossíntese nas plantas verdes?", "o que é fotossíntese nas plantas verdes"),
+    ("Explique como funciona o protocolo TCP", "Jarvis, explique como funciona o protocolo TCP?"),
+    ("Quantos são 2+2?", "quantos são 2 + 2"),
+    ("Quem escreveu o livro Dom Casmurro, de Machado de Assis?",
+     "quem escreveu o livro Dom Casmurro do Machado de Assis"),
+]
+
+NEAR_MISSES = [
+    ("Quantos são 2+2?", "Quantos são 2*3?"),
+    ("Quantos são 2+2?", "Quantos são 2-2?"),
+    ("Quantos são 2+2?", "Quantos são 2+3?"),
+    ("O que é C++?", "O que é C#?"),
+    ("O que é C#?", "O que é C?"),
+    ("Converta -40 graus Celsius para Fahrenheit", "Converta 40 graus Celsius para Fahrenheit"),
+    ("Qual é a capital da Austrália?", "Qual é a capital da Áustria?"),
+]
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("JARVIS_CACHE_JANITOR_INTERVAL", "0")
+    monkeypatch.setenv("JARVIS_CACHE_WRITE_BEHIND", "0")
+    return ResponseCache(str(tmp_path))
+
+
+@pytest.mark.parametrize("stored,asked", PARAPHRASES)
+def test_paraphrase_hits(cache, stored, asked):
+    cache.set(cache.key(stored, "asst", "thread-a", "msg-1"), "resposta")
+    assert cache.get(cache.key(asked, "asst", "thread-b", "msg-9")) == "resposta"
+
+
+@pytest.mark.parametrize("stored,asked", NEAR_MISSES)
+def test_near_miss_is_not_served(cache, stored, asked):
+    cache.set(cache.key(stored, "asst", "thread-a", "msg-1"), "resposta")
+    assert cache.get(cache.key(asked, "asst", "thread-b", "msg-9")) is None
+
+
+@pytest.mark.parametrize("stored,asked", NEAR_MISSES)
+def test_index_rejects_near_miss(stored, asked):
+    normalizer = PromptNormalizer()
+    index = NearDuplicateIndex(threshold=0.85)
+    index.add("ns", normalizer.normalize(stored), "payload")
+    assert index.lookup("ns", normalizer.normalize(asked)) is None
+
+
+def test_short_prompt_uses_exact_similarity():
+    # A estimativa MinHash destas duas passa de 0.9; a similaridade real é 0.8
+    index = NearDuplicateIndex(threshold=0.85)
+    index.add("ns", "quantos sao 2 2", "payload")
+    assert jaccard("quantos sao 2 2", "quantos sao 2 3") < 0.85
+    assert index.lookup("ns", "quantos sao 2 3") is None
+
+
+def test_exact_tokens():
+    assert exact_tokens("quantos sao 2 + 2") == ("2", "+", "2")
+    assert exact_tokens("o que e c++") == ("c++",)
+    assert exact_tokens("converta -40 graus") == ("-40",)
+    assert exact_tokens("o que e fotossintese") == ()
+
+
+def test_namespaces_do_not_mix():
+    index = NearDuplicateIndex(threshold=0.85)
+    index.add("a", "o que e fotossintese nas plantas verdes", "payload")
+    assert index.lookup("b", "o que e fotossintese nas plantas verdes") is None
+    assert index.lookup("a", "o que e fotossintese nas plantas verdes") == ("payload", 1.0)
+
+
+def test_context_questions_are_not_indexed(cache):
+    key = cache.key("Explique de novo o código do arquivo principal do projeto", "asst", "thread-a", "msg-1")
+    assert key["scope"] == "context"
+    cache.set(key, "resposta")
+    assert len(cache.near) == 0
+
+
+def test_prune_drops_expired_and_excess_entries(tmp_path):
+    path = str(tmp_path / "near.jsonl")
+    index = NearDuplicateIndex(path=path, threshold=0.85, max_age_seconds=3600, max_entries=1)
+    for subject in ("fotossintese nas plantas", "protocolo tcp na rede", "compilador da linguagem"):
+        index.add("ns", f"o que e o processo de {subject}", subject)
+    index._entries.created[0] -= 7200
+    assert index.prune() == 2
+    assert len(index) == 1
+    assert index.lookup("ns", "o que e o processo de fotossintese nas plantas") is None
+    assert index.lookup("ns", "o que e o processo de protocolo tcp na rede") is None
+    assert index.lookup("ns", "o que e o processo de compilador da linguagem")[0] == "compilador da linguagem"
+    reloaded = NearDuplicateIndex(path=path, threshold=0.85, max_age_seconds=3600)
+    assert reloaded.wait_loaded(5)
+    assert len(reloaded) == 1
+
+
+def test_load_reuses_saved_signatures(tmp_path, monkeypatch):
+    path = str(tmp_path / "near.jsonl")
+    index = NearDuplicateIndex(path=path, threshold=0.85)
+    index.add("ns", "o que e o processo de fotossintese nas plantas", "payload")
+
+    def recompute(self, text):
+        raise AssertionError("assinatura recalculada na carga")
+
+    monkeypatch.setattr(NearDuplicateIndex, "signature", recompute)
+    reloaded = NearDuplicateIndex(path=path, threshold=0.85)
+    assert reloaded.wait_loaded(5)
+    monkeypatch.undo()
+    assert reloaded.lookup("ns", "o que e o processo da fotossintese nas plantas")[0] == "payload"
+
+
+def test_entries_added_while_loading_are_kept(tmp_path):
+    path = str(tmp_path / "near.jsonl")
+    first = NearDuplicateIndex(path=path, threshold=0.85)
+    first.add("ns", "o que e o processo de fotossintese nas plantas", "antiga")
+    reloaded = NearDuplicateIndex(path=path, threshold=0.85)
+    reloaded.add("ns", "como funciona o protocolo tcp na rede", "nova")
+    assert reloaded.wait_loaded(5)
+    assert len(reloaded) == 2
+    assert reloaded.lookup("ns", "o que e o processo de fotossintese nas plantas")[0] == "antiga"
+    assert reloaded.lookup("ns", "como funciona o protocolo tcp na rede")[0] == "nova"
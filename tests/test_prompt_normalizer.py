@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# filepath: /home/comunikime/code/jarvis/tests/test_prompt_normalizer.py
+"""
+Testes da normalização das perguntas: a hesitação inicial da fala ("É...")
+sai da chave, mas o "é" da própria pergunta fica.
+
+Uso: python -m pytest tests
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from prompt_normalizer import PromptNormalizer  # noqa: E402
+from response_cache import ResponseCache  # noqa: E402
+
+
+@pytest.mark.parametrize("spoken", [
+    "É... tipo, o que é fotossíntese?",
+    "é… o que é fotossíntese",
+    "Eh, o que é fotossíntese?",
+])
+def test_leading_hesitation_is_removed(spoken):
+    normalizer = PromptNormalizer()
+    assert normalizer.normalize(spoken) == normalizer.normalize("O que é fotossíntese?")
+    assert normalizer.trim(spoken) == "o que e fotossintese"
+
+
+@pytest.mark.parametrize("text,expected", [
+    ("É a capital da França?", "e a capital da franca"),
+    ("E, depois, o que aconteceu?", "e depois o que aconteceu"),
+    ("Quanto é 2+2?", "quanto e 2 + 2"),
+])
+def test_meaningful_e_is_kept(text, expected):
+    assert PromptNormalizer().normalize(text) == expected
+
+
+def test_hesitant_question_hits_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("JARVIS_CACHE_JANITOR_INTERVAL", "0")
+    monkeypatch.setenv("JARVIS_CACHE_WRITE_BEHIND", "0")
+    cache = ResponseCache(str(tmp_path))
+    stored = cache.key("O que é fotossíntese?", "asst", "thread-a", "msg-1")
+    asked = cache.key("É... tipo, o que é fotossíntese?", "asst", "thread-b", "msg-9")
+    assert asked["scope"] == stored["scope"] == "global"
+    cache.set(stored, "resposta")
+    assert cache.get(asked) == "resposta"
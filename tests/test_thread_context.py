@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# filepath: /home/comunikime/code/jarvis/tests/test_thread_context.py
+"""
+Testes do resumo enviado ao compactar uma thread: o resumo de uma
+compactação anterior continua na transcrição mesmo fora da janela de
+mensagens recentes.
+
+Uso: python -m pytest tests
+"""
+
+import os
+import sys
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from thread_context import ThreadContextManager  # noqa: E402
+
+
+def message(message_id, role, text):
+    part = SimpleNamespace(type="text", text=SimpleNamespace(value=text))
+    return SimpleNamespace(id=message_id, role=role, content=[part])
+
+
+def transcript(context, messages, first=None):
+    return context.summary_request(messages, first=first)[1]["content"]
+
+
+def test_seed_outside_window_is_kept():
+    context = ThreadContextManager(strategy="summary", keep_messages=2)
+    seed = message("msg-0", "assistant", context.seed_message("O usuário prefere Python."))
+    recent = [message("msg-8", "user", "E agora?"), message("msg-9", "assistant", "Pronto.")]
+    text = transcript(context, recent, first=seed)
+    assert text.startswith("Jarvis: Resumo da conversa anterior")
+    assert "O usuário prefere Python." in text
+    assert text.endswith("Jarvis: Pronto.")
+
+
+def test_seed_inside_window_is_not_repeated():
+    context = ThreadContextManager(strategy="summary", keep_messages=2)
+    seed = message("msg-0", "assistant", context.seed_message("O usuário prefere Python."))
+    recent = [seed, message("msg-1", "user", "E agora?")]
+    assert transcript(context, recent, first=seed).count("O usuário prefere Python.") == 1
+
+
+def test_first_message_that_is_not_a_seed_is_ignored():
+    context = ThreadContextManager(strategy="summary", keep_messages=1)
+    first = message("msg-0", "user", "Olá, Jarvis")
+    text = transcript(context, [message("msg-9", "assistant", "Pronto.")], first=first)
+    assert text == "Jarvis: Pronto."
+
+
+def test_truncate_stays_on_across_turns():
+    context = ThreadContextManager(strategy="truncate", max_tokens=16000, keep_messages=20)
+    full = 0
+    truncated_runs = []
+    for _ in range(30):
+        full += 1500
+        options = context.run_options("thread-a")
+        truncated_runs.append(bool(options))
+        # Uma run truncada lê só as últimas mensagens
+        read = 3000 if options else full
+        usage = SimpleNamespace(prompt_tokens=read, completion_tokens=200)
+        context.observe("thread-a", SimpleNamespace(usage=usage))
+    first = truncated_runs.index(True)
+    assert first > 0
+    assert all(truncated_runs[first:])
+    assert context.run_options("thread-b") == {}
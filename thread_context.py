@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# filepath: /home/comunikime/code/jarvis/thread_context.py
+"""
+Módulo de controle do tamanho do contexto das threads: acompanha os tokens
+lidos por cada run e, acima de um limite, troca a conversa para uma thread
+nova semeada com um resumo ("summary") ou limita as mensagens lidas pela
+run ("truncate"), para que a latência não cresça com o histórico.
+"""
+
+import os
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from log_manager import LogManager
+from rate_limiter import estimate_tokens
+
+# Configura o logger
+log = LogManager().logger
+
+_STRATEGIES = ("summary", "truncate", "none")
+
+_SUMMARY_PROMPT = (
+    "Resuma a conversa abaixo entre o usuário e o assistente Jarvis em até "
+    "{words} palavras, em português. Preserve fatos, decisões, preferências "
+    "do usuário, nomes de arquivos e pendências; omita cumprimentos."
+)
+
+_SEED_PREFIX = "Resumo da conversa anterior (continuação desta conversa):\n\n"
+
+# Caracteres de cada mensagem mantidos na transcrição enviada ao resumo
+_TRANSCRIPT_MESSAGE_CHARS = 2000
+
+
+def _message_text(message: Any) -> str:
+    """Texto de uma mensagem da thread, sem as partes de imagem."""
+    return " ".join(item.text.value for item in message.content if item.type == "text").strip()
+
+
+class ThreadContextManager:
+    """Estimativa do tamanho das threads e política de rolagem."""
+
+    def __init__(self, usage=None, strategy: Optional[str] = None, max_tokens: Optional[int] = None,
+                 keep_messages: Optional[int] = None, summary_model: Optional[str] = None,
+                 summary_words: int = 250):
+        """
+        Inicializa o controle de contexto.
+
+        Args:
+            usage: UsageTracker usado para recuperar o tamanho de threads
+                retomadas (tokens de entrada da última run registrada)
+            strategy: "summary", "truncate" ou "none" (padrão:
+                JARVIS_CONTEXT_STRATEGY ou summary)
+            max_tokens: Tamanho da thread que dispara a estratégia (padrão:
+                JARVIS_CONTEXT_MAX_TOKENS ou 16000)
+            keep_messages: Mensagens resumidas ("summary") ou lidas pela run
+                ("truncate") (padrão: JARVIS_CONTEXT_KEEP_MESSAGES ou 20)
+            summary_model: Modelo que escreve o resumo (padrão:
+                JARVIS_CONTEXT_SUMMARY_MODEL ou gpt-4o-mini)
+            summary_words: Tamanho máximo do resumo, em palavras
+        """
+        strategy = (strategy or os.getenv("JARVIS_CONTEXT_STRATEGY", "summary")).lower()
+        if strategy not in _STRATEGIES:
+            log.warning(f"Estratégia de contexto desconhecida: {strategy}; usando summary")
+            strategy = "summary"
+        if max_tokens is None:
+            max_tokens = int(os.getenv("JARVIS_CONTEXT_MAX_TOKENS", "16000"))
+        if keep_messages is None:
+            keep_messages = int(os.getenv("JARVIS_CONTEXT_KEEP_MESSAGES", "20"))
+        self.strategy = strategy
+        self.max_tokens = max_tokens
+        self.keep_messages = keep_messages
+        self.summary_model = summary_model or os.getenv("JARVIS_CONTEXT_SUMMARY_MODEL", "gpt-4o-mini")
+        self.summary_words = summary_words
+        self.usage = usage
+        self.sizes: Dict[str, int] = {}
+        # Threads que já passaram do limite na estratégia "truncate": as runs
+        # truncadas leem pouco, então o tamanho observado não volta a indicar
+        # o histórico completo
+        self.truncated: Set[str] = set()
+
+    def size(self, thread_id: str) -> int:
+        """
+        Tamanho aproximado da thread, em tokens.
+
+        Args:
+            thread_id: ID da thread
+
+        Returns:
+            int: Tokens lidos pela última run (0 se a thread for desconhecida)
+        """
+        if thread_id not in self.sizes:
+            last = self.usage.last_prompt_tokens(thread_id) if self.usage else None
+            self.sizes[thread_id] = last or 0
+        return self.sizes[thread_id]
+
+    def observe(self, thread_id: str, run) -> None:
+        """
+        Atualiza o tamanho da thread com o uso de uma run concluída.
+
+        A próxima run lê a entrada desta mais a resposta produzida.
+
+        Args:
+            thread_id: ID da thread
+            run: Objeto Run com o campo usage
+        """
+        usage = getattr(run, "usage", None)
+        if usage is not None:
+            self.sizes[thread_id] = usage.prompt_tokens + usage.completion_tokens
+
+    def needs_rollover(self, thread_id: str) -> bool:
+        """
+        Verifica se a conversa deve passar para uma thread nova.
+
+        Args:
+            thread_id: ID da thread atual
+
+        Returns:
+            bool: True na estratégia "summary" com a thread acima do limite
+        """
+        return self.strategy == "summary" and self.size(thread_id) > self.max_tokens
+
+    def run_options(self, thread_id: str) -> Dict[str, Any]:
+        """
+        Parâmetros de truncamento da run para a estratégia "truncate".
+
+        Args:
+            thread_id: ID da thread
+
+        Returns:
+            Dict[str, Any]: truncation_strategy quando a thread passou do
+            limite (nesta ou em uma run anterior); vazio nos demais casos
+        """
+        if self.strategy != "truncate":
+            return {}
+        if thread_id in self.truncated or self.size(thread_id) > self.max_tokens:
+            self.truncated.add(thread_id)
+            return {"truncation_strategy": {"type": "last_messages", "last_messages": self.keep_messages}}
+        return {}
+
+    def is_seed(self, message: Any) -> bool:
+        """
+        Verifica se a mensagem é o resumo que abriu uma thread compactada.
+
+        Args:
+            message: Mensagem da thread
+
+        Returns:
+            bool: True para a mensagem semeada por seed_message
+        """
+        return message.role == "assistant" and _message_text(message).startswith(_SEED_PREFIX)
+
+    def summary_request(self, messages: Iterable[Any], first: Any = None) -> List[Dict[str, str]]:
+        """
+        Monta o pedido de chat completions que resume a conversa.
+
+        Args:
+            messages: Últimas mensagens da thread em ordem cronológica
+            first: Primeira mensagem da thread; se for o resumo de uma
+                compactação anterior que ficou fora de messages, abre a
+                transcrição, para que o histórico mais antigo não se perca
+
+        Returns:
+            List[Dict[str, str]]: Mensagens de sistema e de usuário
+        """
+        messages = list(messages)
+        if first is not None and self.is_seed(first) and all(m.id != first.id for m in messages):
+            messages.insert(0, first)
+        lines = []
+        for message in messages:
+            text = _message_text(message) or "[imagem]"
+            speaker = "Usuário" if message.role == "user" else "Jarvis"
+            lines.append(f"{speaker}: {text[:_TRANSCRIPT_MESSAGE_CHARS]}")
+        return [
+            {"role": "system", "content": _SUMMARY_PROMPT.format(words=self.summary_words)},
+            {"role": "user", "content": "\n\n".join(lines)},
+        ]
+
+    def seed_message(self, summary: str) -> str:
+        """
+        Texto da mensagem que abre a thread nova.
+
+        Args:
+            summary: Resumo da conversa anterior
+
+        Returns:
+            str: Mensagem com o resumo
+        """
+        return _SEED_PREFIX + summary.strip()
+
+    def rolled(self, old_thread: str, new_thread: str, seed: str) -> int:
+        """
+        Registra a troca de thread e loga o tamanho antes e depois.
+
+        Args:
+            old_thread: Thread abandonada
+            new_thread: Thread nova, já semeada
+            seed: Mensagem de resumo enviada à thread nova
+
+        Returns:
+            int: Tokens estimados da thread abandonada
+        """
+        before = self.size(old_thread)
+        after = estimate_tokens(seed)
+        self.sizes[new_thread] = after
+        log.info(
+            f"Contexto da conversa compactado: thread {old_thread} (~{before} tokens) -> "
+            f"thread {new_thread} (~{after} tokens)"
+        )
+        return before
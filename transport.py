@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+# filepath: /home/comunikime/code/jarvis/transport.py
+"""
+Módulo com a camada HTTP compartilhada do Jarvis: um único pool de conexões
+(keep-alive, timeouts e HTTP/2 opcional) usado por chat, assistentes, TTS
+e uploads, as configurações equivalentes para o cliente do GitHub e
+estatísticas de reaproveitamento de conexões.
+"""
+
+import importlib.util
+import os
+import threading
+from typing import Any, Dict, Optional
+
+from lazy_import import lazy_import
+from log_manager import LogManager
+from rate_limiter import RequestScheduler
+
+# Configura o logger
+log = LogManager().logger
+
+httpx = lazy_import("httpx")
+openai = lazy_import("openai")
+
+
+class TransportStats:
+    """Contadores de requisições, conexões novas e handshakes TLS."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connections = 0
+        self.tls_handshakes = 0
+
+    def record_request(self) -> None:
+        """Conta uma resposta recebida."""
+        with self._lock:
+            self.requests += 1
+
+    def record_event(self, event_name: str) -> None:
+        """
+        Conta os eventos de trace do httpcore que indicam conexão nova.
+
+        Args:
+            event_name: Nome do evento (ex: "connection.connect_tcp.complete")
+        """
+        with self._lock:
+            if event_name == "connection.connect_tcp.complete":
+                self.connections += 1
+            elif event_name == "connection.start_tls.complete":
+                self.tls_handshakes += 1
+
+    def reuse_ratio(self) -> Optional[float]:
+        """
+        Fração das requisições atendidas por conexões já abertas.
+
+        Returns:
+            Optional[float]: Entre 0 e 1, ou None se não houve requisições
+        """
+        with self._lock:
+            if not self.requests:
+                return None
+            return max(0.0, 1.0 - self.connections / self.requests)
+
+    def summary(self) -> str:
+        """
+        Formata as estatísticas de transporte.
+
+        Returns:
+            str: Resumo com requisições, conexões, handshakes e reaproveitamento
+        """
+        ratio = self.reuse_ratio()
+        reuse = f"{ratio:.0%}" if ratio is not None else "-"
+        return (
+            f"HTTP: {self.requests} requisições, {self.connections} conexões novas, "
+            f"{self.tls_handshakes} handshakes TLS, reaproveitamento {reuse}"
+        )
+
+
+class HttpTransport:
+    """Fábrica dos clientes HTTP compartilhados (OpenAI e GitHub)."""
+
+    _shared: Optional["HttpTransport"] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, max_connections: int = 20, max_keepalive: int = 10, keepalive_expiry: float = 60.0,
+                 connect_timeout: float = 5.0, read_timeout: float = 120.0, http2: bool = False,
+                 github_timeout: float = 15.0):
+        """
+        Inicializa a fábrica sem abrir conexões.
+
+        Args:
+            max_connections: Máximo de conexões simultâneas no pool
+            max_keepalive: Máximo de conexões ociosas mantidas abertas
+            keepalive_expiry: Segundos que uma conexão ociosa fica aberta
+            connect_timeout: Prazo para abrir uma conexão, em segundos
+            read_timeout: Prazo entre leituras da resposta, em segundos
+            http2: Usa HTTP/2 (requer o pacote h2)
+            github_timeout: Prazo das requisições do PyGithub, em segundos (o
+                read_timeout, longo por causa das respostas em streaming, vale
+                só para a OpenAI)
+        """
+        self.max_connections = max_connections
+        self.max_keepalive = max_keepalive
+        self.keepalive_expiry = keepalive_expiry
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.github_timeout = github_timeout
+        if http2 and importlib.util.find_spec("h2") is None:
+            log.warning("HTTP/2 solicitado, mas o pacote h2 não está instalado; usando HTTP/1.1")
+            http2 = False
+        self.http2 = http2
+        self.stats = TransportStats()
+        self._lock = threading.Lock()
+        self._client = None
+        self._async_client = None
+
+    @classmethod
+    def shared(cls) -> "HttpTransport":
+        """
+        Retorna a fábrica do processo, configurada pelas variáveis JARVIS_HTTP_*.
+
+        Returns:
+            HttpTransport: Fábrica compartilhada
+        """
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls(
+                    max_connections=int(os.getenv("JARVIS_HTTP_MAX_CONNECTIONS", "20")),
+                    max_keepalive=int(os.getenv("JARVIS_HTTP_MAX_KEEPALIVE", "10")),
+                    keepalive_expiry=float(os.getenv("JARVIS_HTTP_KEEPALIVE_EXPIRY", "60")),
+                    connect_timeout=float(os.getenv("JARVIS_HTTP_CONNECT_TIMEOUT", "5")),
+                    read_timeout=float(os.getenv("JARVIS_HTTP_READ_TIMEOUT", "120")),
+                    http2=os.getenv("JARVIS_HTTP2", "0").lower() in ("1", "true", "sim"),
+                    github_timeout=float(os.getenv("JARVIS_GITHUB_TIMEOUT", "15")),
+                )
+            return cls._shared
+
+    @classmethod
+    def active(cls) -> Optional["HttpTransport"]:
+        """Retorna a fábrica compartilhada, se já tiver sido criada."""
+        return cls._shared
+
+    def _options(self) -> Dict[str, Any]:
+        """Limites, timeouts e versão HTTP comuns aos clientes síncrono e assíncrono."""
+        return {
+            "limits": httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive,
+                keepalive_expiry=self.keepalive_expiry,
+            ),
+            "timeout": httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+            "http2": self.http2,
+        }
+
+    def _trace(self, event_name: str, info: Dict[str, Any]) -> None:
+        self.stats.record_event(event_name)
+
+    async def _trace_async(self, event_name: str, info: Dict[str, Any]) -> None:
+        self.stats.record_event(event_name)
+
+    def _on_request(self, request) -> None:
+        request.extensions["trace"] = self._trace
+
+    async def _on_request_async(self, request) -> None:
+        request.extensions["trace"] = self._trace_async
+
+    def _on_response(self, response) -> None:
+        self.stats.record_request()
+
+    async def _on_response_async(self, response) -> None:
+        self.stats.record_request()
+
+    def openai_http_client(self):
+        """
+        Cliente httpx síncrono compartilhado para os clientes OpenAI.
+
+        Returns:
+            httpx.Client: Cliente com o pool, o trace de conexões e o hook
+            do agendador de requisições
+        """
+        with self._lock:
+            if self._client is None:
+                scheduler_hooks = RequestScheduler.shared().http_hooks()
+                self._client = openai.DefaultHttpxClient(
+                    event_hooks={
+                        "request": [self._on_request],
+                        "response": [self._on_response] + scheduler_hooks["response"],
+                    },
+                    **self._options()
+                )
+                log.debug(f"Transporte HTTP criado (http2={self.http2}, conexões={self.max_connections})")
+            return self._client
+
+    def openai_async_http_client(self):
+        """
+        Cliente httpx assíncrono compartilhado para o AsyncOpenAI.
+
+        Returns:
+            httpx.AsyncClient: Cliente com o pool, o trace de conexões e o
+            hook do agendador de requisições
+        """
+        with self._lock:
+            if self._async_client is None:
+                scheduler_hooks = RequestScheduler.shared().http_hooks(asynchronous=True)
+                self._async_client = openai.DefaultAsyncHttpxClient(
+                    event_hooks={
+                        "request": [self._on_request_async],
+                        "response": [self._on_response_async] + scheduler_hooks["response"],
+                    },
+                    **self._options()
+                )
+            return self._async_client
+
+    def github_options(self) -> Dict[str, Any]:
+        """
+        Configurações equivalentes para o PyGithub (sessão requests própria).
+
+        Returns:
+            Dict[str, Any]: Argumentos timeout e pool_size para github.Github
+        """
+        return {"timeout": max(1, int(self.github_timeout)), "pool_size": self.max_keepalive}
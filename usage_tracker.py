@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+# filepath: /home/comunikime/code/jarvis/usage_tracker.py
+"""
+Módulo de contabilidade de uso da OpenAI: registra os tokens de cada run,
+chamada de chat completions e síntese de voz em um banco SQLite local,
+agrega o consumo por turno, thread, sessão e dia e aplica os orçamentos
+diários (o suave troca para um modelo mais barato, o rígido recusa turnos).
+
+Relatório: python usage_tracker.py [--days 7] [--by day|thread]
+"""
+
+import argparse
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from log_manager import LogManager
+
+# Configura o logger
+log = LogManager().logger
+
+_DB_FILE = os.path.expanduser("~/.jarvis/usage.db")
+
+# Preços em US$ por milhão de tokens (entrada, saída); para TTS, por milhão
+# de caracteres. Modelos desconhecidos são contabilizados sem custo.
+PRICES = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "tts-1": (15.00, 0.0),
+    "tts-1-hd": (30.00, 0.0),
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS usage (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created REAL NOT NULL,
+    day TEXT NOT NULL,
+    session TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    thread_id TEXT,
+    run_id TEXT,
+    model TEXT,
+    prompt_tokens INTEGER NOT NULL DEFAULT 0,
+    completion_tokens INTEGER NOT NULL DEFAULT 0,
+    characters INTEGER NOT NULL DEFAULT 0,
+    cost REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS usage_day ON usage (day);
+CREATE INDEX IF NOT EXISTS usage_thread ON usage (thread_id);
+"""
+
+
+class BudgetExceeded(Exception):
+    """Orçamento diário rígido esgotado."""
+
+
+def price_of(model: Optional[str], prompt_tokens: int = 0, completion_tokens: int = 0,
+             characters: int = 0) -> float:
+    """
+    Calcula o custo estimado de uma chamada.
+
+    Modelos com data (ex: "gpt-4o-2024-08-06") usam o preço do modelo base.
+
+    Args:
+        model: Nome do modelo
+        prompt_tokens: Tokens de entrada
+        completion_tokens: Tokens de saída
+        characters: Caracteres sintetizados (TTS)
+
+    Returns:
+        float: Custo em US$
+    """
+    prices = None
+    if model:
+        base = max((name for name in PRICES if model == name or model.startswith(name + "-")),
+                   key=len, default=None)
+        prices = PRICES.get(base)
+    if prices is None:
+        return 0.0
+    per_input, per_output = prices
+    return ((prompt_tokens + characters) * per_input + completion_tokens * per_output) / 1_000_000
+
+
+class UsageTracker:
+    """Registro persistente do consumo de tokens e dos orçamentos diários."""
+
+    _shared: Optional["UsageTracker"] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, path: str = _DB_FILE, soft_budget: Optional[float] = None,
+                 hard_budget: Optional[float] = None, fallback_model: Optional[str] = None):
+        """
+        Inicializa o registro, criando o banco se necessário.
+
+        Args:
+            path: Arquivo SQLite
+            soft_budget: Gasto diário (US$) a partir do qual se usa o modelo
+                mais barato (padrão: JARVIS_BUDGET_SOFT_USD; 0 desativa)
+            hard_budget: Gasto diário (US$) a partir do qual os turnos são
+                recusados (padrão: JARVIS_BUDGET_HARD_USD; 0 desativa)
+            fallback_model: Modelo usado após o orçamento suave (padrão:
+                JARVIS_BUDGET_FALLBACK_MODEL ou gpt-4o-mini)
+        """
+        if soft_budget is None:
+            soft_budget = float(os.getenv("JARVIS_BUDGET_SOFT_USD", "0"))
+        if hard_budget is None:
+            hard_budget = float(os.getenv("JARVIS_BUDGET_HARD_USD", "0"))
+        self.soft_budget = soft_budget
+        self.hard_budget = hard_budget
+        self.fallback_model = fallback_model or os.getenv("JARVIS_BUDGET_FALLBACK_MODEL", "gpt-4o-mini")
+        self.session = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+        self._lock = threading.Lock()
+        self._downgraded = False
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.executescript(_SCHEMA)
+
+    @classmethod
+    def shared(cls) -> "UsageTracker":
+        """
+        Retorna o registro do processo, criado no primeiro uso.
+
+        Returns:
+            UsageTracker: Registro compartilhado
+        """
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    @classmethod
+    def active(cls) -> Optional["UsageTracker"]:
+        """Retorna o registro compartilhado, se já tiver sido criado."""
+        return cls._shared
+
+    # ---------------- registro ----------------
+
+    def _insert(self, kind: str, model: Optional[str], thread_id: Optional[str] = None,
+                run_id: Optional[str] = None, prompt_tokens: int = 0,
+                completion_tokens: int = 0, characters: int = 0) -> float:
+        cost = price_of(model, prompt_tokens, completion_tokens, characters)
+        now = time.time()
+        with self._lock:
+            try:
+                self.db.execute(
+                    "INSERT INTO usage (created, day, session, kind, thread_id, run_id, model, "
+                    "prompt_tokens, completion_tokens, characters, cost) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (now, time.strftime("%Y-%m-%d", time.localtime(now)), self.session, kind, thread_id,
+                     run_id, model, prompt_tokens, completion_tokens, characters, cost)
+                )
+                self.db.commit()
+            except sqlite3.Error as e:
+                log.error(f"Erro ao registrar uso: {e}")
+        return cost
+
+    def record_run(self, run, thread_id: str) -> None:
+        """
+        Registra o uso de uma run do assistente (campo usage da run).
+
+        Args:
+            run: Objeto Run retornado pela API (evento ou consulta de status)
+            thread_id: Thread da run
+        """
+        usage = getattr(run, "usage", None)
+        if usage is None:
+            log.debug(f"Run {run.id} sem informação de uso")
+            return
+        cost = self._insert("run", run.model, thread_id=thread_id, run_id=run.id,
+                            prompt_tokens=usage.prompt_tokens, completion_tokens=usage.completion_tokens)
+        log.info(
+            f"Uso do turno: {usage.prompt_tokens} tokens de entrada, {usage.completion_tokens} de saída "
+            f"(US$ {cost:.4f}, thread {thread_id})"
+        )
+
+    def record_completion(self, usage, model: str, kind: str = "chat", thread_id: Optional[str] = None) -> None:
+        """
+        Registra o uso de uma chamada de chat completions.
+
+        Args:
+            usage: Campo usage da resposta (ou do último chunk do streaming)
+            model: Modelo usado
+            kind: "chat" (modo rápido) ou "batch" (análise em lote)
+            thread_id: Conversa associada, se houver
+        """
+        if usage is None:
+            return
+        cost = self._insert(kind, model, thread_id=thread_id,
+                            prompt_tokens=usage.prompt_tokens, completion_tokens=usage.completion_tokens)
+        log.info(
+            f"Uso ({kind}): {usage.prompt_tokens} tokens de entrada, {usage.completion_tokens} de saída "
+            f"(US$ {cost:.4f})"
+        )
+
+    def record_speech(self, text: str, model: str) -> None:
+        """
+        Registra uma síntese de voz, cobrada por caractere.
+
+        Args:
+            text: Texto sintetizado
+            model: Modelo de TTS
+        """
+        cost = self._insert("tts", model, characters=len(text))
+        log.debug(f"Uso (tts): {len(text)} caracteres (US$ {cost:.4f})")
+
+    # ---------------- orçamento ----------------
+
+    def spent_today(self) -> float:
+        """
+        Soma o custo registrado no dia corrente.
+
+        Returns:
+            float: Gasto do dia em US$
+        """
+        with self._lock:
+            row = self.db.execute(
+                "SELECT COALESCE(SUM(cost), 0) FROM usage WHERE day = ?", (time.strftime("%Y-%m-%d"),)
+            ).fetchone()
+        return row[0]
+
+    def choose_model(self, model: Optional[str]) -> Optional[str]:
+        """
+        Aplica os orçamentos diários ao modelo de um novo turno.
+
+        Args:
+            model: Modelo pretendido (None para o modelo do assistente)
+
+        Returns:
+            Optional[str]: O próprio modelo ou, após o orçamento suave, o
+            modelo mais barato
+
+        Raises:
+            BudgetExceeded: Se o orçamento rígido estiver esgotado
+        """
+        if not self.soft_budget and not self.hard_budget:
+            return model
+        spent = self.spent_today()
+        if self.hard_budget and spent >= self.hard_budget:
+            log.error(f"Orçamento diário esgotado: US$ {spent:.2f} de US$ {self.hard_budget:.2f}")
+            raise BudgetExceeded(f"orçamento diário de US$ {self.hard_budget:.2f} esgotado (gasto: US$ {spent:.2f})")
+        if self.soft_budget and spent >= self.soft_budget:
+            if not self._downgraded:
+                self._downgraded = True
+                log.warning(
+                    f"Orçamento diário suave atingido (US$ {spent:.2f}), usando {self.fallback_model}"
+                )
+            return self.fallback_model
+        return model
+
+    # ---------------- relatórios ----------------
+
+    def _query(self, sql: str, params: tuple = ()) -> List[Dict[str, Any]]:
+        with self._lock:
+            cursor = self.db.execute(sql, params)
+            columns = [c[0] for c in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def by_day(self, days: int = 7) -> List[Dict[str, Any]]:
+        """
+        Agrega o uso por dia.
+
+        Args:
+            days: Quantidade de dias mais recentes
+
+        Returns:
+            List[Dict[str, Any]]: Um item por dia, do mais recente ao mais antigo
+        """
+        since = time.strftime("%Y-%m-%d", time.localtime(time.time() - (days - 1) * 86400))
+        return self._query(
+            "SELECT day AS grupo, SUM(kind IN ('run', 'chat')) AS turnos, SUM(prompt_tokens) AS entrada, "
+            "SUM(completion_tokens) AS saida, SUM(characters) AS caracteres, SUM(cost) AS custo "
+            "FROM usage WHERE day >= ? GROUP BY day ORDER BY day DESC", (since,)
+        )
+
+    def by_thread(self, days: int = 7) -> List[Dict[str, Any]]:
+        """
+        Agrega o uso das runs por thread, com o tamanho de entrada da
+        última run (que cresce junto com o histórico da thread).
+
+        Args:
+            days: Quantidade de dias mais recentes
+
+        Returns:
+            List[Dict[str, Any]]: Um item por thread, da mais cara à mais barata
+        """
+        since = time.strftime("%Y-%m-%d", time.localtime(time.time() - (days - 1) * 86400))
+        return self._query(
+            "SELECT thread_id AS grupo, COUNT(*) AS turnos, SUM(prompt_tokens) AS entrada, "
+            "SUM(completion_tokens) AS saida, SUM(cost) AS custo, "
+            "(SELECT u2.prompt_tokens FROM usage u2 WHERE u2.thread_id = usage.thread_id "
+            " AND u2.kind = 'run' ORDER BY u2.id DESC LIMIT 1) AS ultima_entrada "
+            "FROM usage WHERE kind = 'run' AND day >= ? GROUP BY thread_id ORDER BY custo DESC", (since,)
+        )
+
+    def last_prompt_tokens(self, thread_id: str) -> Optional[int]:
+        """
+        Tokens de entrada da run mais recente de uma thread.
+
+        Args:
+            thread_id: ID da thread
+
+        Returns:
+            Optional[int]: Tokens, ou None se a thread não tiver runs registradas
+        """
+        rows = self._query(
+            "SELECT prompt_tokens FROM usage WHERE thread_id = ? AND kind = 'run' ORDER BY id DESC LIMIT 1",
+            (thread_id,)
+        )
+        return rows[0]["prompt_tokens"] if rows else None
+
+    def session_summary(self) -> str:
+        """
+        Resume o consumo da sessão atual.
+
+        Returns:
+            str: Turnos, tokens, caracteres de TTS e custo da sessão
+        """
+        row = self._query(
+            "SELECT SUM(kind IN ('run', 'chat')) AS turnos, COALESCE(SUM(prompt_tokens), 0) AS entrada, "
+            "COALESCE(SUM(completion_tokens), 0) AS saida, COALESCE(SUM(characters), 0) AS caracteres, "
+            "COALESCE(SUM(cost), 0) AS custo FROM usage WHERE session = ?", (self.session,)
+        )[0]
+        return (
+            f"Uso da sessão: {row['turnos'] or 0} turnos, {row['entrada']} tokens de entrada, "
+            f"{row['saida']} de saída, {row['caracteres']} caracteres de TTS, US$ {row['custo']:.4f}"
+        )
+
+    def report(self, days: int = 7, by: str = "day") -> str:
+        """
+        Formata o relatório de uso.
+
+        Args:
+            days: Quantidade de dias mais recentes
+            by: "day" ou "thread"
+
+        Returns:
+            str: Tabela de uso com o total do período
+        """
+        rows = self.by_thread(days) if by == "thread" else self.by_day(days)
+        label = "thread" if by == "thread" else "dia"
+        lines = [f"Uso da OpenAI nos últimos {days} dias (por {label}):"]
+        header = f"  {label:<32} {'turnos':>7} {'entrada':>10} {'saída':>9} {'custo US$':>10}"
+        # Por thread, a entrada da última run mostra quanto o histórico cresceu
+        lines.append(header + (f" {'última entrada':>15}" if by == "thread" else ""))
+        for row in rows:
+            line = (
+                f"  {str(row['grupo']):<32} {row['turnos'] or 0:>7} {row['entrada'] or 0:>10} "
+                f"{row['saida'] or 0:>9} {row['custo'] or 0:>10.4f}"
+            )
+            if by == "thread":
+                line += f" {row['ultima_entrada'] or 0:>15}"
+            lines.append(line)
+        total = sum(row["custo"] or 0 for row in rows)
+        lines.append(f"  total: US$ {total:.4f}")
+        if self.soft_budget or self.hard_budget:
+            lines.append(
+                f"  hoje: US$ {self.spent_today():.4f} (suave: {self.soft_budget or '-'}, "
+                f"rígido: {self.hard_budget or '-'})"
+            )
+        return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Relatório de uso da OpenAI pelo Jarvis")
+    parser.add_argument("--days", type=int, default=7, help="Quantidade de dias do relatório")
+    parser.add_argument("--by", choices=["day", "thread"], default="day", help="Agrupamento do relatório")
+    args = parser.parse_args()
+    print(UsageTracker.shared().report(days=args.days, by=args.by))